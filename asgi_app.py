@@ -0,0 +1,254 @@
+"""
+Async (ASGI) serving path for the query and classifier UIs.
+
+The routes mirror flask_app and customer_ui, but the LLM calls are awaited on
+the event loop instead of pinning a worker thread. InFlightLimiter bounds the
+work each worker accepts and answers 503 once its queue is full.
+
+Production entry point (uvicorn, several worker processes):
+    python asgi_app.py query --workers 4 --port 5000
+    python asgi_app.py classifier --workers 2 --port 5050
+"""
+import argparse
+import asyncio
+import json
+import os
+from typing import Any, Dict
+
+from quart import Quart, Response, jsonify, render_template_string, request
+
+import classifier_batch
+import customer_classifier
+import llm_client
+from db_agent_app import RESULT_FORMATS, create_sample_db, get_user_prompt_result_async
+from db_pool import pool_stats
+from query_advisor import default_advisor
+from query_cache import default_cache
+from query_guard import default_guard
+from query_rewriter import default_rewriter
+from schema_context import get_schema_context
+from sql_templates import default_templates
+from sql_validator import default_validator
+from storage_backends import default_router
+from ui_templates import HTML_FORM, HTML_TEMPLATE
+
+MAX_IN_FLIGHT = int(os.getenv("AML_MAX_IN_FLIGHT", "64"))
+MAX_QUEUE = int(os.getenv("AML_MAX_QUEUE", "64"))
+QUEUE_TIMEOUT = float(os.getenv("AML_QUEUE_TIMEOUT", "5"))
+
+
+class InFlightLimiter:
+    """
+    ASGI middleware for backpressure. At most max_in_flight requests run at once;
+    up to max_queue more wait (for at most queue_timeout seconds) for a slot.
+    Anything beyond that is rejected straight away with 503 and Retry-After.
+    """
+
+    def __init__(self, app, *,
+                 max_in_flight: int = MAX_IN_FLIGHT,
+                 max_queue: int = MAX_QUEUE,
+                 queue_timeout: float = QUEUE_TIMEOUT,
+                 exempt_prefixes=("/static/", "/api/metrics")):
+        self.app = app
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.exempt_prefixes = tuple(exempt_prefixes)
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self._admitted = 0
+        self.counters = {"served": 0, "rejected_full": 0, "rejected_timeout": 0}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(self.exempt_prefixes):
+            await self.app(scope, receive, send)
+            return
+        if self._admitted >= self.max_in_flight + self.max_queue:
+            self.counters["rejected_full"] += 1
+            await self._reject(send, "server busy: request queue is full")
+            return
+        self._admitted += 1
+        try:
+            try:
+                await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                self.counters["rejected_timeout"] += 1
+                await self._reject(send, "server busy: timed out waiting for a slot")
+                return
+            try:
+                self.counters["served"] += 1
+                await self.app(scope, receive, send)
+            finally:
+                self._slots.release()
+        finally:
+            self._admitted -= 1
+
+    async def _reject(self, send, message: str) -> None:
+        body = json.dumps({"error": message}).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", b"1"),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    def stats(self) -> Dict[str, Any]:
+        out = dict(self.counters)
+        out.update(admitted=self._admitted, max_in_flight=self.max_in_flight, max_queue=self.max_queue)
+        return out
+
+
+query_app = Quart(__name__)
+query_limiter = InFlightLimiter(query_app.asgi_app)
+query_app.asgi_app = query_limiter
+
+
+WARM_UP = os.getenv("LLM_WARM_UP", "1") == "1"
+
+
+@query_app.before_serving
+async def _bootstrap_db():
+    # One-time schema bootstrap per worker; request paths only read.
+    await asyncio.to_thread(create_sample_db)
+    if WARM_UP:
+        # loads local (Ollama) models so the first request does not pay for it
+        await asyncio.to_thread(llm_client.warm_up, {"sql": "gpt-4o"})
+
+
+@query_app.route("/", methods=["GET", "POST"])
+async def query_index():
+    result = None
+    if request.method == "POST":
+        form = await request.form
+        prompt = form.get("prompt", "").strip()
+        fmt = form.get("format", "dict")
+        if prompt:
+            try:
+                result = (await get_user_prompt_result_async(prompt, fmt)).to_json(fmt=fmt, indent=True)
+            except Exception as e:
+                result = json.dumps({"error": str(e)}, indent=2)
+        else:
+            result = json.dumps({"error": "Empty prompt"}, indent=2)
+    return await render_template_string(HTML_FORM, result=result)
+
+
+@query_app.route("/api/query", methods=["POST"])
+async def query_api():
+    data = await request.get_json(force=True, silent=True)
+    if not data or "prompt" not in data:
+        return jsonify({"error": "Missing 'prompt' in JSON body"}), 400
+    prompt = str(data["prompt"]).strip()
+    if not prompt:
+        return jsonify({"error": "Empty prompt"}), 400
+    fmt = str(data.get("format", "dict"))
+    if fmt not in RESULT_FORMATS:
+        return jsonify({"error": f"'format' must be one of {', '.join(RESULT_FORMATS)}"}), 400
+    try:
+        result = await get_user_prompt_result_async(prompt, fmt)
+        return Response(result.to_json(fmt=fmt), mimetype="application/json")
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@query_app.route("/api/metrics", methods=["GET"])
+async def query_metrics():
+    return jsonify({
+        "db_pool": pool_stats(),
+        "query_advisor": default_advisor.stats(),
+        "query_guard": default_guard.stats(),
+        "query_rewriter": default_rewriter.stats(),
+        "prompt_cache": default_cache.stats() if default_cache else None,
+        "schema_context": get_schema_context().stats(),
+        "sql_templates": default_templates.stats() if default_templates else None,
+        "sql_validator": default_validator.stats(),
+        "storage_router": default_router.stats() if default_router else None,
+        "limiter": query_limiter.stats(),
+    })
+
+
+classifier_app = Quart(__name__)
+classifier_limiter = InFlightLimiter(classifier_app.asgi_app)
+classifier_app.asgi_app = classifier_limiter
+
+
+@classifier_app.before_serving
+async def _warm_up_classifier():
+    if WARM_UP:
+        await asyncio.to_thread(llm_client.warm_up, {"classify": "gpt-3.5-turbo"})
+
+
+@classifier_app.route("/", methods=["GET", "POST"])
+async def classifier_index():
+    result = None
+    query = ""
+    if request.method == "POST":
+        form = await request.form
+        query = form.get("prompt", "").strip()
+        if query:
+            try:
+                result = await customer_classifier.extract_attributes_via_llm_async(query)
+            except Exception as e:
+                result = f"Error: {str(e)}"
+        else:
+            result = "Error: empty prompt"
+    return await render_template_string(HTML_TEMPLATE, result=result, query=query)
+
+
+@classifier_app.route("/api/extract", methods=["POST"])
+async def classifier_api():
+    data = await request.get_json(force=True, silent=True) or {}
+    prompt = data.get("prompt") or ""
+    if not prompt:
+        return jsonify({"error": "Missing 'prompt' in request body"}), 400
+    try:
+        out, tier = await customer_classifier.extract_attributes_routed_async(prompt)
+        return jsonify({"result": out, "tier": tier})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@classifier_app.route("/api/extract/batch", methods=["POST"])
+async def classifier_batch_api():
+    raw = await request.get_data(as_text=True)
+    data = await request.get_json(force=True, silent=True) if raw.lstrip().startswith("{") else None
+    try:
+        lines = classifier_batch.batch_input_lines(data, raw)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    options = data if isinstance(data, dict) and "prompts" in data else request.args
+    try:
+        pack_size = int(options.get("pack_size", classifier_batch.PACK_SIZE))
+    except (TypeError, ValueError):
+        return jsonify({"error": "'pack_size' must be an integer"}), 400
+    use_llm = str(options.get("rules_only", "")).lower() not in ("1", "true")
+
+    async def generate():
+        async for records in classifier_batch.aiter_results(lines, pack_size=pack_size, use_llm=use_llm):
+            yield "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records).encode("utf-8")
+
+    return Response(generate(), mimetype="application/x-ndjson")
+
+
+@classifier_app.route("/api/metrics", methods=["GET"])
+async def classifier_metrics():
+    return jsonify({"router": customer_classifier.router_stats(), "limiter": classifier_limiter.stats()})
+
+
+APPS = {"query": ("asgi_app:query_app", 5000), "classifier": ("asgi_app:classifier_app", 5050)}
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Serve the ASGI apps with uvicorn.")
+    parser.add_argument("app", choices=sorted(APPS), nargs="?", default="query")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+    target, default_port = APPS[args.app]
+    uvicorn.run(target, host=args.host, port=args.port or default_port,
+                workers=args.workers, log_level="warning")
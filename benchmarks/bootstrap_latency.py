@@ -0,0 +1,69 @@
+"""
+Per-request latency of the database step before and after the versioned bootstrap.
+
+before: every request drops AMLcase/AMLevent and re-seeds them (the old
+        create_sample_db behaviour), then runs the SELECT.
+after:  the schema is bootstrapped once; each request only runs the SELECT.
+
+Run from the repository root:
+    python -m benchmarks.bootstrap_latency [iterations]
+"""
+import os
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+import db_schema
+
+QUERY = "SELECT * FROM AMLcase WHERE Event_Country = 'India'"
+
+
+def _run_query(db_path: str) -> int:
+    conn = sqlite3.connect(db_path)
+    try:
+        return len(conn.execute(QUERY).fetchall())
+    finally:
+        conn.close()
+
+
+def _time(fn, iterations: int):
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000.0)
+    samples.sort()
+    return {
+        "mean_ms": statistics.mean(samples),
+        "p50_ms": samples[len(samples) // 2],
+        "p99_ms": samples[min(len(samples) - 1, int(len(samples) * 0.99))],
+    }
+
+
+def main(iterations: int = 200) -> None:
+    tmpdir = tempfile.mkdtemp()
+    db_path = os.path.join(tmpdir, "bench.db")
+    try:
+        db_schema.ensure_schema(db_path)
+
+        def before():
+            db_schema.rebuild_database(db_path)
+            _run_query(db_path)
+
+        def after():
+            db_schema.ensure_schema_once(db_path)
+            _run_query(db_path)
+
+        for name, fn in (("before (drop + re-seed)", before), ("after (bootstrap once)", after)):
+            stats = _time(fn, iterations)
+            print(f"{name:26s} mean={stats['mean_ms']:8.3f}ms "
+                  f"p50={stats['p50_ms']:8.3f}ms p99={stats['p99_ms']:8.3f}ms")
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,66 @@
+"""
+Deep-page latency of the table: browse mode: LIMIT/OFFSET (what a page number
+costs) versus the keyset cursors of browse_table, and the case_id: search as
+LIKE '%term%' versus the indexed prefix range.
+
+Run from the repository root:
+    python -m benchmarks.browse_pagination [cases]
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+import db_schema
+from benchmarks.synthetic import make_db
+from db_agent_app import _decode_token, _encode_token, browse_table
+
+PAGE = 100
+
+
+def _cursor_after(conn: sqlite3.Connection, case_id: str) -> str:
+    # a cursor as browse_table would issue it for a page ending at case_id
+    scope = _decode_token(browse_table(conn, "amlcase", limit=1)["next_cursor"])["s"]
+    return _encode_token({"s": scope, "k": [case_id]})
+
+
+def _best_ms(fn, runs: int = 5) -> float:
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main(cases: int) -> None:
+    path = os.path.join(tempfile.mkdtemp(), "browse.db")
+    make_db(path, cases)
+    db_schema.ensure_schema(path, seed=False)  # indexes + ANALYZE on the loaded data
+    conn = sqlite3.connect(path)
+    print(f"cases={cases} page={PAGE}")
+    for depth in (0.01, 0.5, 0.99):
+        offset = int(cases * depth) // PAGE * PAGE
+        last = conn.execute("SELECT CASE_ID FROM AMLcase ORDER BY CASE_ID LIMIT 1 OFFSET ?",
+                            (max(offset - 1, 0),)).fetchone()[0]
+        cursor = _cursor_after(conn, last)
+        offset_ms = _best_ms(lambda: conn.execute(
+            "SELECT * FROM AMLcase ORDER BY CASE_ID LIMIT ? OFFSET ?", (PAGE, offset)).fetchall())
+        keyset_ms = _best_ms(lambda: browse_table(conn, "amlcase", limit=PAGE, cursor=cursor))
+        print(f"  page at {depth:>4.0%}: offset={offset_ms:8.2f}ms keyset={keyset_ms:6.2f}ms")
+
+    # the last hundred cases: LIKE has to scan up to them, the range seeks to them
+    term = f"C{cases // PAGE - 1:07d}"
+    like_rows = conn.execute("SELECT * FROM AMLcase WHERE CASE_ID LIKE ? LIMIT ?", (f"%{term}%", PAGE)).fetchall()
+    prefix_rows = browse_table(conn, "amlcase", prefix=term, limit=PAGE)["rows"]
+    like_ms = _best_ms(lambda: conn.execute(
+        "SELECT * FROM AMLcase WHERE CASE_ID LIKE ? LIMIT ?", (f"%{term}%", PAGE)).fetchall())
+    prefix_ms = _best_ms(lambda: browse_table(conn, "amlcase", prefix=term, limit=PAGE))
+    print(f"  case_id:{term}: like '%term%'={like_ms:.2f}ms ({len(like_rows)} rows) "
+          f"prefix range={prefix_ms:.2f}ms ({len(prefix_rows)} rows)")
+    conn.close()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,69 @@
+"""
+Bulk load throughput: synthetic AMLcase rows are written to a CSV file and
+loaded with bulk_loader (batched transactions, load PRAGMAs, indexes rebuilt
+at the end). The baseline loads the first slice of the same file the way an
+ad-hoc script would: default PRAGMAs, indexes in place, a commit per 1,000
+rows.
+
+Run from the repository root:
+    python -m benchmarks.bulk_load [rows] [baseline rows]
+"""
+import csv
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from itertools import islice
+
+import db_schema
+from benchmarks.synthetic import iter_cases
+from bulk_loader import load_files
+
+
+def _write_csv(path: str, rows: int) -> None:
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["CASE_ID", "customer", "create_date", "AAA_Status", "CASE_Status",
+                         "Event_Country", "Analyst", "Source_System"])
+        writer.writerows(iter_cases(rows))
+
+
+def _baseline(csv_path: str, db_path: str, rows: int) -> float:
+    db_schema.ensure_schema(db_path, seed=False)
+    conn = sqlite3.connect(db_path)
+    start = time.perf_counter()
+    with open(csv_path, encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        next(reader)
+        reader = islice(reader, rows)
+        while True:
+            chunk = list(islice(reader, 1_000))
+            if not chunk:
+                break
+            conn.executemany("INSERT INTO AMLcase VALUES (?, ?, ?, ?, ?, ?, ?, ?)", chunk)
+            conn.commit()
+    elapsed = time.perf_counter() - start
+    conn.close()
+    return rows / elapsed
+
+
+def main(rows: int, baseline_rows: int) -> None:
+    workdir = tempfile.mkdtemp()
+    csv_path = os.path.join(workdir, "cases.csv")
+    start = time.perf_counter()
+    _write_csv(csv_path, rows)
+    print(f"wrote {rows} rows ({os.path.getsize(csv_path) / 1e6:.0f} MB) in {time.perf_counter() - start:.1f}s")
+
+    baseline = _baseline(csv_path, os.path.join(workdir, "baseline.db"), min(baseline_rows, rows))
+    print(f"baseline ({min(baseline_rows, rows)} rows): {baseline:10.0f} rows/s")
+
+    stats = load_files([csv_path], os.path.join(workdir, "bulk.db"))
+    print(f"bulk_loader ({stats['inserted']} rows): {stats['rows_per_s']:10.0f} rows/s "
+          f"elapsed={stats['elapsed_s']:.1f}s (index rebuild {stats['index_rebuild_s']:.1f}s) "
+          f"invalid={stats['invalid']}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5_000_000,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 500_000)
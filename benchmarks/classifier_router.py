@@ -0,0 +1,56 @@
+"""
+LLM calls saved by local-first routing in the customer classifier.
+
+For each confidence threshold, the synthetic prompts are classified with
+extract_attributes_routed against the local stub server (with a simulated LLM
+round trip), reporting how many prompts each tier answered, the LLM requests
+actually sent and the wall time. A threshold above 1.0 is the old behaviour:
+every prompt goes to the LLM.
+
+Run from the repository root:
+    python -m benchmarks.classifier_router [prompts] [llm_delay_seconds]
+"""
+import sys
+import time
+from collections import Counter
+
+import customer_classifier
+import llm_client
+from benchmarks.stub_llm_server import start_stub_server
+from benchmarks.synthetic import iter_classifier_prompts
+
+THRESHOLDS = [1.1, 1.0, 0.8, 0.6]
+
+
+def _answer(body: dict) -> str:
+    # A complete answer in the required format, built from the prompt itself.
+    prompt = body["messages"][-1]["content"].rsplit("\n\n", 1)[-1]
+    return customer_classifier.extract_attributes_via_rules(prompt)
+
+
+def main(n: int = 2_000, delay: float = 0.02) -> None:
+    prompts = list(iter_classifier_prompts(n))
+    server, base_url = start_stub_server(delay=delay, responder=_answer)
+    llm_client.set_backend(llm_client.OpenAIBackend(api_key="stub", base_url=base_url))
+    try:
+        for threshold in THRESHOLDS:
+            before = server.requests
+            tiers = Counter()
+            start = time.perf_counter()
+            for p in prompts:
+                _, tier = customer_classifier.extract_attributes_routed(p, api_key="stub",
+                                                                        local_threshold=threshold)
+                tiers[tier] += 1
+            elapsed = time.perf_counter() - start
+            calls = server.requests - before
+            print(f"threshold={threshold:4.2f} prompts={n} local={tiers['local']:>6} llm={tiers['llm']:>6} "
+                  f"rules_fallback={tiers['rules_fallback']:>4} llm_calls={calls:>6} "
+                  f"saved={n - calls:>6} ({(n - calls) / n:6.1%}) elapsed={elapsed:7.2f}s")
+    finally:
+        llm_client.close_all()
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2_000,
+         float(sys.argv[2]) if len(sys.argv) > 2 else 0.02)
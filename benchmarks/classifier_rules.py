@@ -0,0 +1,69 @@
+"""
+Throughput of the rule-based attribute extractor on synthetic prompts.
+
+legacy:  the previous fallback, ~15 separate re.search calls per prompt plus a
+         findall over all tokens (kept here only as a reference point).
+current: customer_classifier.extract_attributes_via_rules, one precompiled
+         alternation scanned once per prompt.
+
+Run from the repository root:
+    python -m benchmarks.classifier_rules [prompts]
+"""
+import re
+import sys
+import time
+
+import customer_classifier
+from benchmarks.synthetic import iter_classifier_prompts
+
+_LEGACY_GROUPS = {
+    "EBBS attribute": ["date_of_birth", "age", "last_name", "first_name"],
+    "ICM attribute": ["phone_number", "email", "primary_address"],
+    "ECDD attribute": ["risk_score", "credit_rating", "kyc_status"],
+}
+
+
+def _legacy_extract(prompt: str) -> str:
+    found = {k: [] for k in _LEGACY_GROUPS}
+    unknown = set()
+    rel_id = ""
+    m = re.search(r"rel[\s_\-]*id[:=]?\s*([A-Za-z0-9\-\_]+)", prompt, flags=re.IGNORECASE)
+    if m:
+        rel_id = m.group(1)
+    for grp, attrs in _LEGACY_GROUPS.items():
+        for attr in attrs:
+            if re.search(r"\b" + re.escape(attr) + r"\b", prompt, flags=re.IGNORECASE):
+                found[grp].append(attr)
+    if re.search(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}", prompt):
+        if "email" not in found["ICM attribute"]:
+            found["ICM attribute"].append("email")
+    if re.search(r"(?:\+?\d[\d\-\s\(\)]{6,}\d)", prompt):
+        if "phone_number" not in found["ICM attribute"]:
+            found["ICM attribute"].append("phone_number")
+    if re.search(r"\b(?:\d{4}-\d{2}-\d{2}|\d{1,2}/\d{1,2}/\d{2,4})\b", prompt):
+        if "date_of_birth" not in found["EBBS attribute"]:
+            found["EBBS attribute"].append("date_of_birth")
+    if re.search(r"\b(?:age[:\s]*\d{1,3}|\b\d{1,3}\s+years?\b)", prompt, flags=re.IGNORECASE):
+        if "age" not in found["EBBS attribute"]:
+            found["EBBS attribute"].append("age")
+    known = {a for attrs in _LEGACY_GROUPS.values() for a in attrs} | {"rel", "id", "relid", "rel_id"}
+    for t in re.findall(r"\b[a-zA-Z_]{3,30}\b", prompt):
+        tt = t.lower()
+        if tt not in known and ("_" in tt or tt in {"kyc", "kyc_status", "credit", "rating", "risk", "primary_address"}):
+            unknown.add(tt)
+    return "\n".join([f"Rel ID = {rel_id}"] + [f"{g} = {v}" for g, v in found.items()] + [str(sorted(unknown))])
+
+
+def main(n: int = 100_000) -> None:
+    prompts = list(iter_classifier_prompts(n))
+    for name, fn in (("legacy", _legacy_extract),
+                     ("current", customer_classifier.extract_attributes_via_rules)):
+        start = time.perf_counter()
+        for p in prompts:
+            fn(p)
+        elapsed = time.perf_counter() - start
+        print(f"{name:8s} prompts={n} elapsed={elapsed:7.3f}s prompts/s={n / elapsed:10.0f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,52 @@
+"""
+Per-call latency of a fresh LLM client per call (the old behaviour) versus the
+shared keep-alive client in llm_client, against the local stub server.
+
+Run from the repository root:
+    python -m benchmarks.llm_transport [calls]
+"""
+import statistics
+import sys
+import time
+
+import llm_client
+from benchmarks.stub_llm_server import start_stub_server
+
+MESSAGES = [{"role": "user", "content": "open cases in India"}]
+
+
+def _measure(fn, calls: int):
+    samples = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000.0)
+    samples.sort()
+    return statistics.mean(samples), samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+
+
+def main(calls: int = 200) -> None:
+    server, base_url = start_stub_server()
+    try:
+        def fresh_client():
+            backend = llm_client.OpenAIBackend(api_key="stub", base_url=base_url)
+            try:
+                backend.chat(MESSAGES, model="stub")
+            finally:
+                backend.close()
+
+        shared = llm_client.OpenAIBackend(api_key="stub", base_url=base_url)
+
+        def shared_client():
+            shared.chat(MESSAGES, model="stub")
+
+        for name, fn in (("fresh client per call", fresh_client), ("shared client", shared_client)):
+            mean, p99 = _measure(fn, calls)
+            print(f"{name:22s} mean={mean:7.3f}ms p99={p99:7.3f}ms")
+        shared.close()
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
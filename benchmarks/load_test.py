@@ -0,0 +1,116 @@
+"""
+Load test for the query API against a local stub LLM.
+
+Starts the stub LLM (with a configurable delay standing in for gpt-4o latency),
+launches the chosen server in a subprocess pointed at the stub, fires requests
+at POST /api/query from many client threads and reports requests per second,
+latency percentiles and how many requests were shed with 503.
+
+Run from the repository root:
+    python -m benchmarks.load_test --target asgi --workers 2 --requests 400 --concurrency 64
+    python -m benchmarks.load_test --target wsgi --requests 400 --concurrency 64
+"""
+import argparse
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple
+
+from benchmarks.stub_llm_server import start_stub_server
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_for_port(port: int, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"server did not start on port {port}")
+
+
+def _start_server(target: str, port: int, workers: int, env: dict) -> subprocess.Popen:
+    if target == "asgi":
+        cmd = [sys.executable, "-m", "uvicorn", "asgi_app:query_app", "--port", str(port),
+               "--workers", str(workers), "--log-level", "warning"]
+    else:
+        cmd = [sys.executable, "-c",
+               f"from flask_app import app; app.run(port={port}, threaded=True)"]
+    return subprocess.Popen(cmd, cwd=ROOT, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def _one_request(port: int, prompt: str) -> Tuple[int, float]:
+    start = time.perf_counter()
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+    try:
+        conn.request("POST", "/api/query", body=json.dumps({"prompt": prompt}),
+                     headers={"Content-Type": "application/json"})
+        resp = conn.getresponse()
+        resp.read()
+        status = resp.status
+    except OSError:
+        status = 0
+    finally:
+        conn.close()
+    return status, (time.perf_counter() - start) * 1000.0
+
+
+def _percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    return samples[min(len(samples) - 1, int(len(samples) * pct))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--target", choices=("asgi", "wsgi"), default="asgi")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--llm-delay", type=float, default=0.5, help="stub LLM latency in seconds")
+    args = parser.parse_args()
+
+    stub, base_url = start_stub_server(delay=args.llm_delay)
+    port = _free_port()
+    env = dict(os.environ, OPENAI_BASE_URL=base_url, OPENAI_API_KEY="stub",
+               AML_CACHE_DISABLED="1")
+    proc = _start_server(args.target, port, args.workers, env)
+    try:
+        _wait_for_port(port)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            results = list(pool.map(lambda i: _one_request(port, f"open cases {i}"),
+                                    range(args.requests)))
+        elapsed = time.perf_counter() - start
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+        stub.shutdown()
+
+    ok = sorted(ms for status, ms in results if status == 200)
+    shed = sum(1 for status, _ in results if status == 503)
+    failed = len(results) - len(ok) - shed
+    print(f"target={args.target} workers={args.workers} concurrency={args.concurrency} "
+          f"llm_delay={args.llm_delay}s")
+    print(f"requests={len(results)} ok={len(ok)} shed_503={shed} failed={failed} "
+          f"elapsed={elapsed:.2f}s rps={len(ok) / elapsed:.1f}")
+    print(f"latency p50={_percentile(ok, 0.50):.1f}ms p99={_percentile(ok, 0.99):.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
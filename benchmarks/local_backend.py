@@ -0,0 +1,58 @@
+"""
+First-request and steady-state latency of the Ollama backend, with and without
+warm-up, against the stub server (which simulates the model load time), plus
+throughput at several max_concurrency settings.
+
+Run from the repository root:
+    python -m benchmarks.local_backend [requests] [load_delay_seconds] [llm_delay_seconds]
+"""
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import llm_client
+from benchmarks.stub_llm_server import server_root, start_stub_server
+
+MESSAGES = [{"role": "user", "content": "email and age for rel_id REL-1"}]
+
+
+def _first_and_rest(backend, model: str, n: int):
+    start = time.perf_counter()
+    backend.chat(MESSAGES, model=model)
+    first = (time.perf_counter() - start) * 1000.0
+    start = time.perf_counter()
+    for _ in range(n):
+        backend.chat(MESSAGES, model=model)
+    return first, (time.perf_counter() - start) * 1000.0 / max(n, 1)
+
+
+def main(n: int = 50, load_delay: float = 1.0, delay: float = 0.02) -> None:
+    server, _ = start_stub_server(delay=delay, load_delay=load_delay, content="ok")
+    host = server_root(server)
+    try:
+        for model, warm in (("cold-model", False), ("warm-model", True)):
+            backend = llm_client.OllamaBackend(host=host)
+            if warm:
+                start = time.perf_counter()
+                backend.warm_up([model])
+                print(f"warm-up {model}: {(time.perf_counter() - start) * 1000.0:8.1f}ms (at startup)")
+            first, rest = _first_and_rest(backend, model, n)
+            print(f"{model:10s} first request={first:8.1f}ms  mean after={rest:6.1f}ms")
+            backend.close()
+
+        for concurrency in (1, 4, 8):
+            backend = llm_client.OllamaBackend(host=host, max_concurrency=concurrency)
+            backend.warm_up(["warm-model"])
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=16) as pool:
+                list(pool.map(lambda _: backend.chat(MESSAGES, model="warm-model"), range(n)))
+            elapsed = time.perf_counter() - start
+            print(f"max_concurrency={concurrency:2d} requests={n} {n / elapsed:7.1f} req/s")
+            backend.close()
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    args = [float(a) for a in sys.argv[1:]]
+    main(int(args[0]) if args else 50, *(args[1:3]))
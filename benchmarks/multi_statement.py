@@ -0,0 +1,52 @@
+"""
+Wall time of several generated statements run one after another on one
+connection versus concurrently with run_statements (one pooled read-only
+connection each), plus the deadline interrupting a runaway statement.
+
+Run from the repository root:
+    python -m benchmarks.multi_statement [cases]
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic import make_db
+from db_agent_app import run_select, run_statements
+
+STATEMENTS = [
+    "SELECT Event_Country, COUNT(*) FROM AMLcase GROUP BY Event_Country",
+    "SELECT Analyst, CASE_Status, COUNT(*) FROM AMLcase GROUP BY Analyst, CASE_Status",
+    "SELECT COUNT(*) FROM AMLcase WHERE customer LIKE '%Morgan%'",
+    "SELECT substr(create_date, 1, 4) AS year, COUNT(*) FROM AMLcase GROUP BY year",
+]
+# A cartesian product that would run for minutes.
+RUNAWAY = "SELECT COUNT(*) FROM AMLcase a, AMLcase b WHERE a.customer < b.customer"
+
+
+def main(cases: int) -> None:
+    path = os.path.join(tempfile.mkdtemp(), "multi.db")
+    make_db(path, cases)
+    run_statements(STATEMENTS, path)  # warm the pool and page cache
+
+    conn = sqlite3.connect(path)
+    start = time.perf_counter()
+    for sql in STATEMENTS:
+        run_select(conn, sql)
+    sequential = time.perf_counter() - start
+    conn.close()
+
+    result = run_statements(STATEMENTS, path)
+    print(f"cases={cases} statements={len(STATEMENTS)} "
+          f"sequential={sequential * 1000:.1f}ms concurrent={result.elapsed_ms:.1f}ms")
+    for key, (_, r, elapsed_ms) in result.statements.items():
+        print(f"  {key}: {elapsed_ms:8.1f}ms rows={len(r.rows)} ok={r.ok}")
+
+    result = run_statements(STATEMENTS + [RUNAWAY], path, deadline=1.0)
+    _, runaway, _ = result.statements[f"statement_{len(STATEMENTS) + 1}"]
+    print(f"with runaway, deadline=1s: total={result.elapsed_ms:.1f}ms runaway error={runaway.error!r}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500_000)
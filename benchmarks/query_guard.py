@@ -0,0 +1,65 @@
+"""
+What the query guard does to a mix of generated statements, and what it costs.
+
+Each statement is run once through QueryGuard.execute and reported as ok,
+truncated, rejected (with the reason) or timed out, with its wall time. The
+overhead line is the check alone on a repeated statement (cached plan and row
+estimates) against running that statement unguarded.
+
+Run from the repository root:
+    python -m benchmarks.query_guard [cases]
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic import make_db
+from query_guard import QueryGuard, QueryRejected
+
+STATEMENTS = [
+    ("aggregate", "SELECT Event_Country, COUNT(*) FROM AMLcase GROUP BY Event_Country"),
+    ("point lookup", "SELECT * FROM AMLcase WHERE CASE_ID = 'C000000042'"),
+    ("everything", "SELECT * FROM AMLcase"),
+    ("cartesian", "SELECT COUNT(*) FROM AMLcase a, AMLcase b WHERE a.customer < b.customer"),
+    ("recursive", "WITH RECURSIVE n(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM n) SELECT x FROM n"),
+    ("bounded recursive", "WITH RECURSIVE n(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM n LIMIT 1000) "
+                          "SELECT COUNT(*) FROM n"),
+    ("slow self-join", "SELECT COUNT(*) FROM AMLcase a JOIN AMLcase b ON substr(a.customer, 1, 3) = "
+                       "substr(b.customer, 1, 3) WHERE a.CASE_ID < 'C000020000'"),
+]
+
+
+def main(cases: int) -> None:
+    path = os.path.join(tempfile.mkdtemp(), "guard.db")
+    make_db(path, cases)
+    conn = sqlite3.connect(path)
+    guard = QueryGuard(timeout=1.0, max_rows=10_000)
+    print(f"cases={cases} timeout={guard.timeout:g}s max_rows={guard.max_rows} max_cost={guard.max_cost:.2g}")
+    for name, sql in STATEMENTS:
+        start = time.perf_counter()
+        try:
+            _, rows, truncated = guard.execute(conn, sql)
+            outcome = f"rows={len(rows)}" + (" truncated" if truncated else "")
+        except QueryRejected as e:
+            outcome = f"rejected: {e}"
+        print(f"  {name:18s} {(time.perf_counter() - start) * 1000:9.1f}ms  {outcome}")
+    print(f"  stats: {guard.stats()}")
+
+    sql = STATEMENTS[1][1]
+    n = 2_000
+    start = time.perf_counter()
+    for _ in range(n):
+        guard.check(conn, sql)
+    check_us = (time.perf_counter() - start) / n * 1e6
+    start = time.perf_counter()
+    for _ in range(n):
+        conn.execute(sql).fetchall()
+    run_us = (time.perf_counter() - start) / n * 1e6
+    print(f"overhead: check={check_us:.1f}us per statement, unguarded point lookup={run_us:.1f}us")
+    conn.close()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
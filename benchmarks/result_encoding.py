@@ -0,0 +1,58 @@
+"""
+Cost of turning a query result into an HTTP body.
+
+legacy: rows_to_json (json.dumps) -> json.loads -> jsonify-style json.dumps,
+        the encode/decode/encode round trip flask_app used to do.
+single: QueryResult.to_json() once, with orjson and with the stdlib fallback.
+
+Run from the repository root:
+    python -m benchmarks.result_encoding [rows ...]
+"""
+import json
+import sys
+import time
+
+import json_codec
+from benchmarks.synthetic import iter_cases
+from db_agent_app import QueryResult
+
+COLUMNS = ["CASE_ID", "customer", "create_date", "AAA_Status", "CASE_Status",
+           "Event_Country", "Analyst", "Source_System"]
+
+
+def _legacy(rows) -> int:
+    text = json.dumps({"rows": [dict(zip(COLUMNS, r)) for r in rows]}, default=str)
+    parsed = json.loads(text)
+    return len(json.dumps(parsed, default=str))
+
+
+def _single(rows) -> int:
+    return len(QueryResult(COLUMNS, rows).to_json())
+
+
+def _best_of(fn, rows, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(rows)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000.0
+
+
+def main(sizes) -> None:
+    fast = json_codec.orjson
+    for n in sizes:
+        rows = list(iter_cases(n))
+        repeat = max(3, min(200, 200_000 // max(n, 1)))
+        legacy = _best_of(_legacy, rows, repeat)
+        json_codec.orjson = None
+        stdlib = _best_of(_single, rows, repeat)
+        json_codec.orjson = fast
+        line = f"rows={n:>7} legacy={legacy:9.3f}ms single/stdlib={stdlib:9.3f}ms"
+        if fast is not None:
+            line += f" single/orjson={_best_of(_single, rows, repeat):9.3f}ms"
+        print(line)
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [10, 100, 1_000, 10_000, 100_000])
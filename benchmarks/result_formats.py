@@ -0,0 +1,43 @@
+"""
+Memory and serialization time of the QueryResult layouts (dict, rows, columns).
+
+Peak memory covers building the payload and encoding it, starting from the
+row tuples sqlite3 returns; time is the best of several runs without tracing.
+
+Run from the repository root:
+    python -m benchmarks.result_formats [rows ...]
+"""
+import sys
+import time
+import tracemalloc
+
+from benchmarks.synthetic import iter_cases
+from db_agent_app import RESULT_FORMATS, QueryResult
+
+COLUMNS = ["CASE_ID", "customer", "create_date", "AAA_Status", "CASE_Status",
+           "Event_Country", "Analyst", "Source_System"]
+
+
+def _encode(rows, fmt: str) -> int:
+    return len(QueryResult(COLUMNS, rows).to_json(fmt=fmt))
+
+
+def main(sizes) -> None:
+    for n in sizes:
+        rows = list(iter_cases(n))
+        for fmt in RESULT_FORMATS:
+            tracemalloc.start()
+            size = _encode(rows, fmt)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            best = float("inf")
+            for _ in range(max(3, min(50, 100_000 // max(n, 1)))):
+                start = time.perf_counter()
+                _encode(rows, fmt)
+                best = min(best, time.perf_counter() - start)
+            print(f"rows={n:>7} format={fmt:8s} bytes={size:>11} "
+                  f"peak={peak / 1024 / 1024:8.2f} MiB encode={best * 1000:9.3f}ms")
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [1_000, 10_000, 100_000])
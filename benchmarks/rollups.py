@@ -0,0 +1,90 @@
+"""
+Dashboard count questions as GROUP BY over the table (what the model writes)
+against the same statements answered from the rollups by query_rewriter, plus
+what the rollup triggers add to row-at-a-time ingest.
+
+Run from the repository root:
+    python -m benchmarks.rollups [rows ...]
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+import rollups
+from benchmarks.synthetic import iter_cases, make_db
+from query_rewriter import RollupRewriter
+from sql_validator import SqlValidator
+
+QUESTIONS = [
+    "SELECT CASE_Status, COUNT(*) FROM AMLcase GROUP BY CASE_Status",
+    "SELECT Event_Country, COUNT(*) AS cases FROM AMLcase GROUP BY Event_Country ORDER BY cases DESC",
+    "SELECT Analyst, COUNT(*) FROM AMLcase GROUP BY Analyst ORDER BY 2 DESC LIMIT 5",
+    "SELECT Source_System, COUNT(*) FROM AMLcase GROUP BY Source_System",
+    "SELECT strftime('%Y-%m', create_date) AS month, COUNT(*) FROM AMLcase GROUP BY month ORDER BY month",
+    "SELECT event_Status, COUNT(*) FROM AMLevent GROUP BY event_Status",
+    "SELECT COUNT(*) FROM AMLcase WHERE CASE_Status = 'RESOLVED'",
+]
+INGEST_ROWS = 20_000
+
+
+def _best_ms(fn, runs: int = 3) -> float:
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def _ingest_ms(conn: sqlite3.Connection, rows: int, with_triggers: bool) -> float:
+    # row-at-a-time inserts, as upserts of a daily delta arrive, rolled back afterwards
+    if not with_triggers:
+        rollups.suspend(conn, "AMLcase")
+    batch = list(iter_cases(INGEST_ROWS, seed=99, start_id=rows + 1))
+    start = time.perf_counter()
+    for row in batch:
+        conn.execute("INSERT INTO AMLcase VALUES (?, ?, ?, ?, ?, ?, ?, ?)", row)
+    elapsed = time.perf_counter() - start
+    conn.rollback()
+    if not with_triggers:
+        rollups.restore(conn, "AMLcase")
+        conn.commit()
+    return elapsed * 1000
+
+
+def main(rows: int) -> None:
+    path = os.path.join(tempfile.mkdtemp(), "rollups.db")
+    start = time.perf_counter()
+    make_db(path, rows, rows)
+    conn = sqlite3.connect(path)
+    conn.execute("ANALYZE")
+    conn.commit()
+    print(f"cases={rows} events={rows} (built in {time.perf_counter() - start:.1f}s)")
+    validator, rewriter = SqlValidator(), RollupRewriter(enabled=True)
+    allowed = validator.allowed(conn)
+    for sql in QUESTIONS:
+        expected = conn.execute(sql).fetchall()
+        answered = rewriter.execute(conn, sql, allowed)
+        assert answered is not None and sorted(answered[1], key=repr) == sorted(expected, key=repr), sql
+        scan_ms = _best_ms(lambda: conn.execute(sql).fetchall())
+        rollup_ms = _best_ms(lambda: rewriter.execute(conn, sql, allowed))
+        print(f"  {sql[:72]:72s} scan={scan_ms:9.2f}ms  rollup={rollup_ms:7.3f}ms  "
+              f"({scan_ms / rollup_ms:,.0f}x)")
+    # cold is what the first dashboard load after a restart sees
+    conn.close()
+    conn = sqlite3.connect(path)
+    start = time.perf_counter()
+    rewriter.execute(conn, QUESTIONS[0], validator.allowed(conn))
+    print(f"  first rollup query on a new connection: {(time.perf_counter() - start) * 1000:.2f}ms")
+    plain_ms = _ingest_ms(conn, rows, with_triggers=False)
+    kept_ms = _ingest_ms(conn, rows, with_triggers=True)
+    print(f"  ingest of {INGEST_ROWS} rows one by one: {plain_ms:.0f}ms without rollups, "
+          f"{kept_ms:.0f}ms keeping them ({kept_ms / plain_ms:.2f}x)")
+    conn.close()
+
+
+if __name__ == "__main__":
+    for n in (sys.argv[1:] or ["1000000", "10000000"]):
+        main(int(n))
@@ -0,0 +1,69 @@
+"""
+Size of the text-to-SQL prompt with the old hard-coded DDL versus the
+introspected, question-filtered schema context, and the cost of building the
+schema context cold (introspection) versus from cache.
+
+Run from the repository root:
+    python -m benchmarks.schema_prompt [cases]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import schema_context
+from benchmarks.synthetic import make_db
+from db_agent_app import _build_sql_prompt
+
+LEGACY_CONTEXT = """Context:\nCREATE TABLE AMLcase (
+            CASE_ID         VARCHAR(100) PRIMARY KEY,
+            customer        VARCHAR(255) NOT NULL,
+            create_date     DATETIME NOT NULL,
+            AAA_Status      VARCHAR(30),
+            CASE_Status     VARCHAR(50),
+            Event_Country   VARCHAR(100),
+            Analyst         VARCHAR(100),
+            Source_System   VARCHAR(100)
+        )\n\nCREATE TABLE AMLevent (
+            EVENT_ID         VARCHAR(100) PRIMARY KEY,
+            create_date      DATETIME NOT NULL,
+            event_Status      VARCHAR(30),
+            event_description VARCHAR(50)  
+        )\n\n"""
+
+QUESTIONS = [
+    "open cases in India",
+    "how many escalated urgent cases does Bob Smith have",
+    "events pending review created this year",
+    "closed risk relevant cases from the UK by analyst",
+]
+
+
+def _legacy_prompt(question: str) -> str:
+    return ("Use the following context to answer the question:\n\n" + LEGACY_CONTEXT
+            + f"Question: {question}\nAnswer:")
+
+
+def main(cases: int = 100_000) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = make_db(os.path.join(tmp, "bench.db"), cases, cases // 4)
+        for q in QUESTIONS:
+            legacy, new = _legacy_prompt(q), _build_sql_prompt(q, "", path)
+            # ~4 characters per token for English/SQL text
+            print(f"{q[:48]:48s} legacy={len(legacy):5d} chars (~{len(legacy) // 4} tok) "
+                  f"schema-aware={len(new):5d} chars (~{len(new) // 4} tok)")
+
+        ctx = schema_context.SchemaContext(path)
+        start = time.perf_counter()
+        ctx.render(QUESTIONS[0])
+        cold = (time.perf_counter() - start) * 1000.0
+        n = 1000
+        start = time.perf_counter()
+        for _ in range(n):
+            ctx.render(QUESTIONS[0])
+        warm = (time.perf_counter() - start) * 1000.0 / n
+        print(f"cases={cases} introspection (cold)={cold:8.2f}ms cached={warm:6.3f}ms per prompt")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
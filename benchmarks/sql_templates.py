@@ -0,0 +1,111 @@
+"""
+Precision, recall and lookup latency of the few-shot SQL template store on a
+labelled prompt set.
+
+Prompts are generated from question shapes with a known SQL answer. They are
+replayed in random order: a template hit is checked against the labelled SQL
+(with parameters inlined); a miss stands in for an LLM call, whose (labelled)
+answer is then learned. Shapes without any literal and near-miss paraphrases
+with different SQL are mixed in as negatives.
+
+precision = correct hits / hits
+recall    = correct hits / prompts whose shape had already been learned
+
+Run from the repository root:
+    python -m benchmarks.sql_templates [prompts]
+"""
+import functools
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+import schema_context
+from benchmarks.synthetic import ANALYSTS, CASE_STATUSES, COUNTRIES, FIRST, LAST, make_db
+from sql_templates import TemplateStore
+
+# (question shape, SQL shape, value generator); {v} / {n} are the literals.
+SHAPES = [
+    ("cases analysed by {v}", "SELECT * FROM AMLcase WHERE Analyst = '{v}'",
+     lambda r: r.choice(ANALYSTS)),
+    ("show me all cases handled by {v}", "SELECT * FROM AMLcase WHERE Analyst = '{v}'",
+     lambda r: r.choice(ANALYSTS)),
+    ("open cases in {v}", "SELECT * FROM AMLcase WHERE Event_Country = '{V}' "
+                          "AND CASE_Status IN ('NEW CASE', 'IN-PROGRESS')",
+     lambda r: r.choice(COUNTRIES).lower()),
+    ("how many cases with status {v}", "SELECT COUNT(*) FROM AMLcase WHERE CASE_Status = '{v}'",
+     lambda r: r.choice(CASE_STATUSES)),
+    ("cases for customer {v}", "SELECT * FROM AMLcase WHERE customer LIKE '%{v}%'",
+     lambda r: f"{r.choice(FIRST)} {r.choice(LAST)}"),
+    ("top {n} most recent cases in {v}",
+     "SELECT * FROM AMLcase WHERE Event_Country = '{v}' ORDER BY create_date DESC LIMIT {n}",
+     lambda r: r.choice(COUNTRIES)),
+]
+# Similar wording, different SQL: a hit on these is a false positive.
+NEGATIVES = [
+    ("cases not analysed by {v}", "SELECT * FROM AMLcase WHERE Analyst <> '{v}'",
+     lambda r: r.choice(ANALYSTS)),
+    ("open cases in {v} from last year", "SELECT * FROM AMLcase WHERE Event_Country = '{V}' "
+                                         "AND create_date >= date('now', '-1 year')",
+     lambda r: r.choice(COUNTRIES).lower()),
+    ("how many cases are there", "SELECT COUNT(*) FROM AMLcase", lambda r: ""),
+]
+
+
+def _render(sql: str, params: tuple) -> str:
+    parts = sql.split("?")
+    out = parts[0]
+    for value, part in zip(params, parts[1:]):
+        out += (str(value) if isinstance(value, (int, float)) else "'" + value.replace("'", "''") + "'") + part
+    return out
+
+
+def _sample(rng: random.Random, shape):
+    question, sql, gen = shape
+    v = gen(rng)
+    n = rng.randint(2, 50)
+    # countries are asked in lower case, stored title/upper case
+    stored = next((c for c in COUNTRIES if c.lower() == v), v)
+    return question.format(v=v, n=n), sql.format(v=v, V=stored, n=n)
+
+
+def main(n: int = 2_000) -> None:
+    rng = random.Random(5)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = make_db(os.path.join(tmp, "bench.db"), 20_000)
+        store = TemplateStore(domain_fn=functools.partial(schema_context.column_domain, db_path=path))
+        learned_shapes = set()
+        hits = correct = eligible = llm_calls = false_pos = 0
+        latencies = []
+        for _ in range(n):
+            negative = rng.random() < 0.2
+            shape = rng.choice(NEGATIVES if negative else SHAPES)
+            prompt, expected = _sample(rng, shape)
+            start = time.perf_counter()
+            matched = store.match(prompt)
+            latencies.append((time.perf_counter() - start) * 1e6)
+            if shape in learned_shapes:
+                eligible += 1
+            if matched is not None:
+                hits += 1
+                if _render(matched[0], matched[1]) == expected:
+                    correct += 1
+                else:
+                    false_pos += 1
+            else:
+                llm_calls += 1
+                if store.learn(prompt, expected) is not None:
+                    learned_shapes.add(shape)
+        latencies.sort()
+        print(f"prompts={n} templates={store.stats()['templates']} hits={hits} llm_calls={llm_calls} "
+              f"false_positives={false_pos}")
+        print(f"precision={correct / hits if hits else 0:.3f} "
+              f"recall={correct / eligible if eligible else 0:.3f} "
+              f"lookup p50={statistics.median(latencies):.1f}us "
+              f"p99={latencies[int(len(latencies) * 0.99)]:.1f}us")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2_000)
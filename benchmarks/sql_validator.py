@@ -0,0 +1,59 @@
+"""
+Cost of validating generated SQL: tokenizing a statement, a cached lookup by
+statement hash, and running a prepared statement with the SQLite authorizer
+installed versus without it.
+
+Run from the repository root:
+    python -m benchmarks.sql_validator [iterations]
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic import make_db
+from sql_validator import SqlValidator, parse_select
+
+STATEMENTS = [
+    "SELECT * FROM AMLcase WHERE CASE_ID = 'C000000042'",
+    "SELECT Event_Country, COUNT(*) FROM AMLcase WHERE CASE_Status = 'RESOLVED' GROUP BY Event_Country",
+    "WITH open_cases AS (SELECT CASE_ID, Analyst FROM AMLcase WHERE CASE_Status IN ('NEW CASE', 'IN-PROGRESS')) "
+    "SELECT Analyst, COUNT(*) FROM open_cases GROUP BY Analyst ORDER BY 2 DESC LIMIT 5",
+    "SELECT c.CASE_ID, e.event_description FROM AMLcase c JOIN AMLevent e ON e.EVENT_ID = c.CASE_ID "
+    "WHERE c.create_date >= '2023-01-01'",
+]
+
+
+def _per_call_us(fn, n: int) -> float:
+    start = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - start) / n * 1e6
+
+
+def main(n: int) -> None:
+    path = os.path.join(tempfile.mkdtemp(), "validator.db")
+    make_db(path, 1_000, 1_000)
+    conn = sqlite3.connect(path)
+    validator = SqlValidator()
+    for sql in STATEMENTS:
+        parse_us = _per_call_us(lambda: parse_select(sql), n)
+        cached_us = _per_call_us(lambda: validator.validate(conn, sql), n)
+        plain_us = _per_call_us(lambda: conn.execute(sql).fetchone(), n)
+
+        allowed = validator.allowed(conn)
+
+        def authorized():
+            with validator.authorized(conn, allowed):
+                conn.execute(sql).fetchone()
+
+        auth_us = _per_call_us(authorized, n)
+        print(f"parse={parse_us:7.1f}us validate(cached)={cached_us:6.1f}us "
+              f"run={plain_us:7.1f}us run+authorizer={auth_us:7.1f}us  {sql[:50]}")
+    print(f"stats: {validator.stats()}")
+    conn.close()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2_000)
@@ -0,0 +1,74 @@
+"""
+Scan-heavy questions on SQLite against DuckDB over the Parquet export, and
+where the auto router sends each of them. Needs the duckdb package.
+
+Rollup-shaped counts are left out on purpose: query_rewriter answers those
+from aml_rollup before either engine sees them.
+
+Run from the repository root:
+    python -m benchmarks.storage_backends [rows]
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic import make_db
+from parquet_export import export_tables
+from query_guard import QueryGuard
+from sql_validator import SqlValidator
+from storage_backends import DuckDBBackend, QueryRouter
+
+QUESTIONS = [
+    "SELECT CASE_Status, Event_Country, COUNT(*) FROM AMLcase GROUP BY CASE_Status, Event_Country",
+    "SELECT Analyst, COUNT(*) AS n FROM AMLcase WHERE create_date >= '2023-01-01' "
+    "GROUP BY Analyst ORDER BY n DESC",
+    "SELECT substr(create_date, 1, 4) AS year, AAA_Status, COUNT(*) FROM AMLcase GROUP BY year, AAA_Status "
+    "ORDER BY year, AAA_Status",
+    "SELECT Source_System, COUNT(*) AS n FROM AMLcase WHERE CASE_Status = 'ESCALATED-URGENT' "
+    "GROUP BY Source_System ORDER BY n DESC LIMIT 10",
+    "SELECT event_Status, event_description, COUNT(*) FROM AMLevent GROUP BY event_Status, event_description",
+    "SELECT COUNT(DISTINCT Analyst || Event_Country) FROM AMLcase",
+    "SELECT * FROM AMLcase WHERE CASE_ID = 'C000004242'",
+]
+
+
+def _best_ms(fn, runs: int = 3) -> float:
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main(rows: int) -> None:
+    work = tempfile.mkdtemp()
+    path = os.path.join(work, "storage.db")
+    start = time.perf_counter()
+    make_db(path, rows, rows)
+    conn = sqlite3.connect(path)
+    conn.execute("ANALYZE")
+    conn.commit()
+    built = time.perf_counter() - start
+    start = time.perf_counter()
+    export_tables(path, os.path.join(work, "parquet"))
+    print(f"cases={rows} events={rows} (built in {built:.1f}s, exported in {time.perf_counter() - start:.1f}s)")
+    backend = DuckDBBackend(os.path.join(work, "parquet"))
+    router = QueryRouter(backend, mode="auto")
+    validator, guard = SqlValidator(), QueryGuard(timeout=0, max_rows=0, max_cost=0)
+    allowed = validator.allowed(conn)
+    for sql in QUESTIONS:
+        parsed = validator.validate(conn, sql, allowed)
+        routed = "duckdb" if router.execute(conn, parsed, allowed, guard=guard) is not None else "sqlite"
+        expected = sorted(conn.execute(sql).fetchall(), key=repr)
+        assert sorted(backend.execute(sql)[1], key=repr) == expected, sql
+        sqlite_ms = _best_ms(lambda: conn.execute(sql).fetchall())
+        duckdb_ms = _best_ms(lambda: backend.execute(sql))
+        print(f"  {sql[:70]:70s} sqlite={sqlite_ms:9.2f}ms  duckdb={duckdb_ms:8.2f}ms  auto -> {routed}")
+    conn.close()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
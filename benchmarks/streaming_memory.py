@@ -0,0 +1,62 @@
+"""
+Peak Python memory of the buffered result path (fetchall + rows_to_json) versus
+the streaming path (stream_select + iter_ndjson_chunks) as result size grows.
+
+Run from the repository root:
+    python -m benchmarks.streaming_memory [rows ...]
+"""
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import db_agent_app
+from benchmarks.synthetic import make_db
+
+SQL = "SELECT * FROM AMLcase"
+
+
+def _buffered(db_path: str) -> int:
+    conn = sqlite3.connect(db_path)
+    try:
+        return len(db_agent_app.run_safe_select(conn, SQL))
+    finally:
+        conn.close()
+
+
+def _streamed(db_path: str) -> int:
+    chunks = db_agent_app.stream_select(SQL, db_path=db_path)
+    size = 0
+    for text in db_agent_app.iter_ndjson_chunks(next(chunks), chunks):
+        size += len(text)  # stands in for writing to the socket
+    return size
+
+
+def _measure(fn, db_path: str):
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn(db_path)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / (1024 * 1024), elapsed
+
+
+def main(sizes) -> None:
+    tmpdir = tempfile.mkdtemp()
+    try:
+        for n in sizes:
+            db_path = make_db(os.path.join(tmpdir, f"rows_{n}.db"), n)
+            for name, fn in (("buffered", _buffered), ("streamed", _streamed)):
+                peak_mb, elapsed = _measure(fn, db_path)
+                print(f"rows={n:>9} {name:9s} peak={peak_mb:9.2f} MiB time={elapsed:7.3f}s")
+            db_agent_app.get_pool(db_path).close()
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [10_000, 100_000, 500_000])
@@ -0,0 +1,138 @@
+"""
+Local stand-in for an OpenAI-compatible Chat Completions API.
+
+Answers POST /v1/chat/completions (and /chat/completions) with a canned
+assistant message after an optional delay, over HTTP/1.1 keep-alive, so the
+shared client in llm_client can be exercised without network access:
+
+    server, base_url = start_stub_server(delay=0.05)
+    llm_client.set_backend(llm_client.OpenAIBackend(api_key="stub", base_url=base_url))
+
+It also answers Ollama's POST /api/chat. The first request for a model pays
+load_delay before the model is resident; a request without messages only loads
+the model (counted in server.loaded), as with a real Ollama server:
+
+    llm_client.set_backend(llm_client.OllamaBackend(host=server_root(server)), "ollama")
+
+Run standalone:
+    python -m benchmarks.stub_llm_server [port] [delay_seconds]
+"""
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Optional, Tuple
+
+DEFAULT_CONTENT = "```sql\nSELECT * FROM AMLcase WHERE Event_Country = 'India'\n```"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so connection reuse is measurable
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length) or b"{}")
+        server = self.server
+        with server.lock:
+            server.requests += 1
+        if server.delay:
+            time.sleep(server.delay)
+        if self.path.rstrip("/") == "/api/chat":
+            self._ollama_chat(body)
+            return
+        if not self.path.rstrip("/").endswith("chat/completions"):
+            self._send(404, {"error": {"message": "not found"}})
+            return
+        content = server.responder(body) if server.responder else server.content
+        self._send(200, {
+            "id": "chatcmpl-stub",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "stub"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        })
+
+    def _ollama_chat(self, body: dict) -> None:
+        server = self.server
+        model = body.get("model", "stub")
+        with server.lock:
+            server.keep_alive[model] = body.get("keep_alive")
+            cold = model not in server.loaded
+            if cold:
+                server.loaded[model] = 0
+            if not body.get("messages"):
+                server.loaded[model] += 1
+        if cold and server.load_delay:
+            time.sleep(server.load_delay)
+        content = ""
+        if body.get("messages"):
+            content = server.responder(body) if server.responder else server.content
+        self._send(200, {
+            "model": model,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "message": {"role": "assistant", "content": content},
+            "done": True,
+            "done_reason": "stop" if content else "load",
+        })
+
+    def _send(self, status: int, payload: dict) -> None:
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def start_stub_server(port: int = 0, *,
+                      delay: float = 0.0,
+                      content: str = DEFAULT_CONTENT,
+                      load_delay: float = 0.0,
+                      responder: Optional[Callable[[dict], str]] = None
+                      ) -> Tuple[ThreadingHTTPServer, str]:
+    """
+    Start the stub in a daemon thread. Returns (server, base_url); call
+    server.shutdown() to stop it. responder(request_body) -> content overrides
+    the canned content per request. load_delay is the simulated Ollama model
+    load time.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", port), _Handler)
+    server.daemon_threads = True
+    server.delay = delay
+    server.load_delay = load_delay
+    server.content = content
+    server.responder = responder
+    server.requests = 0
+    server.loaded = {}
+    server.keep_alive = {}
+    server.lock = threading.Lock()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+
+def server_root(server: ThreadingHTTPServer) -> str:
+    """
+    Base URL without the OpenAI "/v1" prefix, for Ollama-style clients.
+    """
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8089
+    delay = float(sys.argv[2]) if len(sys.argv) > 2 else 0.0
+    srv, url = start_stub_server(port, delay=delay)
+    print(f"stub LLM listening on {url} (delay={delay}s)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        srv.shutdown()
@@ -0,0 +1,120 @@
+"""
+Synthetic AMLcase / AMLevent data for benchmarks.
+"""
+import os
+import random
+import sqlite3
+from typing import Iterator, Tuple
+
+import change_tracking
+import db_schema
+import rollups
+import text_search
+
+COUNTRIES = ["India", "USA", "UK", "Canada", "Australia", "Germany", "France", "Italy", "Spain", "Singapore"]
+CASE_STATUSES = ["NEW CASE", "IN-PROGRESS", "RESOLVED", "ON-HOLD", "ESCALATED-URGENT",
+                 "CLOSED-RISK RELEVANT", "CLOSED-NOT RISK RELEVANT"]
+AAA_STATUSES = ["ASSESS", "OPEN", "CLOSED", "PENDING", "ESCALATED"]
+ANALYSTS = ["Channel Winston", "Alice Johnson", "Bob Smith", "Charlie Lee", "Diana Prince",
+            "Freddie Mercury", "Gal Gadot", "Hugh Jackman", "Idris Elba", "Keanu Reeves"]
+FIRST = ["Nelson", "Steve", "Emily", "Michael", "Sarah", "David", "Ian", "Olivier", "Jim", "Franci"]
+LAST = ["Shaun", "Morgan", "Davis", "Brown", "Wilson", "Clark", "Strong", "Marshall", "Terry", "McCoy"]
+EVENT_STATUSES = ["OPEN", "PENDING", "CLOSED", "REVIEW", "ESCALATED"]
+EVENT_DESCRIPTIONS = ["Large deposit detected", "Wire transfer flagged", "Multiple failed logins",
+                      "Account mismatch", "Unusual cash withdrawal", "KYC documents required",
+                      "Suspicious merchant activity", "Sanctions list hit",
+                      "High-risk country transfer", "Automated rule triggered"]
+
+
+def iter_cases(n: int, *, seed: int = 7, start_id: int = 1) -> Iterator[Tuple]:
+    rng = random.Random(seed)
+    for i in range(start_id, start_id + n):
+        customers = ", ".join(f"{rng.choice(FIRST)} {rng.choice(LAST)}" for _ in range(rng.randint(1, 3)))
+        yield (
+            f"C{i:09d}",
+            customers,
+            f"{rng.randint(2015, 2024)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} "
+            f"{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:00",
+            rng.choice(AAA_STATUSES),
+            rng.choice(CASE_STATUSES),
+            rng.choice(COUNTRIES),
+            rng.choice(ANALYSTS),
+            f"SYS{rng.randint(1, 99):03d}",
+        )
+
+
+def iter_events(n: int, *, seed: int = 11, start_id: int = 1) -> Iterator[Tuple]:
+    rng = random.Random(seed)
+    for i in range(start_id, start_id + n):
+        yield (
+            f"E{i:09d}",
+            f"{rng.randint(2015, 2024)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} 09:00:00",
+            rng.choice(EVENT_STATUSES),
+            rng.choice(EVENT_DESCRIPTIONS),
+        )
+
+
+def make_db(path: str, cases: int, events: int = 0) -> str:
+    """
+    Create a fresh, migrated database at path holding the requested row counts.
+    """
+    if os.path.exists(path):
+        os.remove(path)
+    db_schema.ensure_schema(path, seed=False)
+    conn = sqlite3.connect(path)
+    try:
+        # loaded like bulk_loader does it: without the per-row change, search and rollup
+        # triggers, and with the secondary indexes built once at the end
+        indexes = conn.execute("SELECT name, sql FROM sqlite_master WHERE type = 'index' "
+                               "AND tbl_name IN ('AMLcase', 'AMLevent') AND sql IS NOT NULL").fetchall()
+        for name, _ in indexes:
+            conn.execute(f'DROP INDEX "{name}"')
+        for table in db_schema.TRACKED_TABLES:
+            change_tracking.suspend_triggers(conn, table)
+            text_search.suspend(conn, table)
+            rollups.suspend(conn, table)
+        conn.executemany("INSERT INTO AMLcase VALUES (?, ?, ?, ?, ?, ?, ?, ?)", iter_cases(cases))
+        conn.executemany("INSERT INTO AMLevent VALUES (?, ?, ?, ?)", iter_events(events))
+        for _, sql in indexes:
+            conn.execute(sql)
+        for table in db_schema.TRACKED_TABLES:
+            change_tracking.log_change(conn, change_tracking.next_version(conn, table), table, "load")
+            change_tracking.restore_triggers(conn, table)
+            text_search.rebuild(conn, table)
+            text_search.restore(conn, table)
+            rollups.rebuild(conn, table)
+            rollups.restore(conn, table)
+        conn.commit()
+    finally:
+        conn.close()
+    return path
+
+
+_PROMPT_TEMPLATES = [
+    "{a1} and {a2} for rel_id REL-{n}",
+    "Please extract {a1}, {a2} and {a3} for customer {first} {last}",
+    "rel id {n} customer email {first}.{last}@example.com age {age}",
+    "need {a1} plus {junk} for relid={n}",
+    "customer {first} {last} born {date}, phone +65 {n} {n2}",
+    "show {a1} of {first} {last}, {age} years old",
+    "{a1} {a2} {a3} {junk}",
+]
+_PROMPT_ATTRS = ["date_of_birth", "age", "last_name", "first_name", "phone_number", "email",
+                 "primary_address", "risk_score", "credit_rating", "kyc_status", "kyc", "credit rating"]
+_PROMPT_JUNK = ["account_type", "branch_code", "risk", "segment_id", "nationality"]
+
+
+def iter_classifier_prompts(n: int, *, seed: int = 3) -> Iterator[str]:
+    """
+    Analyst-style attribute extraction prompts for the customer classifier.
+    """
+    rng = random.Random(seed)
+    for _ in range(n):
+        a1, a2, a3 = rng.sample(_PROMPT_ATTRS, 3)
+        yield rng.choice(_PROMPT_TEMPLATES).format(
+            a1=a1, a2=a2, a3=a3, junk=rng.choice(_PROMPT_JUNK),
+            first=rng.choice(FIRST), last=rng.choice(LAST),
+            n=rng.randint(1000, 9999), n2=rng.randint(1000, 9999),
+            age=rng.randint(18, 90),
+            date=f"{rng.randint(1940, 2005)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+        )
@@ -0,0 +1,97 @@
+"""
+Name and keyword searches as LIKE '%term%' (what the model wrote before)
+against the case-customer link table and the FTS5 indexes of text_search.
+
+Each search is timed as a COUNT(*) and as the first page (LIMIT 100). Common
+terms come from the synthetic data (a customer name on about 2% of cases, an
+event description on 10% of events); the rare ones are a few rows inserted
+at random positions, the shape of a typical "cases involving <name>"
+question.
+
+Run from the repository root:
+    python -m benchmarks.text_search [rows]
+"""
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+import db_schema
+from benchmarks.synthetic import make_db
+
+RARE = 25
+PAGE = 100
+
+
+def _best_ms(conn: sqlite3.Connection, sql: str, params: tuple, runs: int = 3) -> float:
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        conn.execute(sql, params).fetchall()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def _plant_rare_rows(conn: sqlite3.Connection, rows: int) -> None:
+    rng = random.Random(5)
+    for i in range(RARE):
+        conn.execute("UPDATE AMLcase SET customer = customer || ', Quentin Blake' WHERE CASE_ID = ?",
+                     (f"C{rng.randint(1, rows):09d}",))
+        conn.execute("UPDATE AMLevent SET event_description = 'Crypto mixer transfer' WHERE EVENT_ID = ?",
+                     (f"E{rng.randint(1, rows):09d}",))
+    conn.commit()
+
+
+SEARCHES = [
+    ("cases of Steve Morgan",
+     "SELECT {what} FROM AMLcase WHERE customer LIKE ?", ("%Steve Morgan%",),
+     "SELECT {what} FROM AMLcase WHERE CASE_ID IN (SELECT CASE_ID FROM AMLcase_customer WHERE customer = ?)",
+     ("steve morgan",),
+     "SELECT {what} FROM AMLcase WHERE rowid IN (SELECT rowid FROM AMLcase_fts WHERE AMLcase_fts MATCH ?)",
+     ('customer: "steve morgan"',)),
+    ("cases of Quentin Blake",
+     "SELECT {what} FROM AMLcase WHERE customer LIKE ?", ("%Quentin Blake%",),
+     "SELECT {what} FROM AMLcase WHERE CASE_ID IN (SELECT CASE_ID FROM AMLcase_customer WHERE customer = ?)",
+     ("quentin blake",),
+     "SELECT {what} FROM AMLcase WHERE rowid IN (SELECT rowid FROM AMLcase_fts WHERE AMLcase_fts MATCH ?)",
+     ('customer: "quentin blake"',)),
+    ("events about wire",
+     "SELECT {what} FROM AMLevent WHERE event_description LIKE ?", ("%wire%",),
+     None, None,
+     "SELECT {what} FROM AMLevent WHERE rowid IN (SELECT rowid FROM AMLevent_fts WHERE AMLevent_fts MATCH ?)",
+     ("wire",)),
+    ("events about crypto",
+     "SELECT {what} FROM AMLevent WHERE event_description LIKE ?", ("%crypto%",),
+     None, None,
+     "SELECT {what} FROM AMLevent WHERE rowid IN (SELECT rowid FROM AMLevent_fts WHERE AMLevent_fts MATCH ?)",
+     ("crypto",)),
+]
+
+
+def main(rows: int) -> None:
+    path = os.path.join(tempfile.mkdtemp(), "search.db")
+    start = time.perf_counter()
+    make_db(path, rows, rows)
+    db_schema.ensure_schema(path, seed=False)
+    conn = sqlite3.connect(path)
+    _plant_rare_rows(conn, rows)
+    conn.execute("ANALYZE")
+    print(f"cases={rows} events={rows} (built in {time.perf_counter() - start:.1f}s)")
+    for name, like, like_args, link, link_args, fts, fts_args in SEARCHES:
+        count = conn.execute(like.format(what="COUNT(*)"), like_args).fetchone()[0]
+        print(f"  {name} ({count} rows)")
+        variants = [("like", like, like_args), ("link table", link, link_args), ("fts", fts, fts_args)]
+        for label, sql, args in variants:
+            if sql is None:
+                continue
+            found = conn.execute(sql.format(what="COUNT(*)"), args).fetchone()[0]
+            count_ms = _best_ms(conn, sql.format(what="COUNT(*)"), args)
+            page_ms = _best_ms(conn, sql.format(what="*") + f" LIMIT {PAGE}", args)
+            print(f"    {label:10s} count={count_ms:8.2f}ms  first {PAGE}={page_ms:8.2f}ms  rows={found}")
+    conn.close()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
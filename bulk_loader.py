@@ -0,0 +1,665 @@
+"""
+Bulk loading of AMLcase / AMLevent extracts.
+
+Input files are streamed, never read whole: CSV with a header row, NDJSON with
+one object per line, or an SQL dump whose INSERT statements carry literal
+VALUES (CREATE statements and comments in the dump are skipped). Files ending
+in .gz are decompressed on the fly. Every row is checked against the live
+table definition (required columns, VARCHAR lengths, date formats) before it
+is inserted; bad rows are counted, reported and optionally written to a
+rejects file.
+
+Rows go in through executemany in large transactions. For the duration of the
+load the database runs with an in-memory journal and synchronous=OFF, and the
+secondary indexes of a table being filled from empty are dropped and rebuilt
+once at the end, which is far cheaper than maintaining them row by row; the
+full-text index and case-customer links (text_search) and the count rollups
+(rollups) are rebuilt the same way.
+
+Daily deltas go through --upsert instead: INSERT ... ON CONFLICT on the key,
+with the change triggers on, so caches can tell which tables and columns moved
+(see change_tracking).
+
+    python bulk_loader.py cases.csv events.ndjson.gz [--db sample_data.db] [--replace]
+    python bulk_loader.py --upsert case_delta.csv [--db sample_data.db]
+"""
+import argparse
+import csv
+import gzip
+import io
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+from contextlib import contextmanager
+from itertools import groupby
+from typing import Any, Callable, Dict, IO, Iterator, List, Optional, Tuple
+
+import change_tracking
+import json_codec
+import rollups
+import text_search
+from db_schema import CHANGE_LOG_TABLE, DB_PATH, ensure_schema, iter_sql_statements
+from sql_validator import tokenize
+
+# Tables a load may write to.
+LOAD_TABLES = ("AMLcase", "AMLevent")
+FORMATS = ("csv", "ndjson", "sql")
+BATCH_ROWS = int(os.getenv("AML_LOAD_BATCH_ROWS", "50000"))
+# Page cache used by the loading connection, in KiB.
+LOAD_CACHE_KIB = int(os.getenv("AML_LOAD_CACHE_KIB", str(256 * 1024)))
+# Invalid rows listed in the report; the rest are only counted.
+MAX_REPORTED_ERRORS = 20
+
+_DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}(?:[ T]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?)?$")
+_VARCHAR_RE = re.compile(r"CHAR\s*\(\s*(\d+)\s*\)", re.IGNORECASE)
+
+
+class TableSpec:
+    """
+    What a valid row of one table looks like, read from PRAGMA table_info.
+    Rows are tuples in column order.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, name: str):
+        info = conn.execute(f'PRAGMA table_info("{name}")').fetchall()
+        if not info:
+            raise ValueError(f"Table '{name}' does not exist.")
+        self.name = name
+        self.columns = [r[1] for r in info]
+        self.key = next((r[1] for r in info if r[5]), self.columns[0])
+        # (index, name, required, max length, is date) per column
+        self._checks = []
+        for i, (_, col, type_, notnull, _, pk) in enumerate(info):
+            m = _VARCHAR_RE.search(type_ or "")
+            self._checks.append((i, col, bool(notnull or pk), int(m.group(1)) if m else None,
+                                 (type_ or "").upper() in ("DATE", "DATETIME", "TIMESTAMP")))
+        self.key_index = self.columns.index(self.key)
+        self._required = [c[0] for c in self._checks if c[2]]
+        self.insert_sql = (f"INSERT INTO {name} ({', '.join(self.columns)}) "
+                           f"VALUES ({', '.join('?' * len(self.columns))})")
+        # Deltas: a NULL value keeps what is stored, and a row that would not
+        # change anything is not written (so no trigger fires for it).
+        self._others = [c for c in self.columns if c != self.key]
+        keep = {c: f"COALESCE(excluded.{c}, {c})" for c in self._others}
+        self.upsert_sql = (self.insert_sql + f" ON CONFLICT({self.key}) DO UPDATE SET "
+                           + ", ".join(f"{c} = {keep[c]}" for c in self._others)
+                           + " WHERE " + " OR ".join(f"{keep[c]} IS NOT {c}" for c in self._others))
+        self.update_sql = (f"UPDATE {name} SET " + ", ".join(f"{c} = COALESCE(?, {c})" for c in self._others)
+                           + f" WHERE {self.key} = ?")
+
+    def complete(self, row: tuple) -> bool:
+        """
+        Whether the row has every required value, i.e. could be inserted.
+        """
+        return all(row[i] is not None for i in self._required)
+
+    def update_params(self, row: tuple) -> tuple:
+        return tuple(v for i, v in enumerate(row) if i != self.key_index) + (row[self.key_index],)
+
+    def row_from_mapping(self, record: Dict[str, Any]) -> tuple:
+        lower = {str(k).lower(): v for k, v in record.items()}
+        unknown = set(lower) - {c.lower() for c in self.columns}
+        if unknown:
+            raise ValueError(f"unknown column '{sorted(unknown)[0]}'")
+        return tuple(lower.get(c.lower()) for c in self.columns)
+
+    def validate(self, row: tuple, partial: bool = False) -> Tuple[Optional[tuple], Optional[str]]:
+        """
+        (row ready to insert, None) or (None, reason). Dates written with a T
+        separator are normalized to the space the existing data uses. A partial
+        row (a delta) only has to carry the key. An empty string is a value
+        here; only iter_csv, where an empty field cannot be told from a
+        missing one, reads it as NULL.
+        """
+        if len(row) != len(self.columns):
+            return None, f"expected {len(self.columns)} values, got {len(row)}"
+        fixed = None
+        for i, col, required, max_len, is_date in self._checks:
+            value = row[i]
+            if value is None:
+                if required and (not partial or i == self.key_index):
+                    return None, f"{col} is required"
+                continue
+            if max_len is not None and isinstance(value, str) and len(value) > max_len:
+                return None, f"{col} is longer than {max_len} characters"
+            if is_date:
+                if not isinstance(value, str) or not _DATE_RE.match(value):
+                    return None, f"{col} is not a date (YYYY-MM-DD[ HH:MM[:SS]]): {value!r}"
+                if "T" in value:
+                    fixed = fixed or list(row)
+                    fixed[i] = value.replace("T", " ")
+        return (tuple(fixed) if fixed is not None else row), None
+
+
+def _open_text(path: str) -> IO[str]:
+    if path.endswith(".gz"):
+        return io.TextIOWrapper(gzip.open(path, "rb"), encoding="utf-8", newline="")
+    return open(path, encoding="utf-8", newline="")
+
+
+def detect_format(path: str) -> str:
+    base = path[:-3] if path.endswith(".gz") else path
+    ext = os.path.splitext(base)[1].lower()
+    if ext == ".csv":
+        return "csv"
+    if ext in (".ndjson", ".jsonl"):
+        return "ndjson"
+    if ext == ".sql":
+        return "sql"
+    raise ValueError(f"Cannot tell the format of '{path}'; pass one of {', '.join(FORMATS)}.")
+
+
+def _table_for_columns(specs: Dict[str, TableSpec], columns: List[str]) -> TableSpec:
+    # the table whose primary key column the file has
+    lower = {c.lower() for c in columns}
+    for spec in specs.values():
+        if spec.key.lower() in lower:
+            return spec
+    raise ValueError("Cannot tell the target table from the columns; pass --table.")
+
+
+# Readers yield (line number, table spec, row tuple in column order, or an
+# error string for a record that could not even be shaped into a row).
+Record = Tuple[int, TableSpec, Any]
+
+
+def iter_csv(f: IO[str], specs: Dict[str, TableSpec], table: Optional[str] = None) -> Iterator[Record]:
+    """
+    Rows of a CSV file with a header row. Empty fields are loaded as NULL.
+    """
+    reader = csv.reader(f)
+    header = next(reader, None)
+    if not header:
+        return
+    header = [h.strip() for h in header]
+    spec = specs[table] if table else _table_for_columns(specs, header)
+    index = {c.lower(): i for i, c in enumerate(spec.columns)}
+    unknown = [h for h in header if h.lower() not in index]
+    if unknown:
+        raise ValueError(f"Column '{unknown[0]}' is not in {spec.name}.")
+    positions = [index[h.lower()] for h in header]
+    width = len(spec.columns)
+    in_order = positions == list(range(width))
+    for values in reader:
+        line = reader.line_num
+        if len(values) != len(header):
+            yield line, spec, f"expected {len(header)} fields, got {len(values)}"
+            continue
+        if in_order:
+            yield line, spec, tuple(v if v != "" else None for v in values)
+        else:
+            row = [None] * width
+            for pos, v in zip(positions, values):
+                row[pos] = v if v != "" else None
+            yield line, spec, tuple(row)
+
+
+def iter_ndjson(f: IO[str], specs: Dict[str, TableSpec], table: Optional[str] = None) -> Iterator[Record]:
+    """
+    Rows of a file with one JSON object per line; keys match column names
+    case-insensitively and missing keys are NULL.
+    """
+    spec = specs[table] if table else None
+    for line_no, line in enumerate(f, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json_codec.loads(line)
+            if not isinstance(record, dict):
+                raise ValueError("not a JSON object")
+            if spec is None:
+                spec = _table_for_columns(specs, list(record))
+            yield line_no, spec, spec.row_from_mapping(record)
+        except ValueError as e:  # JSONDecodeError and orjson's error are ValueErrors
+            if spec is None:
+                raise ValueError(f"line {line_no}: {e}")
+            yield line_no, spec, str(e)
+
+
+def _iter_dump_statements(f: IO[str]) -> Iterator[Tuple[int, str]]:
+    # iter_sql_statements on a stream: sqlite3.complete_statement only runs on
+    # lines ending in ";", so a many-line INSERT is not rescanned per line.
+    buf: List[str] = []
+    start = 1
+    for line_no, line in enumerate(f, 1):
+        if not buf:
+            start = line_no
+        buf.append(line)
+        if line.rstrip().endswith(";") and sqlite3.complete_statement("".join(buf)):
+            yield start, "".join(buf)
+            buf = []
+    if buf and "".join(buf).strip():
+        yield start, "".join(buf)
+
+
+def _literal(token) -> Any:
+    if token.kind == "string":
+        if token.value[0] in "xX":
+            return bytes.fromhex(token.value[2:-1])
+        return token.value[1:-1].replace("''", "'")
+    if token.kind == "number":
+        text = token.value
+        if text.lower().startswith("0x"):
+            return int(text, 16)
+        return float(text) if any(c in text for c in ".eE") else int(text)
+    if token.kind == "word" and token.value.upper() == "NULL":
+        return None
+    raise ValueError(f"only literal values can be loaded, found {token.value!r}")
+
+
+def iter_sql_dump(f: IO[str], specs: Dict[str, TableSpec], table: Optional[str] = None) -> Iterator[Record]:
+    """
+    Rows of the INSERT ... VALUES statements of an SQL dump. Other statements
+    (CREATE TABLE / INDEX, comments) are skipped; so are INSERTs into tables
+    other than table when one is given.
+    """
+    by_name = {name.lower(): spec for name, spec in specs.items()}
+    for line_no, text in _iter_dump_statements(f):
+        for stmt in iter_sql_statements(text):
+            tokens = tokenize(stmt)
+            words = [t.value.upper() for t in tokens[:4] if t.kind == "word"]
+            if not words or words[0] not in ("INSERT", "REPLACE"):
+                continue
+            i = next(k for k, t in enumerate(tokens) if t.value.upper() == "INTO") + 1
+            spec = by_name.get(tokens[i].value.lower())
+            if spec is None or (table and spec.name != table):
+                continue
+            i += 1
+            columns = spec.columns
+            if tokens[i].value == "(":
+                end = next(k for k in range(i, len(tokens)) if tokens[k].value == ")")
+                columns = [t.value for t in tokens[i + 1:end] if t.kind in ("word", "quoted")]
+                i = end + 1
+            if tokens[i].value.upper() != "VALUES":
+                yield line_no, spec, "only INSERT ... VALUES statements can be loaded"
+                continue
+            order = [c.lower() for c in columns]
+            lookup = {c.lower(): k for k, c in enumerate(spec.columns)}
+            if any(c not in lookup for c in order):
+                yield line_no, spec, f"INSERT names a column that is not in {spec.name}"
+                continue
+            in_order = order == [c.lower() for c in spec.columns]
+            i += 1
+            while i < len(tokens) and tokens[i].value == "(":
+                values: List[Any] = []
+                i += 1
+                error = None
+                while i < len(tokens) and tokens[i].value != ")":
+                    tok = tokens[i]
+                    if tok.value != ",":
+                        if tok.value in ("-", "+") and i + 1 < len(tokens) and tokens[i + 1].kind == "number":
+                            i += 1
+                            tok = tokens[i]._replace(value=tokens[i - 1].value + tokens[i].value)
+                        try:
+                            values.append(_literal(tok))
+                        except ValueError as e:
+                            error = error or str(e)
+                    i += 1
+                i += 1  # ")"
+                if i < len(tokens) and tokens[i].value == ",":
+                    i += 1
+                if error is not None:
+                    yield line_no, spec, error
+                elif len(values) != len(order):
+                    yield line_no, spec, f"expected {len(order)} values, got {len(values)}"
+                elif in_order:
+                    yield line_no, spec, tuple(values)
+                else:
+                    row = [None] * len(spec.columns)
+                    for name, value in zip(order, values):
+                        row[lookup[name]] = value
+                    yield line_no, spec, tuple(row)
+
+
+READERS: Dict[str, Callable[..., Iterator[Record]]] = {
+    "csv": iter_csv,
+    "ndjson": iter_ndjson,
+    "sql": iter_sql_dump,
+}
+
+
+@contextmanager
+def bulk_pragmas(conn: sqlite3.Connection) -> Iterator[None]:
+    """
+    Trade durability for speed while loading: journal in memory, no fsync, a
+    large page cache. The previous journal mode and synchronous level are put
+    back afterwards. A crash mid-load can leave the file damaged, so loads are
+    meant to be re-runnable, not to run against the only copy of the data.
+    """
+    journal = conn.execute("PRAGMA journal_mode").fetchone()[0]
+    synchronous = conn.execute("PRAGMA synchronous").fetchone()[0]
+    try:
+        conn.execute("PRAGMA journal_mode=MEMORY")
+    except sqlite3.OperationalError:
+        pass  # leaving WAL needs exclusive access; load with the journal as it is
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.execute(f"PRAGMA cache_size=-{LOAD_CACHE_KIB}")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    try:
+        yield
+    finally:
+        conn.execute(f"PRAGMA synchronous={synchronous}")
+        try:
+            conn.execute(f"PRAGMA journal_mode={journal}")
+        except sqlite3.OperationalError:
+            pass
+
+
+def _secondary_indexes(conn: sqlite3.Connection, table: str) -> List[Tuple[str, str]]:
+    # (name, CREATE statement); automatic primary-key indexes have no SQL
+    return conn.execute(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+        (table,)).fetchall()
+
+
+def _check_options(paths: List[str], fmt: Optional[str], table: Optional[str], batch_rows: int) -> None:
+    if fmt is not None and fmt not in FORMATS:
+        raise ValueError(f"format must be one of {', '.join(FORMATS)}.")
+    if table is not None and table not in LOAD_TABLES:
+        raise ValueError(f"table must be one of {', '.join(LOAD_TABLES)}.")
+    if batch_rows < 1:
+        raise ValueError("batch_rows must be positive.")
+    for path in paths:
+        (fmt or detect_format(path))  # fail before touching the database
+
+
+def _record_invalid(stats: Dict[str, Any], rejects: Optional[IO[str]], path: str, line_no: int, error: str) -> None:
+    # counted, sampled into stats["errors"] and written to rejects
+    stats["invalid"] += 1
+    if len(stats["errors"]) < MAX_REPORTED_ERRORS:
+        stats["errors"].append(f"{path}:{line_no}: {error}")
+    if rejects is not None:
+        record = {"file": path, "line": line_no, "error": error}
+        rejects.write(json_codec.dumps(record) + "\n")
+
+
+def _iter_valid_rows(paths: List[str], specs: Dict[str, TableSpec], stats: Dict[str, Any], *,
+                     fmt: Optional[str], table: Optional[str], partial: bool,
+                     max_invalid: Optional[int],
+                     rejects: Optional[IO[str]]) -> Iterator[Tuple[TableSpec, tuple, Tuple[str, int]]]:
+    # (spec, validated row, (path, line)) for every good row of the files; bad
+    # rows go through _record_invalid
+    for path in paths:
+        reader = READERS[fmt or detect_format(path)]
+        with _open_text(path) as f:
+            for line_no, spec, row in reader(f, specs, table):
+                stats["rows_read"] += 1
+                error = row if isinstance(row, str) else None
+                if error is None:
+                    row, error = spec.validate(row, partial=partial)
+                if error is None:
+                    yield spec, row, (path, line_no)
+                    continue
+                _record_invalid(stats, rejects, path, line_no, error)
+                if max_invalid is not None and stats["invalid"] > max_invalid:
+                    raise ValueError(f"more than {max_invalid} invalid rows; last: {path}:{line_no}: {error}")
+        stats["files"] += 1
+
+
+def load_files(paths: List[str], db_path: str = DB_PATH, *,
+               fmt: Optional[str] = None,
+               table: Optional[str] = None,
+               batch_rows: int = BATCH_ROWS,
+               replace: bool = False,
+               on_duplicate: str = "skip",
+               defer_indexes: Optional[bool] = None,
+               max_invalid: Optional[int] = None,
+               rejects_path: Optional[str] = None,
+               progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """
+    Load the files in order and return the load statistics.
+
+    replace empties the target tables first (a full reload). A row whose key
+    is already present is skipped, or overwrites the stored row with
+    on_duplicate="replace". Secondary indexes are deferred for tables that are
+    empty when the load starts unless defer_indexes says otherwise. A load
+    stops with ValueError once more than max_invalid rows have been rejected;
+    batches committed before that stay in the database.
+
+    The change triggers are off during the load: each committed batch takes
+    one data version and one 'load' entry in the change log.
+    """
+    if on_duplicate not in ("skip", "replace"):
+        raise ValueError("on_duplicate must be 'skip' or 'replace'.")
+    _check_options(paths, fmt, table, batch_rows)
+    ensure_schema(db_path, seed=False)
+    stats: Dict[str, Any] = {"files": 0, "rows_read": 0, "inserted": 0, "duplicates": 0, "invalid": 0,
+                             "tables": {}, "errors": [], "index_rebuild_s": 0.0}
+    verb = "INSERT OR REPLACE" if on_duplicate == "replace" else "INSERT OR IGNORE"
+    start = time.perf_counter()
+    rejects = open(rejects_path, "w", encoding="utf-8") if rejects_path else None
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        specs = {name: TableSpec(conn, name) for name in LOAD_TABLES}
+        targets = [table] if table else list(LOAD_TABLES)
+        with bulk_pragmas(conn):
+            for name in targets:
+                change_tracking.suspend_triggers(conn, name)
+            deferred: Dict[str, List[Tuple[str, str]]] = {}
+            reindexed: List[str] = []  # tables whose search index and rollups are rebuilt at the end
+            try:
+                for name in targets:
+                    empty = replace or conn.execute(f"SELECT 1 FROM {name} LIMIT 1").fetchone() is None
+                    if defer_indexes if defer_indexes is not None else empty:
+                        deferred[name] = _secondary_indexes(conn, name)
+                        for index_name, _ in deferred[name]:
+                            conn.execute(f'DROP INDEX "{index_name}"')
+                    # INSERT OR REPLACE deletes without firing delete triggers, which
+                    # would leave stale entries in the full-text index and the counts
+                    if name in deferred or replace or on_duplicate == "replace":
+                        text_search.suspend(conn, name)
+                        rollups.suspend(conn, name)
+                        reindexed.append(name)
+                if replace:
+                    conn.execute("BEGIN")
+                    for name in targets:
+                        conn.execute(f"DELETE FROM {name}")
+                        change_tracking.log_change(conn, change_tracking.next_version(conn, name), name, "delete")
+                    conn.execute("COMMIT")
+                batches: Dict[str, List[tuple]] = {}
+
+                def flush(spec: TableSpec) -> None:
+                    rows = batches.pop(spec.name, None)
+                    if not rows:
+                        return
+                    conn.execute("BEGIN")
+                    try:
+                        # rowcount sums sqlite3_changes() over the rows, which leaves out
+                        # what the search and rollup triggers write
+                        written = conn.executemany(verb + spec.insert_sql[len("INSERT"):], rows).rowcount
+                        if written:
+                            version = change_tracking.next_version(conn, spec.name)
+                            change_tracking.log_change(conn, version, spec.name, "load")
+                        conn.execute("COMMIT")
+                    except Exception:
+                        conn.execute("ROLLBACK")
+                        raise
+                    if on_duplicate == "replace":
+                        # a replaced row counts one change for the insert (its delete is not counted)
+                        written = len(rows)
+                    stats["inserted"] += written
+                    stats["duplicates"] += len(rows) - written
+                    per_table = stats["tables"].setdefault(spec.name, 0)
+                    stats["tables"][spec.name] = per_table + written
+                    if progress is not None:
+                        progress(_finish(stats, start))
+
+                for spec, row, _ in _iter_valid_rows(paths, specs, stats, fmt=fmt, table=table, partial=False,
+                                                     max_invalid=max_invalid, rejects=rejects):
+                    batch = batches.setdefault(spec.name, [])
+                    batch.append(row)
+                    if len(batch) >= batch_rows:
+                        flush(spec)
+                for name in list(batches):
+                    flush(specs[name])
+            finally:
+                # indexes and triggers come back even when the load fails part-way
+                rebuild = time.perf_counter()
+                for name in reindexed:
+                    text_search.rebuild(conn, name)
+                    text_search.restore(conn, name)
+                for name, indexes in deferred.items():
+                    for _, sql in indexes:
+                        conn.execute(sql)
+                # after the indexes: most dimensions are counted from one
+                for name in reindexed:
+                    rollups.rebuild(conn, name)
+                    rollups.restore(conn, name)
+                if deferred:
+                    conn.execute("ANALYZE")
+                stats["index_rebuild_s"] = round(time.perf_counter() - rebuild, 3)
+                for name in targets:
+                    change_tracking.restore_triggers(conn, name)
+                change_tracking.prune(conn)
+    finally:
+        conn.close()
+        if rejects is not None:
+            rejects.close()
+    return _finish(stats, start)
+
+
+def upsert_files(paths: List[str], db_path: str = DB_PATH, *,
+                 fmt: Optional[str] = None,
+                 table: Optional[str] = None,
+                 batch_rows: int = BATCH_ROWS,
+                 max_invalid: Optional[int] = None,
+                 rejects_path: Optional[str] = None,
+                 progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """
+    Apply delta files: rows with a new key are inserted, rows with a known key
+    update the stored row, through INSERT ... ON CONFLICT on the key column.
+
+    Only the key is required in a delta row. Missing values (empty CSV fields
+    among them) keep the stored value, so a status change can be sent as just
+    CASE_ID and CASE_Status; a row that lacks a required column and matches no
+    stored row is invalid, and goes to rejects_path like any other invalid row.
+    Rows that change nothing are counted as unchanged and leave the data
+    version alone. The change triggers stay on, so every insert and update gets
+    its own data version and change log entry. The database keeps its journal
+    mode and synchronous setting and indexes stay in place: deltas are small
+    and the app may be reading at the same time.
+    """
+    _check_options(paths, fmt, table, batch_rows)
+    ensure_schema(db_path, seed=False)
+    stats: Dict[str, Any] = {"files": 0, "rows_read": 0, "inserted": 0, "updated": 0, "unchanged": 0,
+                             "invalid": 0, "tables": {}, "errors": [], "data_version": 0}
+    start = time.perf_counter()
+    rejects = open(rejects_path, "w", encoding="utf-8") if rejects_path else None
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        specs = {name: TableSpec(conn, name) for name in LOAD_TABLES}
+        # per table: (row, (path, line)) waiting for the next flush
+        batches: Dict[str, List[Tuple[tuple, Tuple[str, int]]]] = {}
+
+        def flush(spec: TableSpec) -> None:
+            rows = batches.pop(spec.name, None)
+            if not rows:
+                return
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                version = change_tracking.current_version(conn)
+                missing: List[Tuple[str, int]] = []
+                # runs of complete rows go through the upsert in one call; rows
+                # that lack a required value can only be updates (an insert
+                # would break NOT NULL), so they are applied one by one, in order
+                for complete, run in groupby(rows, key=lambda item: spec.complete(item[0])):
+                    if complete:
+                        conn.executemany(spec.upsert_sql, (row for row, _ in run))
+                        continue
+                    for row, where in run:
+                        if conn.execute(spec.update_sql, spec.update_params(row)).rowcount == 0:
+                            missing.append(where)
+                ops = dict(conn.execute(f"SELECT op, COUNT(*) FROM {CHANGE_LOG_TABLE} WHERE version > ? "
+                                        f"GROUP BY op", (version,)).fetchall())
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            inserted, updated = ops.get("insert", 0), ops.get("update", 0)
+            for path, line_no in missing:
+                _record_invalid(stats, rejects, path, line_no,
+                                f"no stored {spec.name} row to update and required columns are missing")
+            stats["inserted"] += inserted
+            stats["updated"] += updated
+            stats["unchanged"] += len(rows) - inserted - updated - len(missing)
+            stats["tables"][spec.name] = stats["tables"].get(spec.name, 0) + inserted + updated
+            if max_invalid is not None and stats["invalid"] > max_invalid:
+                raise ValueError(f"more than {max_invalid} invalid rows")
+            if progress is not None:
+                progress(_finish(stats, start))
+
+        for spec, row, where in _iter_valid_rows(paths, specs, stats, fmt=fmt, table=table, partial=True,
+                                                 max_invalid=max_invalid, rejects=rejects):
+            batch = batches.setdefault(spec.name, [])
+            batch.append((row, where))
+            if len(batch) >= batch_rows:
+                flush(spec)
+        for name in list(batches):
+            flush(specs[name])
+        change_tracking.prune(conn)
+        stats["data_version"] = change_tracking.current_version(conn)
+    finally:
+        conn.close()
+        if rejects is not None:
+            rejects.close()
+    return _finish(stats, start)
+
+
+def _finish(stats: Dict[str, Any], start: float) -> Dict[str, Any]:
+    elapsed = time.perf_counter() - start
+    stats["elapsed_s"] = round(elapsed, 3)
+    stats["rows_per_s"] = round(stats["rows_read"] / elapsed, 1) if elapsed > 0 else 0.0
+    return stats
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Bulk load AMLcase / AMLevent extracts.")
+    parser.add_argument("files", nargs="+", help="CSV, NDJSON or SQL dump files (optionally .gz)")
+    parser.add_argument("--db", default=DB_PATH, help="database to load into")
+    parser.add_argument("--format", choices=FORMATS, help="input format (default: from the file extension)")
+    parser.add_argument("--table", choices=LOAD_TABLES, help="target table (default: from the columns)")
+    parser.add_argument("--batch-rows", type=int, default=BATCH_ROWS, help="rows per transaction")
+    parser.add_argument("--upsert", action="store_true",
+                        help="apply the files as deltas: insert new keys, update known ones")
+    parser.add_argument("--replace", action="store_true", help="empty the target tables first")
+    parser.add_argument("--on-duplicate", choices=("skip", "replace"), default="skip",
+                        help="what to do with a row whose key is already stored")
+    indexes = parser.add_mutually_exclusive_group()
+    indexes.add_argument("--defer-indexes", dest="defer_indexes", action="store_true", default=None,
+                         help="drop secondary indexes during the load (default: when the table is empty)")
+    indexes.add_argument("--keep-indexes", dest="defer_indexes", action="store_false")
+    parser.add_argument("--max-invalid", type=int, help="stop after this many invalid rows")
+    parser.add_argument("--rejects", help="write invalid rows' locations and reasons here (NDJSON)")
+    args = parser.parse_args(argv)
+    if args.upsert and (args.replace or args.on_duplicate != "skip" or args.defer_indexes is not None):
+        parser.error("--upsert cannot be combined with --replace, --on-duplicate or the index options")
+
+    def report(s):
+        done = f"updated={s['updated']} unchanged={s['unchanged']}" if args.upsert else f"duplicates={s['duplicates']}"
+        print(f"\r{s['rows_read']} rows  inserted={s['inserted']} {done} "
+              f"invalid={s['invalid']}  {s['rows_per_s']:.0f} rows/s", end="", file=sys.stderr)
+
+    try:
+        if args.upsert:
+            stats = upsert_files(args.files, args.db, fmt=args.format, table=args.table,
+                                 batch_rows=args.batch_rows, max_invalid=args.max_invalid,
+                                 rejects_path=args.rejects, progress=report)
+        else:
+            stats = load_files(args.files, args.db, fmt=args.format, table=args.table,
+                               batch_rows=args.batch_rows, replace=args.replace,
+                               on_duplicate=args.on_duplicate, defer_indexes=args.defer_indexes,
+                               max_invalid=args.max_invalid, rejects_path=args.rejects, progress=report)
+    except (OSError, ValueError, sqlite3.Error) as e:
+        print(f"\nError: {e}", file=sys.stderr)
+        return 1
+    print(file=sys.stderr)
+    print(json.dumps(stats, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+"""
+Data versions and the change log of the tracked tables (AMLcase, AMLevent).
+
+One counter runs across the whole database. Every insert, update or delete
+takes its next value (triggers from db_schema migration 3 do this), moves the
+table's row in aml_data_version to it and appends (version, table, op, row key,
+changed columns) to aml_change_log. Bulk loads suspend the triggers and log one
+'load' entry per committed batch instead, with no key and no column list.
+
+Cached query results (query_cache) are keyed by the table_versions() of the
+tables a statement reads, so any write to AMLcase retires the cached results
+that read AMLcase and nothing else. The schema summary (schema_context)
+remembers the version it sampled column values at and asks changes_since()
+what happened after it, so an update to CASE_Status only re-reads the values
+of AMLcase.CASE_Status.
+"""
+import os
+import sqlite3
+from typing import Dict, Iterable, Optional, Set
+
+from db_schema import CHANGE_LOG_TABLE, TRACKED_TABLES, VERSION_TABLE, change_triggers
+
+# Versions of history kept by prune(); changes_since() older than that answers None.
+CHANGE_LOG_KEEP = int(os.getenv("AML_CHANGE_LOG_KEEP", "1000000"))
+
+
+def table_versions(conn: sqlite3.Connection) -> Optional[Dict[str, int]]:
+    """
+    Latest version per tracked table, keyed by lower-cased table name, or None
+    for a database without change tracking.
+    """
+    try:
+        rows = conn.execute(f"SELECT table_name, version FROM {VERSION_TABLE}").fetchall()
+    except sqlite3.OperationalError:
+        return None
+    return {name.lower(): version for name, version in rows}
+
+
+def current_version(conn: sqlite3.Connection) -> int:
+    row = conn.execute(f"SELECT MAX(version) FROM {VERSION_TABLE}").fetchone()
+    return row[0] or 0
+
+
+def next_version(conn: sqlite3.Connection, table: str) -> int:
+    """
+    Move table to the next data version and return it. Call inside the write
+    transaction whose changes the version stands for.
+    """
+    conn.execute(f"UPDATE {VERSION_TABLE} SET version = (SELECT MAX(version) + 1 FROM {VERSION_TABLE}), "
+                 f"changed_at = CURRENT_TIMESTAMP WHERE table_name = ?", (table,))
+    return conn.execute(f"SELECT version FROM {VERSION_TABLE} WHERE table_name = ?", (table,)).fetchone()[0]
+
+
+def log_change(conn: sqlite3.Connection, version: int, table: str, op: str,
+               row_key: Optional[str] = None, columns: Optional[Iterable[str]] = None) -> None:
+    conn.execute(f"INSERT INTO {CHANGE_LOG_TABLE} (version, table_name, op, row_key, columns) "
+                 f"VALUES (?, ?, ?, ?, ?)",
+                 (version, table, op, row_key, ",".join(columns) if columns is not None else None))
+
+
+def changes_since(conn: sqlite3.Connection, version: int) -> Optional[Dict[str, Optional[Set[str]]]]:
+    """
+    What changed after version: {lower-cased table: changed column names, or
+    None when whole rows changed (inserts, deletes, loads)}. An empty dict
+    means nothing changed. None means the history is no longer complete
+    (pruned, or no change tracking), so the caller has to assume everything.
+    """
+    try:
+        latest = current_version(conn)
+        if latest <= version:
+            return {}
+        oldest = conn.execute(f"SELECT MIN(version) FROM {CHANGE_LOG_TABLE}").fetchone()[0]
+        if oldest is None or oldest > version + 1:
+            return None
+        rows = conn.execute(f"SELECT table_name, columns FROM {CHANGE_LOG_TABLE} WHERE version > ? "
+                            f"GROUP BY table_name, columns", (version,)).fetchall()
+    except sqlite3.OperationalError:
+        return None
+    changed: Dict[str, Optional[Set[str]]] = {}
+    for table, columns in rows:
+        key = table.lower()
+        if columns is None:
+            changed[key] = None
+        elif key not in changed:
+            changed[key] = set(columns.split(","))
+        elif changed[key] is not None:
+            changed[key].update(columns.split(","))
+    return changed
+
+
+def prune(conn: sqlite3.Connection, keep: int = CHANGE_LOG_KEEP) -> int:
+    """
+    Drop change log entries more than keep versions old; returns how many.
+    """
+    cur = conn.execute(f"DELETE FROM {CHANGE_LOG_TABLE} WHERE version <= ?", (current_version(conn) - keep,))
+    return cur.rowcount
+
+
+def suspend_triggers(conn: sqlite3.Connection, table: str) -> None:
+    """
+    Drop the change triggers of a table for a bulk load, which logs its own
+    batches; restore_triggers() puts them back.
+    """
+    prefix = f"trg_{table.lower()}_"
+    for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = ?",
+                                (table,)).fetchall():
+        if name.startswith(prefix):
+            conn.execute(f'DROP TRIGGER "{name}"')
+
+
+def restore_triggers(conn: sqlite3.Connection, table: str) -> None:
+    if table in TRACKED_TABLES:
+        for stmt in change_triggers(conn, table):
+            conn.execute(stmt)
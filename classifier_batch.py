@@ -0,0 +1,364 @@
+"""
+Bulk attribute extraction for JSONL prompt files.
+
+Input is one record per line: {"id": ..., "prompt": "..."} or a bare JSON
+string (the id is then the line number). Prompts are packed several to a Chat
+Completions request. The rule-based extractor runs first, in a process pool;
+only prompts it is not confident about go to the LLM, and those the LLM does
+not answer completely keep the rule result. Results are written as JSONL as each
+chunk finishes, and a checkpoint file records how far the input has been
+processed so an interrupted run can be resumed.
+
+    python classifier_batch.py prompts.jsonl -o results.jsonl [--resume]
+    python customer_classifier.py --batch prompts.jsonl -o results.jsonl
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import customer_classifier
+import llm_client
+
+PACK_SIZE = int(os.getenv("CLASSIFIER_PACK_SIZE", "8"))
+LLM_CONCURRENCY = int(os.getenv("CLASSIFIER_LLM_CONCURRENCY", "4"))
+CHUNK_SIZE = int(os.getenv("CLASSIFIER_CHUNK_SIZE", "256"))
+FALLBACK_WORKERS = int(os.getenv("CLASSIFIER_FALLBACK_WORKERS", str(os.cpu_count() or 1)))
+# Below this many prompts the rules run inline; pickling to a worker costs more.
+FALLBACK_POOL_MIN = int(os.getenv("CLASSIFIER_FALLBACK_POOL_MIN", "64"))
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _fallback_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ProcessPoolExecutor(max_workers=FALLBACK_WORKERS)
+    return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+            _pool = None
+
+
+def classify_locally_many(prompts: List[str]) -> List[Tuple[str, float]]:
+    """
+    Rule-based extraction and confidence for a list of prompts, spread over the
+    process pool when the list is large enough to pay for it.
+    """
+    if FALLBACK_WORKERS <= 1 or len(prompts) < FALLBACK_POOL_MIN:
+        return [customer_classifier.classify_locally(p) for p in prompts]
+    chunksize = max(1, len(prompts) // (FALLBACK_WORKERS * 4))
+    return list(_fallback_pool().map(customer_classifier.classify_locally, prompts, chunksize=chunksize))
+
+
+def _packs(prompts: List[str], pack_size: int) -> List[List[str]]:
+    return [prompts[i:i + pack_size] for i in range(0, len(prompts), pack_size)]
+
+
+def _route(local: List[Tuple[str, float]], threshold: Optional[float]) -> List[int]:
+    # indexes of the prompts the rules are not confident enough to answer
+    if threshold is None:
+        threshold = customer_classifier.LOCAL_CONFIDENCE_THRESHOLD
+    return [i for i, (_, confidence) in enumerate(local) if confidence < threshold]
+
+
+def _merge_tiers(local: List[Tuple[str, float]], pending: List[int],
+                 answers: List[str]) -> List[Tuple[str, str]]:
+    out = [(text, "local") for text, _ in local]
+    for i, answer in zip(pending, answers):
+        out[i] = (answer, "llm") if answer else (local[i][0], "rules_fallback")
+    return out
+
+
+def classify_prompts(prompts: List[str], *,
+                     api_key: Optional[str] = None,
+                     model: str = "gpt-3.5-turbo",
+                     timeout: float = 30.0,
+                     pack_size: int = PACK_SIZE,
+                     llm_concurrency: int = LLM_CONCURRENCY,
+                     local_threshold: Optional[float] = None,
+                     use_llm: bool = True) -> List[Tuple[str, str]]:
+    """
+    Extract attributes for every prompt. Returns (result, tier) pairs in input
+    order, with the tiers of customer_classifier.extract_attributes_routed:
+    prompts the rules are confident about never reach the LLM, and the rest
+    are packed pack_size to a request. use_llm=False (or no API key when the
+    classify route is a hosted API) answers everything from the rules.
+    """
+    if not prompts:
+        return []
+    local = classify_locally_many(prompts)
+    pending = _route(local, local_threshold)
+    answers = [""] * len(pending)
+    api_key = api_key or os.getenv("OPENAI_API_KEY")
+    if pending and use_llm and (api_key or not llm_client.needs_api_key("classify")):
+        packs = _packs([prompts[i] for i in pending], max(1, pack_size))
+
+        def run(pack):
+            return customer_classifier.classify_user_prompts_via_llm(pack, api_key=api_key, model=model,
+                                                                     timeout=timeout)
+
+        workers = max(1, min(llm_concurrency, len(packs)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="classifier-batch") as pool:
+            packed = list(pool.map(run, packs))
+        answers = [a for pack in packed for a in pack]
+    return _merge_tiers(local, pending, answers)
+
+
+async def classify_prompts_async(prompts: List[str], *,
+                                 api_key: Optional[str] = None,
+                                 model: str = "gpt-3.5-turbo",
+                                 timeout: float = 30.0,
+                                 pack_size: int = PACK_SIZE,
+                                 llm_concurrency: int = LLM_CONCURRENCY,
+                                 local_threshold: Optional[float] = None,
+                                 use_llm: bool = True) -> List[Tuple[str, str]]:
+    """
+    Awaitable classify_prompts for the ASGI app.
+    """
+    if not prompts:
+        return []
+    local = await asyncio.to_thread(classify_locally_many, prompts)
+    pending = _route(local, local_threshold)
+    answers = [""] * len(pending)
+    api_key = api_key or os.getenv("OPENAI_API_KEY")
+    if pending and use_llm and (api_key or not llm_client.needs_api_key("classify")):
+        slots = asyncio.Semaphore(max(1, llm_concurrency))
+
+        async def run(pack):
+            async with slots:
+                return await customer_classifier.classify_user_prompts_via_llm_async(
+                    pack, api_key=api_key, model=model, timeout=timeout)
+
+        packs = _packs([prompts[i] for i in pending], max(1, pack_size))
+        packed = await asyncio.gather(*(run(p) for p in packs))
+        answers = [a for pack in packed for a in pack]
+    return _merge_tiers(local, pending, answers)
+
+
+def parse_record(line: str, lineno: int) -> Tuple[Any, str]:
+    """
+    (id, prompt) for one JSONL input line. Raises ValueError for malformed lines.
+    """
+    try:
+        record = json.loads(line)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"invalid JSON: {e}") from e
+    if isinstance(record, str):
+        record_id, prompt = lineno, record
+    elif isinstance(record, dict):
+        record_id, prompt = record.get("id", lineno), record.get("prompt")
+    else:
+        raise ValueError("expected an object with 'prompt' or a JSON string")
+    if not isinstance(prompt, str) or not prompt.strip():
+        raise ValueError("missing or empty 'prompt'")
+    return record_id, prompt
+
+
+def batch_input_lines(data: Any, raw: str) -> List[str]:
+    """
+    JSONL lines for the batch endpoints: {"prompts": [...]} (strings or
+    {"id", "prompt"} objects) is turned into lines, anything else is read as JSONL.
+    """
+    if isinstance(data, dict) and "prompts" in data:
+        prompts = data["prompts"]
+        if not isinstance(prompts, list) or not prompts:
+            raise ValueError("'prompts' must be a non-empty list")
+        return [json.dumps(p) for p in prompts]
+    lines = [line for line in raw.splitlines() if line.strip()]
+    if not lines:
+        raise ValueError("Send {'prompts': [...]} or a JSONL body with one prompt per line")
+    return lines
+
+
+def _chunked(lines: Iterable[str], size: int, start: int) -> Iterator[List[Tuple[int, str]]]:
+    chunk: List[Tuple[int, str]] = []
+    for lineno, line in enumerate(lines, start + 1):
+        chunk.append((lineno, line))
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _split_chunk(chunk: List[Tuple[int, str]]):
+    # -> (valid records as (slot in out, id, prompt), per-line output slots)
+    valid = []
+    out: List[Optional[Dict[str, Any]]] = []
+    for lineno, line in chunk:
+        if not line.strip():
+            out.append(None)
+            continue
+        try:
+            record_id, prompt = parse_record(line, lineno)
+        except ValueError as e:
+            out.append({"id": lineno, "line": lineno, "error": str(e)})
+            continue
+        valid.append((len(out), record_id, prompt))
+        out.append({"id": record_id, "line": lineno})
+    return valid, out
+
+
+def _merge_chunk(valid, out, classified) -> List[Dict[str, Any]]:
+    for (slot, _, _), (result, tier) in zip(valid, classified):
+        out[slot].update(result=result, tier=tier)
+    return [o for o in out if o is not None]
+
+
+def iter_results(lines: Iterable[str], *,
+                 start_line: int = 0,
+                 chunk_size: int = CHUNK_SIZE,
+                 **classify_kwargs) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Classify JSONL lines chunk by chunk, yielding the output records of each
+    chunk as soon as it is done. start_line offsets the reported line numbers.
+    """
+    for chunk in _chunked(lines, max(1, chunk_size), start_line):
+        valid, out = _split_chunk(chunk)
+        classified = classify_prompts([p for _, _, p in valid], **classify_kwargs)
+        yield _merge_chunk(valid, out, classified)
+
+
+async def aiter_results(lines: Iterable[str], *,
+                        chunk_size: int = CHUNK_SIZE,
+                        **classify_kwargs):
+    """
+    Async iter_results for the ASGI app.
+    """
+    for chunk in _chunked(lines, max(1, chunk_size), 0):
+        valid, out = _split_chunk(chunk)
+        classified = await classify_prompts_async([p for _, _, p in valid], **classify_kwargs)
+        yield _merge_chunk(valid, out, classified)
+
+
+def _read_checkpoint(path: str) -> Dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_checkpoint(path: str, state: Dict[str, Any]) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
+
+
+def run_batch(input_path: str, output_path: str, *,
+              checkpoint_path: Optional[str] = None,
+              resume: bool = False,
+              chunk_size: int = CHUNK_SIZE,
+              progress=None,
+              **classify_kwargs) -> Dict[str, Any]:
+    """
+    Classify every prompt in input_path and write JSONL results to output_path.
+
+    After each chunk the output is flushed and the checkpoint (default
+    "<output_path>.ckpt") records the input lines consumed and the output size.
+    With resume=True a run continues after the last checkpoint; output written
+    after it is truncated away, so nothing is duplicated. Returns throughput
+    stats; progress, if given, is called with them after every chunk.
+    """
+    checkpoint_path = checkpoint_path or output_path + ".ckpt"
+    state = {"input": os.path.abspath(input_path), "lines": 0, "output_bytes": 0,
+             "prompts": 0, "local": 0, "llm": 0, "rules_fallback": 0, "errors": 0}
+    if resume and os.path.exists(checkpoint_path):
+        saved = _read_checkpoint(checkpoint_path)
+        if saved.get("input") != state["input"]:
+            raise ValueError(f"checkpoint {checkpoint_path} belongs to {saved.get('input')}")
+        state.update(saved)
+
+    stats: Dict[str, Any] = {"prompts": 0, "local": 0, "llm": 0, "rules_fallback": 0, "errors": 0,
+                             "resumed_from_line": state["lines"]}
+    started = time.perf_counter()
+    mode = "r+b" if state["output_bytes"] and os.path.exists(output_path) else "wb"
+    with open(input_path, "r", encoding="utf-8") as src, open(output_path, mode) as dst:
+        dst.truncate(state["output_bytes"])
+        dst.seek(state["output_bytes"])
+        for _ in range(state["lines"]):
+            if not src.readline():
+                break
+        # Read the input lazily; only one chunk is held in memory at a time.
+        for chunk in _chunked(iter(src.readline, ""), max(1, chunk_size), state["lines"]):
+            valid, out = _split_chunk(chunk)
+            classified = classify_prompts([p for _, _, p in valid], **classify_kwargs)
+            records = _merge_chunk(valid, out, classified)
+            dst.write("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records).encode("utf-8"))
+            dst.flush()
+
+            counts = {"prompts": len(valid), "local": 0, "llm": 0, "rules_fallback": 0, "errors": 0}
+            for r in records:
+                counts[r.get("tier", "errors")] += 1
+            for key, n in counts.items():
+                stats[key] += n
+                state[key] += n
+            state["lines"] += len(chunk)
+            state["output_bytes"] = dst.tell()
+            _write_checkpoint(checkpoint_path, state)
+
+            elapsed = time.perf_counter() - started
+            stats.update(lines=state["lines"], elapsed_s=round(elapsed, 3),
+                         prompts_per_s=round(stats["prompts"] / elapsed, 1) if elapsed else 0.0)
+            if progress is not None:
+                progress(stats)
+
+    elapsed = time.perf_counter() - started
+    stats.update(lines=state["lines"], elapsed_s=round(elapsed, 3),
+                 prompts_per_s=round(stats["prompts"] / elapsed, 1) if elapsed else 0.0,
+                 total_prompts=state["prompts"])
+    return stats
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Classify a JSONL file of prompts.")
+    parser.add_argument("input", help="JSONL input, one prompt per line")
+    parser.add_argument("-o", "--output", help="JSONL output (default: <input>.out.jsonl)")
+    parser.add_argument("--checkpoint", help="checkpoint file (default: <output>.ckpt)")
+    parser.add_argument("--resume", action="store_true", help="continue after the last checkpoint")
+    parser.add_argument("--model", default="gpt-3.5-turbo")
+    parser.add_argument("--pack-size", type=int, default=PACK_SIZE, help="prompts per LLM request")
+    parser.add_argument("--llm-concurrency", type=int, default=LLM_CONCURRENCY)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE,
+                        help="prompts per checkpoint / output flush")
+    parser.add_argument("--local-threshold", type=float, default=None,
+                        help="rule confidence needed to skip the LLM (default: CLASSIFIER_LOCAL_THRESHOLD)")
+    parser.add_argument("--rules-only", action="store_true", help="skip the LLM, use the rule-based extractor")
+    args = parser.parse_args(argv)
+
+    output = args.output or os.path.splitext(args.input)[0] + ".out.jsonl"
+
+    def report(s):
+        print(f"\r{s['lines']} lines  {s['prompts']} prompts  local={s['local']} llm={s['llm']} "
+              f"rules_fallback={s['rules_fallback']} errors={s['errors']}  {s['prompts_per_s']:.1f} prompts/s",
+              end="", file=sys.stderr)
+
+    try:
+        stats = run_batch(args.input, output, checkpoint_path=args.checkpoint, resume=args.resume,
+                          chunk_size=args.chunk_size, progress=report, model=args.model,
+                          pack_size=args.pack_size, llm_concurrency=args.llm_concurrency,
+                          local_threshold=args.local_threshold, use_llm=not args.rules_only)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        shutdown_pool()
+    print(file=sys.stderr)
+    print(json.dumps(stats, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,10 @@
 import os
-from typing import Any, Dict, Optional
-import requests
+from typing import Any, Dict, List, Optional, Tuple
 import sys
 import json
 import re
-import time
-from requests.exceptions import RequestException
+import threading
+import llm_client
 
 attributes_metadata = """List of attributes:
         Filter attribute: Rel ID, Customer ID
@@ -21,101 +20,276 @@ attributes_metadata = """List of attributes:
         ECDD attribute = [<comma separated attributes>]
         UNKNOWN attribute = [<comma separated attributes>]"""
 
-def extract_attributes_via_llm(prompt: str,
-                                *,
-                                api_key: Optional[str] = None,
-                                model: str = "gpt-3.5-turbo",
-                                timeout: float = 10.0) -> str:
+# Local-first routing: prompts the rule engine scores at or above this are
+# answered without calling the LLM. Set above 1.0 to always ask the LLM.
+LOCAL_CONFIDENCE_THRESHOLD = float(os.getenv("CLASSIFIER_LOCAL_THRESHOLD", "0.8"))
+
+# Tiers: "local" (confident rules, no LLM call), "llm", "rules_fallback"
+# (LLM failed or answered incompletely).
+TIERS = ("local", "llm", "rules_fallback")
+_tier_counts = {t: 0 for t in TIERS}
+_tier_lock = threading.Lock()
+
+
+def _record_tier(tier: str) -> None:
+    with _tier_lock:
+        _tier_counts[tier] += 1
+
+
+def router_stats() -> Dict[str, Any]:
     """
-    Use the LLM classifier to extract attributes according to attributes_metadata,
-    returning them in the required output format. Falls back to a simple rule-based
-    extractor if the LLM response is missing expected sections.
+    How many prompts each tier has answered in this process, and the LLM calls
+    saved by answering locally.
     """
+    with _tier_lock:
+        out: Dict[str, Any] = dict(_tier_counts)
+    total = sum(out.values())
+    out.update(total=total, llm_calls_saved=out["local"], threshold=LOCAL_CONFIDENCE_THRESHOLD,
+               local_ratio=round(out["local"] / total, 4) if total else 0.0)
+    return out
+
+
+def extract_attributes_routed(prompt: str,
+                              *,
+                              api_key: Optional[str] = None,
+                              model: str = "gpt-3.5-turbo",
+                              timeout: float = 10.0,
+                              local_threshold: Optional[float] = None) -> Tuple[str, str]:
+    """
+    extract_attributes_via_llm that also returns which tier answered:
+    (output, "local" | "llm" | "rules_fallback").
+    """
+    threshold = LOCAL_CONFIDENCE_THRESHOLD if local_threshold is None else local_threshold
+    local_output, confidence = classify_locally(prompt)
+    if confidence >= threshold:
+        _record_tier("local")
+        return local_output, "local"
 
-    # Try LLM first
     try:
         llm_output = classify_user_prompt_via_llm(prompt, api_key=api_key, model=model, timeout=timeout)
     except Exception:
         llm_output = ""
 
     llm_output = (llm_output or "").strip()
+    if _is_complete_llm_output(llm_output):
+        # return LLM output as-is (cleaned)
+        _record_tier("llm")
+        return llm_output, "llm"
+    _record_tier("rules_fallback")
+    return local_output, "rules_fallback"
+
+
+async def extract_attributes_routed_async(prompt: str,
+                                          *,
+                                          api_key: Optional[str] = None,
+                                          model: str = "gpt-3.5-turbo",
+                                          timeout: float = 10.0,
+                                          local_threshold: Optional[float] = None) -> Tuple[str, str]:
+    """
+    Awaitable extract_attributes_routed for the ASGI app.
+    """
+    threshold = LOCAL_CONFIDENCE_THRESHOLD if local_threshold is None else local_threshold
+    local_output, confidence = classify_locally(prompt)
+    if confidence >= threshold:
+        _record_tier("local")
+        return local_output, "local"
+
+    try:
+        llm_output = await classify_user_prompt_via_llm_async(prompt, api_key=api_key, model=model, timeout=timeout)
+    except Exception:
+        llm_output = ""
+
+    llm_output = (llm_output or "").strip()
+    if _is_complete_llm_output(llm_output):
+        _record_tier("llm")
+        return llm_output, "llm"
+    _record_tier("rules_fallback")
+    return local_output, "rules_fallback"
+
+
+def extract_attributes_via_llm(prompt: str,
+                                *,
+                                api_key: Optional[str] = None,
+                                model: str = "gpt-3.5-turbo",
+                                timeout: float = 10.0,
+                                local_threshold: Optional[float] = None) -> str:
+    """
+    Extract attributes according to attributes_metadata, returning them in the
+    required output format. Prompts the rule engine is confident about are
+    answered locally; the rest go to the LLM classifier, falling back to the
+    rules if its response is missing expected sections.
+    """
+    return extract_attributes_routed(prompt, api_key=api_key, model=model, timeout=timeout,
+                                     local_threshold=local_threshold)[0]
+
+
+async def extract_attributes_via_llm_async(prompt: str,
+                                           *,
+                                           api_key: Optional[str] = None,
+                                           model: str = "gpt-3.5-turbo",
+                                           timeout: float = 10.0,
+                                           local_threshold: Optional[float] = None) -> str:
+    """
+    Awaitable extract_attributes_via_llm for the ASGI app.
+    """
+    output, _ = await extract_attributes_routed_async(prompt, api_key=api_key, model=model, timeout=timeout,
+                                                      local_threshold=local_threshold)
+    return output
+
+
+def _is_complete_llm_output(llm_output: str) -> bool:
     # basic validation: check presence of required headings (case-insensitive)
     required_keys = ["rel id", "customer id", "ebbs attribute", "icm attribute", "ecdd attribute", "unknown attribute"]
-    if llm_output and all(k in llm_output.lower() for k in required_keys):
-        # return LLM output as-is (cleaned)
-        return llm_output
-
-    # Fallback rule-based extractor
-    groups = {
-        "EBBS attribute": ["date_of_birth", "age", "last_name", "first_name"],
-        "ICM attribute": ["phone_number", "email", "primary_address"],
-        "ECDD attribute": ["risk_score", "credit_rating", "kyc_status"],
-    }
-    found = {k: [] for k in groups}
-    unknown = set()
+    return bool(llm_output) and all(k in llm_output.lower() for k in required_keys)
+
+
+def _parse_attribute_groups(metadata: str) -> Dict[str, List[str]]:
+    """
+    Read the "<SYSTEM> attributes: a, b, c" lines of attributes_metadata into
+    {"<SYSTEM> attribute": [a, b, c]}, keeping the listed order.
+    """
+    groups: Dict[str, List[str]] = {}
+    for m in re.finditer(r"^\s*(\w+) attributes:\s*(.+)$", metadata, flags=re.MULTILINE):
+        groups[f"{m.group(1)} attribute"] = [a.strip() for a in m.group(2).split(",") if a.strip()]
+    return groups
+
+
+# Attribute vocabulary, derived once from attributes_metadata so adding a
+# system or attribute there needs no code change.
+ATTRIBUTE_GROUPS = _parse_attribute_groups(attributes_metadata)
+_ATTR_GROUP = {a.lower(): g for g, attrs in ATTRIBUTE_GROUPS.items() for a in attrs}
+_ATTR_ORDER = {a.lower(): i for i, a in enumerate(_ATTR_GROUP)}
+_KNOWN_TOKENS = set(_ATTR_GROUP) | {"rel", "id", "relid", "rel_id"}
+# words that look like attribute names even without an underscore
+_UNKNOWN_HINTS = {"kyc", "kyc_status", "credit", "rating", "risk", "primary_address"}
+# Customer-data nouns the rules have no attribute for ("phone" rather than
+# phone_number, "date of birth" rather than date_of_birth): a prompt naming one
+# asks for more than the rules can answer, so they count as unknown too.
+_UNKNOWN_HINTS |= {"phone", "telephone", "mobile", "contact", "address", "postcode", "name", "surname",
+                   "firstname", "lastname", "birth", "birthday", "dob", "gender", "nationality", "occupation",
+                   "income", "salary", "passport", "account"}
+
+# Value patterns that imply an attribute even when its name is absent:
+# (named group, pattern, implied attribute). Order matters where patterns could
+# overlap: the first alternative that matches at a position wins, and the text it
+# matched is not read again. So the digits of a rel id ("rel id 1234567") and an
+# ISO date do not also imply phone_number, and a word inside an email address
+# ("john_doe@example.com") is not an unknown attribute.
+_VALUE_RULES = [
+    ("rel", r"rel[\s_\-]*id[:=]?\s*(?P<rel_value>[A-Za-z0-9\-\_]+)", None),
+    ("email", r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}", "email"),
+    ("dob", r"\b(?:\d{4}-\d{2}-\d{2}|\d{1,2}/\d{1,2}/\d{2,4})\b", "date_of_birth"),
+    ("age", r"\b(?:age[:\s]*\d{1,3}|\b\d{1,3}\s+years?\b)", "age"),
+    ("phone", r"(?:\+?\d[\d\-\s\(\)]{6,}\d)", "phone_number"),
+]
+_IMPLIED_ATTR = {name: attr for name, _, attr in _VALUE_RULES if attr}
+# Implied attributes are listed after literal mentions, in this order.
+_IMPLIED_ORDER = {a: i for i, a in enumerate(["email", "phone_number", "date_of_birth", "age"])}
+
+
+def _compile_rules() -> "re.Pattern[str]":
+    # Longest attribute names first so e.g. "kyc_status" wins over a shorter prefix.
+    attrs = sorted(_ATTR_GROUP, key=len, reverse=True)
+    parts = [f"(?P<{name}>{pattern})" for name, pattern, _ in _VALUE_RULES]
+    parts.append(r"(?P<attr>\b(?:" + "|".join(re.escape(a) for a in attrs) + r")\b)")
+    parts.append(r"(?P<token>\b[a-zA-Z_]{3,30}\b)")
+    return re.compile("|".join(parts), flags=re.IGNORECASE)
+
 
-    # Detect rel id: patterns like "rel id 123", "rel_id=123", "relid: 123"
+# One alternation over every rule: a prompt is classified in a single finditer pass.
+_RULES_RE = _compile_rules()
+
+
+def _scan_rules(prompt: str):
+    # -> (rel_id, named attrs per group, implied attrs per group, unknown tokens)
     rel_id = ""
-    m = re.search(r"rel[\s_\-]*id[:=]?\s*([A-Za-z0-9\-\_]+)", prompt, flags=re.IGNORECASE)
-    if m:
-        rel_id = m.group(1)
-
-    # Search for each known attribute by name or by common synonyms/values
-    for grp, attrs in groups.items():
-        for attr in attrs:
-            # look for the attribute name literally
-            if re.search(r"\b" + re.escape(attr) + r"\b", prompt, flags=re.IGNORECASE):
-                found[grp].append(attr)
-
-    # heuristic detections for values that imply an attribute even if name not present
-    # email
-    if re.search(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}", prompt):
-        if "email" not in found["ICM attribute"]:
-            found["ICM attribute"].append("email")
-    # phone
-    if re.search(r"(?:\+?\d[\d\-\s\(\)]{6,}\d)", prompt):
-        if "phone_number" not in found["ICM attribute"]:
-            found["ICM attribute"].append("phone_number")
-    # date of birth (simple date)
-    if re.search(r"\b(?:\d{4}-\d{2}-\d{2}|\d{1,2}/\d{1,2}/\d{2,4})\b", prompt):
-        if "date_of_birth" not in found["EBBS attribute"]:
-            found["EBBS attribute"].append("date_of_birth")
-    # age
-    if re.search(r"\b(?:age[:\s]*\d{1,3}|\b\d{1,3}\s+years?\b)", prompt, flags=re.IGNORECASE):
-        if "age" not in found["EBBS attribute"]:
-            found["EBBS attribute"].append("age")
-
-    # collect unknown tokens: any attribute-like tokens that were mentioned but not matched
-    # look for words with underscore or hyphen that are short and might be attribute names
-    tokens = re.findall(r"\b[a-zA-Z_]{3,30}\b", prompt)
-    known_attrs = {a for attrs in groups.values() for a in attrs} | {"rel", "id", "relid", "rel_id"}
-    for t in tokens:
-        tt = t.lower()
-        if tt in known_attrs:
-            continue
-        # if token looks like an attribute (contains underscore) or matches common attribute words
-        if "_" in tt or tt in {"kyc", "kyc_status", "credit", "rating", "risk", "primary_address"}:
-            unknown.add(tt)
+    named: Dict[str, set] = {g: set() for g in ATTRIBUTE_GROUPS}
+    implied: Dict[str, set] = {g: set() for g in ATTRIBUTE_GROUPS}
+    unknown = set()
+
+    for m in _RULES_RE.finditer(prompt):
+        kind = m.lastgroup
+        if kind == "rel_value":
+            kind = "rel"
+        if kind == "attr":
+            attr = m.group(kind).lower()
+            named[_ATTR_GROUP[attr]].add(attr)
+        elif kind == "token":
+            tt = m.group(kind).lower()
+            # a token looks like an attribute if it contains an underscore or is a known hint
+            if tt not in _KNOWN_TOKENS and ("_" in tt or tt in _UNKNOWN_HINTS):
+                unknown.add(tt)
+        elif kind == "rel":
+            # patterns like "rel id 123", "rel_id=123", "relid: 123"; first one wins
+            if not rel_id:
+                rel_id = m.group("rel_value")
+        else:
+            attr = _IMPLIED_ATTR[kind]
+            if attr in _ATTR_GROUP:
+                implied[_ATTR_GROUP[attr]].add(attr)
+    return rel_id, named, implied, unknown
 
+
+def _format_rules(rel_id: str, named: Dict[str, set], implied: Dict[str, set], unknown: set) -> str:
     # Format output exactly as required
     def fmt_list(lst):
         return "[" + ", ".join(lst) + "]" if lst else "[]"
 
-    ebbs_list = found["EBBS attribute"]
-    icm_list = found["ICM attribute"]
-    ecdd_list = found["ECDD attribute"]
-    unknown_list = sorted(list(unknown))
-
-    output_lines = [
-        f"Rel ID = {rel_id}" if rel_id else "Rel ID = ",
-        f"EBBS attribute = {fmt_list(ebbs_list)}",
-        f"ICM attribute = {fmt_list(icm_list)}",
-        f"ECDD attribute = {fmt_list(ecdd_list)}",
-        f"UNKNOWN attribute = {fmt_list(unknown_list)}",
-    ]
+    # the rules cannot read a customer ID; the line keeps the LLM's output shape
+    output_lines = [f"Rel ID = {rel_id}" if rel_id else "Rel ID = ", "Customer ID = "]
+    for group, attrs in named.items():
+        lst = sorted(attrs, key=_ATTR_ORDER.__getitem__)
+        lst += sorted(implied[group] - attrs, key=lambda a: _IMPLIED_ORDER.get(a, len(_IMPLIED_ORDER)))
+        output_lines.append(f"{group} = {fmt_list(lst)}")
+    output_lines.append(f"UNKNOWN attribute = {fmt_list(sorted(unknown))}")
     return "\n".join(output_lines)
 
 
+def extract_attributes_via_rules(prompt: str) -> str:
+    """
+    Rule-based extractor used when the LLM is unavailable or its answer is incomplete.
+    Each part of the prompt counts once: a rel id, email address or date is not
+    also read as a phone number or an attribute name (see _VALUE_RULES).
+    """
+    return _format_rules(*_scan_rules(prompt))
+
+
+# The rules leave Customer ID empty, so prompts asking for one need the LLM.
+_CUSTOMER_ID_RE = re.compile(r"\bcustomer[\s_\-]*id\b", flags=re.IGNORECASE)
+
+
+def rules_confidence(rel_id: str, named: Dict[str, set], implied: Dict[str, set], unknown: set,
+                     prompt: str = "") -> float:
+    """
+    Score in [0, 1] for how safely the rule result can stand in for the LLM:
+    0.3 for attributes named explicitly (0.15 if only implied by values such as
+    an email address), 0.3 for a rel_id, 0.4 for no unknown attribute-like tokens.
+    No attributes at all, or a Customer ID request, scores 0. Without a rel_id
+    the score stays below the default LOCAL_CONFIDENCE_THRESHOLD.
+    """
+    if _CUSTOMER_ID_RE.search(prompt):
+        return 0.0
+    if any(named.values()):
+        score = 0.3
+    elif any(implied.values()):
+        score = 0.15
+    else:
+        return 0.0
+    if rel_id:
+        score += 0.3
+    if not unknown:
+        score += 0.4
+    return round(score, 2)
+
+
+def classify_locally(prompt: str) -> Tuple[str, float]:
+    """
+    Rule-based extraction plus its confidence score (see rules_confidence).
+    """
+    scan = _scan_rules(prompt)
+    return _format_rules(*scan), rules_confidence(*scan, prompt=prompt)
+
+
 def classify_user_prompt_via_llm(prompt: str,
                                  *,
                                  api_key: Optional[str] = None,
@@ -126,15 +300,142 @@ def classify_user_prompt_via_llm(prompt: str,
     instructions in attributes_metadata. Returns the assistant content (raw),
     or an empty string on failure so the caller can fall back to local rules.
     """
-    if not prompt or not prompt.strip():
-        raise ValueError("prompt must be a non-empty string")
+    messages = _classifier_messages(prompt)
+    api_key = api_key or os.getenv("OPENAI_API_KEY")
+    if not api_key and llm_client.needs_api_key("classify"):
+        raise ValueError("OpenAI API key required (pass api_key or set OPENAI_API_KEY)")
+
+    # The shared client keeps connections alive and retries rate limits / server
+    # errors once with backoff.
+    try:
+        content = llm_client.chat(
+            messages,
+            model=model,
+            task="classify",
+            # provide enough tokens for a small structured response
+            max_tokens=512,
+            temperature=0.0,
+            timeout=timeout,
+            api_key=api_key,
+        )
+    except llm_client.LLMError:
+        # on any failure return empty so caller uses rule-based fallback
+        return ""
+    return (content or "").strip()
+
+
+async def classify_user_prompt_via_llm_async(prompt: str,
+                                             *,
+                                             api_key: Optional[str] = None,
+                                             model: str = "gpt-3.5-turbo",
+                                             timeout: float = 10.0) -> str:
+    """
+    Awaitable classify_user_prompt_via_llm; same contract.
+    """
+    messages = _classifier_messages(prompt)
+    api_key = api_key or os.getenv("OPENAI_API_KEY")
+    if not api_key and llm_client.needs_api_key("classify"):
+        raise ValueError("OpenAI API key required (pass api_key or set OPENAI_API_KEY)")
+    try:
+        content = await llm_client.achat(messages, model=model, task="classify", max_tokens=512, temperature=0.0,
+                                         timeout=timeout, api_key=api_key)
+    except llm_client.LLMError:
+        return ""
+    return (content or "").strip()
+
+
+def classify_user_prompts_via_llm(prompts: List[str],
+                                  *,
+                                  api_key: Optional[str] = None,
+                                  model: str = "gpt-3.5-turbo",
+                                  timeout: float = 30.0) -> List[str]:
+    """
+    Classify several prompts with one Chat Completions request. Returns one raw
+    answer per prompt, with "" wherever the reply has no complete section for
+    that prompt, so the caller can fall back to local rules for those only.
+    """
+    messages = _packed_classifier_messages(prompts)
+    api_key = api_key or os.getenv("OPENAI_API_KEY")
+    if not api_key and llm_client.needs_api_key("classify"):
+        raise ValueError("OpenAI API key required (pass api_key or set OPENAI_API_KEY)")
+    try:
+        content = llm_client.chat(messages, model=model, task="classify", max_tokens=_packed_max_tokens(len(prompts)),
+                                  temperature=0.0, timeout=timeout, api_key=api_key)
+    except llm_client.LLMError:
+        return [""] * len(prompts)
+    return _split_packed_output(content or "", len(prompts))
+
 
+async def classify_user_prompts_via_llm_async(prompts: List[str],
+                                              *,
+                                              api_key: Optional[str] = None,
+                                              model: str = "gpt-3.5-turbo",
+                                              timeout: float = 30.0) -> List[str]:
+    """
+    Awaitable classify_user_prompts_via_llm; same contract.
+    """
+    messages = _packed_classifier_messages(prompts)
     api_key = api_key or os.getenv("OPENAI_API_KEY")
-    if not api_key:
+    if not api_key and llm_client.needs_api_key("classify"):
         raise ValueError("OpenAI API key required (pass api_key or set OPENAI_API_KEY)")
+    try:
+        content = await llm_client.achat(messages, model=model, task="classify", max_tokens=_packed_max_tokens(len(prompts)),
+                                         temperature=0.0, timeout=timeout, api_key=api_key)
+    except llm_client.LLMError:
+        return [""] * len(prompts)
+    return _split_packed_output(content or "", len(prompts))
+
+
+# Packed replies: each answer is introduced by a "### <n>" line.
+_PACKED_SECTION_RE = re.compile(r"^[ \t]*#{2,}[ \t]*(\d+)[ \t]*$", flags=re.MULTILINE)
+
+
+def _packed_max_tokens(n: int) -> int:
+    # a complete answer is six short lines; leave headroom for long attribute lists
+    return min(4096, 64 + 160 * n)
+
 
-    url = "https://api.openai.com/v1/chat/completions"
-    headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
+def _split_packed_output(content: str, n: int) -> List[str]:
+    answers = [""] * n
+    parts = _PACKED_SECTION_RE.split(content)
+    # parts = [preamble, "1", body1, "2", body2, ...]
+    for i in range(1, len(parts) - 1, 2):
+        idx = int(parts[i]) - 1
+        body = parts[i + 1].strip()
+        if 0 <= idx < n and not answers[idx] and _is_complete_llm_output(body):
+            answers[idx] = body
+    return answers
+
+
+def _packed_classifier_messages(prompts: List[str]):
+    if not prompts:
+        raise ValueError("prompts must be a non-empty list")
+    if any(not p or not p.strip() for p in prompts):
+        raise ValueError("every prompt must be a non-empty string")
+
+    system_prompt = (
+        "You are a strict extractor. You will receive several numbered user prompts. "
+        "For each one, output a line '### <number>' followed by the lines described in "
+        "the Output format (no extra explanation). Use the attribute lists provided to "
+        "map tokens to each category. If you cannot map something, put it under "
+        "UNKNOWN attribute. Do not invent values that are not present in the user prompt, "
+        "and never mix values between prompts."
+    )
+
+    numbered = "\n\n".join(f"### {i}\n{p.strip()}" for i, p in enumerate(prompts, 1))
+    llm_user_prompt = (attributes_metadata
+                       + f"\n\nExtract attributes from each of these {len(prompts)} user prompts:\n\n"
+                       + numbered)
+
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": llm_user_prompt},
+    ]
+
+
+def _classifier_messages(prompt: str):
+    if not prompt or not prompt.strip():
+        raise ValueError("prompt must be a non-empty string")
 
     system_prompt = (
         "You are a strict extractor. Follow the Output format exactly and only output "
@@ -145,52 +446,20 @@ def classify_user_prompt_via_llm(prompt: str,
 
     llm_user_prompt = attributes_metadata + "\n\nExtract attributes from this user prompt:\n\n" + prompt
 
-    payload = {
-        "model": model,
-        "messages": [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": llm_user_prompt},
-        ],
-        # provide enough tokens for a small structured response
-        "max_tokens": 512,
-        "temperature": 0.0,
-    }
-
-
-    # simple retry for transient rate limits
-    tries = 2
-    backoff = 1.0
-    for attempt in range(tries):
-        try:
-            resp = requests.post(url, headers=headers, json=payload, timeout=timeout)
-            resp.raise_for_status()
-            j = resp.json()
-            # Chat Completions: choices[*].message.content
-            content = ""
-            try:
-                choice = (j.get("choices") or [None])[0]
-                if isinstance(choice, dict):
-                    # new chat response shape
-                    content = choice.get("message", {}).get("content") or choice.get("text") or ""
-                else:
-                    content = ""
-            except Exception:
-                content = ""
-            return (content or "").strip()
-        except RequestException as e:
-            # retry on rate limit or server errors once
-            status = getattr(getattr(e, "response", None), "status_code", None)
-            if attempt + 1 < tries and status in (429, 502, 503, 504):
-                time.sleep(backoff)
-                backoff *= 2
-                continue
-            # on any other failure return empty so caller uses rule-based fallback
-            return ""
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": llm_user_prompt},
+    ]
 
 if __name__ == "__main__":
-    # simple CLI for testing
+    # simple CLI for testing; "--batch" hands over to the JSONL batch runner
+    if len(sys.argv) >= 2 and sys.argv[1] == "--batch":
+        import classifier_batch
+        sys.exit(classifier_batch.main(sys.argv[2:]))
+
     if len(sys.argv) < 2:
         print("Usage: python customer_classifier.py '<prompt>'")
+        print("       python customer_classifier.py --batch <input.jsonl> [-o <output.jsonl>] [--resume]")
         sys.exit(1)
 
     user_prompt = sys.argv[1]
@@ -0,0 +1,267 @@
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+from urllib.parse import quote
+
+from db_schema import DB_PATH
+
+# Per-connection tuning for read paths. cache_size is in KiB when negative.
+DEFAULT_CACHE_SIZE_KIB = 64 * 1024
+DEFAULT_MMAP_SIZE = 256 * 1024 * 1024
+# Size of sqlite3's per-connection prepared statement cache.
+DEFAULT_STATEMENT_CACHE = 256
+# AML_SQLITE_WAL=1 lets the first pool switch the database to WAL, so readers
+# no longer wait on a writer. Off by default: the switch writes to the file.
+ENABLE_WAL = os.getenv("AML_SQLITE_WAL", "0") == "1"
+
+
+class PoolTimeout(RuntimeError):
+    """Raised when no connection became available within the acquire timeout."""
+
+
+class _PooledConnection:
+    __slots__ = ("conn", "last_used", "owner")
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+        self.last_used = time.monotonic()
+        self.owner: Optional[int] = None
+
+
+class ReadOnlyPool:
+    """
+    Bounded pool of read-only SQLite connections shared by the request paths.
+
+    Connections are opened with a mode=ro URI, so a request can never write, and
+    keep thread affinity: a thread gets back the connection it used last when it
+    is idle, which keeps that connection's page cache and statement cache warm.
+    Connections are created lazily up to max_size; beyond that acquirers wait.
+    enable_wal switches the database file to WAL first, the one write the pool
+    can make.
+    """
+
+    def __init__(self, db_path: str = DB_PATH, *,
+                 max_size: int = 8,
+                 acquire_timeout: float = 5.0,
+                 health_check_interval: float = 30.0,
+                 cache_size_kib: int = DEFAULT_CACHE_SIZE_KIB,
+                 mmap_size: int = DEFAULT_MMAP_SIZE,
+                 statement_cache: int = DEFAULT_STATEMENT_CACHE,
+                 enable_wal: bool = ENABLE_WAL):
+        if max_size < 1:
+            raise ValueError("max_size must be >= 1")
+        self.db_path = os.path.abspath(db_path)
+        self.max_size = max_size
+        self.acquire_timeout = acquire_timeout
+        self.health_check_interval = health_check_interval
+        self.cache_size_kib = cache_size_kib
+        self.mmap_size = mmap_size
+        self.statement_cache = statement_cache
+
+        self._cond = threading.Condition()
+        self._idle: List[_PooledConnection] = []
+        self._affinity: Dict[int, _PooledConnection] = {}
+        self._checked_out: Dict[int, _PooledConnection] = {}
+        self._size = 0
+        self._closed = False
+        self._counters = {
+            "hits": 0,          # served from an idle connection
+            "affinity_hits": 0, # ... that was this thread's previous connection
+            "created": 0,
+            "waits": 0,         # had to block because the pool was at max_size
+            "timeouts": 0,
+            "health_failures": 0,
+        }
+        if enable_wal:
+            self._enable_wal()
+
+    def _enable_wal(self) -> None:
+        # journal_mode is persistent in the file, so this one-off writable
+        # connection is the only write the pool ever makes.
+        conn = sqlite3.connect(self.db_path)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        uri = f"file:{quote(self.db_path)}?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False,
+                               cached_statements=self.statement_cache)
+        conn.execute(f"PRAGMA cache_size=-{int(self.cache_size_kib)}")
+        conn.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA query_only=ON")
+        return conn
+
+    def _healthy(self, pc: _PooledConnection) -> bool:
+        if time.monotonic() - pc.last_used < self.health_check_interval:
+            return True
+        try:
+            pc.conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def _discard(self, pc: _PooledConnection) -> None:
+        # caller holds self._cond
+        self._counters["health_failures"] += 1
+        self._size -= 1
+        if pc.owner is not None and self._affinity.get(pc.owner) is pc:
+            del self._affinity[pc.owner]
+        try:
+            pc.conn.close()
+        except sqlite3.Error:
+            pass
+
+    def _take_idle(self, tid: int) -> Optional[_PooledConnection]:
+        # caller holds self._cond
+        pc = self._affinity.get(tid)
+        if pc is not None and pc in self._idle:
+            self._idle.remove(pc)
+            self._counters["affinity_hits"] += 1
+        elif self._idle:
+            pc = self._idle.pop()
+        else:
+            return None
+        self._counters["hits"] += 1
+        return pc
+
+    def acquire(self, timeout: Optional[float] = None) -> sqlite3.Connection:
+        """
+        Check out a connection. Pair every call with release(), or use connection().
+        timeout, when given, bounds the wait instead of acquire_timeout if shorter.
+        """
+        tid = threading.get_ident()
+        timeout = self.acquire_timeout if timeout is None else min(timeout, self.acquire_timeout)
+        deadline = time.monotonic() + timeout
+        waited = False
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("pool is closed")
+                pc = self._take_idle(tid)
+                if pc is not None:
+                    if not self._healthy(pc):
+                        self._discard(pc)
+                        continue
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    try:
+                        pc = _PooledConnection(self._connect())
+                    except Exception:
+                        self._size -= 1
+                        raise
+                    self._counters["created"] += 1
+                    break
+                if not waited:
+                    self._counters["waits"] += 1
+                    waited = True
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._counters["timeouts"] += 1
+                    raise PoolTimeout(
+                        f"no connection available within {timeout:g}s "
+                        f"(max_size={self.max_size})"
+                    )
+                self._cond.wait(remaining)
+            pc.owner = tid
+            self._affinity[tid] = pc
+            self._checked_out[id(pc.conn)] = pc
+            return pc.conn
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        with self._cond:
+            pc = self._checked_out.pop(id(conn))
+            if conn.in_transaction:
+                conn.rollback()
+            pc.last_used = time.monotonic()
+            if self._closed:
+                self._size -= 1
+                conn.close()
+            else:
+                self._idle.append(pc)
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self, timeout: Optional[float] = None) -> Iterator[sqlite3.Connection]:
+        conn = self.acquire(timeout)
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def health_check(self) -> Dict[str, int]:
+        """
+        Probe every idle connection with SELECT 1 and drop the broken ones.
+        """
+        checked = dropped = 0
+        with self._cond:
+            for pc in list(self._idle):
+                checked += 1
+                try:
+                    pc.conn.execute("SELECT 1").fetchone()
+                    pc.last_used = time.monotonic()
+                except sqlite3.Error:
+                    self._idle.remove(pc)
+                    self._discard(pc)
+                    dropped += 1
+        return {"checked": checked, "dropped": dropped}
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Snapshot of pool counters and gauges, suitable for a metrics endpoint.
+        """
+        with self._cond:
+            out = dict(self._counters)
+            out.update(size=self._size, idle=len(self._idle), max_size=self.max_size)
+            return out
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            for pc in self._idle:
+                pc.conn.close()
+                self._size -= 1
+            self._idle.clear()
+            self._affinity.clear()
+            self._cond.notify_all()
+
+
+_pools: Dict[str, ReadOnlyPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path: str = DB_PATH, **kwargs) -> ReadOnlyPool:
+    """
+    Return the process-wide pool for db_path, creating it on first use.
+    kwargs only apply when the pool is created.
+    """
+    key = os.path.abspath(db_path)
+    pool = _pools.get(key)
+    if pool is not None:
+        return pool
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = ReadOnlyPool(key, **kwargs)
+            _pools[key] = pool
+        return pool
+
+
+def pool_stats() -> Dict[str, Dict[str, int]]:
+    """
+    Stats for every pool in the process, keyed by database path.
+    """
+    return {path: pool.stats() for path, pool in list(_pools.items())}
+
+
+def close_all() -> None:
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+        _pools.clear()
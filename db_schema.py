@@ -0,0 +1,311 @@
+import os
+import re
+import sqlite3
+import sys
+import threading
+from typing import Callable, Iterator, List, Set, Tuple
+
+import rollups
+import text_search
+
+
+DB_PATH = os.path.join(os.path.dirname(__file__), "sample_data.db")
+SQL_DIR = os.path.join(os.path.dirname(__file__), "sql")
+
+# Seed scripts: only their INSERT statements are applied, and only into empty tables.
+SEED_FILES = {
+    "AMLcase": os.path.join(SQL_DIR, "case.sql"),
+    "AMLevent": os.path.join(SQL_DIR, "event.sql"),
+}
+
+
+def _migration_001_base_tables(conn: sqlite3.Connection) -> None:
+    """
+    Create the AMLcase and AMLevent tables (no-op on databases that already have them).
+    """
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS AMLcase (
+        CASE_ID         VARCHAR(100) PRIMARY KEY,
+        customer        VARCHAR(255) NOT NULL,
+        create_date     DATETIME NOT NULL,
+        AAA_Status      VARCHAR(30),
+        CASE_Status     VARCHAR(50),
+        Event_Country   VARCHAR(100),
+        Analyst         VARCHAR(100),
+        Source_System   VARCHAR(100)
+    );
+    """)
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS AMLevent (
+        EVENT_ID         VARCHAR(100) PRIMARY KEY,
+        create_date      DATETIME NOT NULL,
+        event_Status      VARCHAR(30),
+        event_description VARCHAR(50)
+    );
+    """)
+
+
+# Secondary indexes for the predicates the generated SQL filters on. Composite
+# indexes lead with the equality column and end with create_date so date-range
+# filters and ORDER BY create_date are served from the same index.
+AML_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_amlcase_create_date ON AMLcase (create_date)",
+    "CREATE INDEX IF NOT EXISTS idx_amlcase_status_date ON AMLcase (CASE_Status, create_date)",
+    "CREATE INDEX IF NOT EXISTS idx_amlcase_aaa_status ON AMLcase (AAA_Status, CASE_Status)",
+    "CREATE INDEX IF NOT EXISTS idx_amlcase_country_status ON AMLcase (Event_Country, CASE_Status, create_date)",
+    "CREATE INDEX IF NOT EXISTS idx_amlcase_analyst_date ON AMLcase (Analyst, create_date)",
+    "CREATE INDEX IF NOT EXISTS idx_amlevent_create_date ON AMLevent (create_date)",
+    "CREATE INDEX IF NOT EXISTS idx_amlevent_status_date ON AMLevent (event_Status, create_date)",
+]
+
+
+def _migration_002_secondary_indexes(conn: sqlite3.Connection) -> None:
+    for stmt in AML_INDEXES:
+        conn.execute(stmt)
+    conn.execute("ANALYZE")
+
+
+# Tables whose writes are versioned, with their key column, and the bookkeeping
+# tables that record it (see change_tracking).
+TRACKED_TABLES = {"AMLcase": "CASE_ID", "AMLevent": "EVENT_ID"}
+VERSION_TABLE = "aml_data_version"
+CHANGE_LOG_TABLE = "aml_change_log"
+
+
+def change_triggers(conn: sqlite3.Connection, table: str) -> List[str]:
+    """
+    CREATE TRIGGER statements that stamp every insert, update and delete on a
+    tracked table with the next data version and log it. An update is logged
+    with the columns whose values changed; one that changes nothing is not
+    logged and does not move the version.
+    """
+    key = TRACKED_TABLES[table]
+    columns = [r[1] for r in conn.execute(f'PRAGMA table_info("{table}")')]
+    bump = (f"UPDATE {VERSION_TABLE} SET version = (SELECT MAX(version) + 1 FROM {VERSION_TABLE}), "
+            f"changed_at = CURRENT_TIMESTAMP WHERE table_name = '{table}';")
+
+    def log(op: str, row: str, changed: str = "NULL") -> str:
+        return (f"INSERT INTO {CHANGE_LOG_TABLE} (version, table_name, op, row_key, columns) "
+                f"SELECT version, '{table}', '{op}', {row}.{key}, {changed} "
+                f"FROM {VERSION_TABLE} WHERE table_name = '{table}';")
+
+    differs = " OR ".join(f"OLD.{c} IS NOT NEW.{c}" for c in columns)
+    changed = ("rtrim(" + " || ".join(f"CASE WHEN OLD.{c} IS NOT NEW.{c} THEN '{c},' ELSE '' END"
+                                      for c in columns) + ", ',')")
+    name = f"trg_{table.lower()}"
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS {name}_insert AFTER INSERT ON {table} BEGIN "
+        f"{bump} {log('insert', 'NEW')} END",
+        f"CREATE TRIGGER IF NOT EXISTS {name}_update AFTER UPDATE ON {table} WHEN {differs} BEGIN "
+        f"{bump} {log('update', 'NEW', changed)} END",
+        f"CREATE TRIGGER IF NOT EXISTS {name}_delete AFTER DELETE ON {table} BEGIN "
+        f"{bump} {log('delete', 'OLD')} END",
+    ]
+
+
+def _migration_003_change_tracking(conn: sqlite3.Connection) -> None:
+    """
+    A database-wide data version counter (the latest version that touched each
+    tracked table) and a per-row change log, both kept by triggers.
+    """
+    conn.execute(f"""
+    CREATE TABLE IF NOT EXISTS {VERSION_TABLE} (
+        table_name  TEXT PRIMARY KEY,
+        version     INTEGER NOT NULL,
+        changed_at  DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+    );
+    """)
+    conn.execute(f"""
+    CREATE TABLE IF NOT EXISTS {CHANGE_LOG_TABLE} (
+        version     INTEGER NOT NULL,
+        table_name  TEXT NOT NULL,
+        op          TEXT NOT NULL,
+        row_key     TEXT,
+        columns     TEXT,
+        changed_at  DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+    );
+    """)
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{CHANGE_LOG_TABLE}_version ON {CHANGE_LOG_TABLE} (version)")
+    for table in TRACKED_TABLES:
+        conn.execute(f"INSERT OR IGNORE INTO {VERSION_TABLE} (table_name, version) VALUES (?, 0)", (table,))
+        for stmt in change_triggers(conn, table):
+            conn.execute(stmt)
+
+
+def _migration_004_text_search(conn: sqlite3.Connection) -> None:
+    """
+    FTS5 indexes over customer, Analyst and event_description, and the
+    case-to-customer link table (see text_search).
+    """
+    text_search.create(conn)
+
+
+def _migration_005_rollups(conn: sqlite3.Connection) -> None:
+    """
+    Count rollups of AMLcase and AMLevent for dashboard questions, kept
+    current by triggers (see rollups and query_rewriter).
+    """
+    rollups.create(conn)
+
+
+# Ordered list of (version, description, apply). Append new migrations at the end;
+# never edit or reorder one that has shipped.
+MIGRATIONS: List[Tuple[int, str, Callable[[sqlite3.Connection], None]]] = [
+    (1, "base AMLcase/AMLevent tables", _migration_001_base_tables),
+    (2, "secondary indexes on filter columns", _migration_002_secondary_indexes),
+    (3, "data versions and change log", _migration_003_change_tracking),
+    (4, "full-text search and case-customer links", _migration_004_text_search),
+    (5, "count rollups for dashboard queries", _migration_005_rollups),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+_bootstrapped: Set[str] = set()
+_bootstrap_lock = threading.Lock()
+
+
+def iter_sql_statements(script: str) -> Iterator[str]:
+    """
+    Split an SQL script into complete statements using sqlite3.complete_statement,
+    so semicolons inside string literals do not break the split.
+    """
+    buf: List[str] = []
+    for line in script.splitlines(keepends=True):
+        buf.append(line)
+        chunk = "".join(buf)
+        if sqlite3.complete_statement(chunk):
+            stmt = chunk.strip()
+            buf = []
+            if stmt and stmt != ";":
+                yield stmt
+    tail = "".join(buf).strip()
+    if tail:
+        yield tail
+
+
+def strip_sql_comments(sql: str) -> str:
+    """
+    Remove -- line comments and /* */ block comments (string literals are not parsed).
+    """
+    sql = re.sub(r"/\*.*?\*/", " ", sql, flags=re.DOTALL)
+    return re.sub(r"--[^\n]*", " ", sql).strip()
+
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    """
+    Return the applied schema version, or 0 if the database was never bootstrapped.
+    """
+    row = conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'schema_version'"
+    ).fetchone()
+    if not row:
+        return 0
+    row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    return row[0] or 0
+
+
+def _seed_table(conn: sqlite3.Connection, table: str, path: str) -> int:
+    """
+    Apply the INSERT statements from a seed script if the table is empty.
+    Returns the number of rows inserted.
+    """
+    if conn.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone():
+        return 0
+    with open(path, encoding="utf-8") as f:
+        script = f.read()
+    before = conn.total_changes
+    for stmt in iter_sql_statements(script):
+        if strip_sql_comments(stmt).lower().startswith("insert"):
+            conn.execute(stmt)
+    return conn.total_changes - before
+
+
+def ensure_schema(db_path: str = DB_PATH, *, seed: bool = True) -> int:
+    """
+    Bring the database up to LATEST_VERSION, seeding empty tables along the way.
+
+    Only writes when a migration is pending, so calling it on an up-to-date
+    database costs one read; a table emptied after that is not reseeded
+    (rebuild_database starts over). Returns the resulting schema version.
+    """
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        version = get_schema_version(conn)
+        if version >= LATEST_VERSION:
+            return version
+        # BEGIN IMMEDIATE serialises concurrent bootstrappers; re-read the version
+        # once we hold the write lock in case another process got there first.
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("""
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version     INTEGER PRIMARY KEY,
+                description TEXT NOT NULL,
+                applied_at  DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+            );
+            """)
+            version = get_schema_version(conn)
+            for mig_version, description, apply in MIGRATIONS:
+                if mig_version <= version:
+                    continue
+                apply(conn)
+                conn.execute(
+                    "INSERT INTO schema_version (version, description) VALUES (?, ?)",
+                    (mig_version, description),
+                )
+                version = mig_version
+            if seed:
+                for table, path in SEED_FILES.items():
+                    _seed_table(conn, table, path)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return version
+    finally:
+        conn.close()
+
+
+def ensure_schema_once(db_path: str = DB_PATH) -> None:
+    """
+    Process-wide memoised ensure_schema: after the first call for a path, request
+    paths skip the check entirely and never open a write transaction.
+    """
+    key = os.path.abspath(db_path)
+    if key in _bootstrapped:
+        return
+    with _bootstrap_lock:
+        if key in _bootstrapped:
+            return
+        ensure_schema(db_path)
+        _bootstrapped.add(key)
+
+
+def rebuild_database(db_path: str = DB_PATH) -> int:
+    """
+    Drop the AML tables and version history, then bootstrap from scratch.
+    Maintenance only; never call this from a request path.
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        # the data version counter survives, so versions are never reused
+        derived = [fts for fts, _ in text_search.FTS_TABLES.values()]
+        derived += [text_search.LINK_TABLE, rollups.ROLLUP_TABLE]
+        for table in derived + ["AMLcase", "AMLevent", CHANGE_LOG_TABLE, "schema_version"]:
+            conn.execute(f"DROP TABLE IF EXISTS {table}")
+        conn.commit()
+    finally:
+        conn.close()
+    _bootstrapped.discard(os.path.abspath(db_path))
+    return ensure_schema(db_path)
+
+
+if __name__ == "__main__":
+    # Usage: python db_schema.py [db_path] [--rebuild]
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    path = args[0] if args else DB_PATH
+    if "--rebuild" in sys.argv:
+        v = rebuild_database(path)
+    else:
+        v = ensure_schema(path)
+    print(f"{path}: schema version {v}")
@@ -0,0 +1,41 @@
+"""
+JSON encoding for query results: orjson when it is installed, the standard
+library otherwise. Both paths stringify values JSON cannot represent (dates,
+bytes, Decimal) the way json.dumps(default=str) does.
+"""
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # optional speed-up
+    orjson = None
+
+BACKEND = "orjson" if orjson is not None else "json"
+
+
+def dumps(obj: Any, *, indent: bool = False) -> str:
+    """
+    Serialize obj to a JSON string; indent=True pretty-prints with two spaces.
+    """
+    if orjson is not None:
+        option = orjson.OPT_INDENT_2 if indent else 0
+        return orjson.dumps(obj, default=str, option=option).decode("utf-8")
+    if indent:
+        return json.dumps(obj, indent=2, default=str)
+    return json.dumps(obj, default=str, separators=(",", ":"))
+
+
+def dumps_bytes(obj: Any) -> bytes:
+    """
+    Compact JSON as UTF-8 bytes, ready to be written to a response body.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, default=str)
+    return json.dumps(obj, default=str, separators=(",", ":")).encode("utf-8")
+
+
+def loads(data: Any) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
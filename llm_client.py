@@ -0,0 +1,509 @@
+import asyncio
+import functools
+import importlib.util
+import os
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+# Defaults can be overridden per backend instance or through the environment.
+DEFAULT_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "30"))
+DEFAULT_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))
+DEFAULT_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "32"))
+DEFAULT_MAX_KEEPALIVE = int(os.getenv("LLM_MAX_KEEPALIVE", "16"))
+DEFAULT_KEEPALIVE_EXPIRY = float(os.getenv("LLM_KEEPALIVE_EXPIRY", "60"))
+# Model names callers default to that only the OpenAI API serves.
+_OPENAI_MODEL_PREFIXES = ("gpt-", "chatgpt-")
+
+
+class LLMError(RuntimeError):
+    """
+    Transport or API failure from a chat backend. status_code is the HTTP status
+    when the server answered, None for connection errors and timeouts.
+    """
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class ChatBackend:
+    """
+    Interface for chat-completion backends. Implementations must be safe to share
+    across threads; one instance serves the whole process.
+    """
+
+    name = "base"
+    # False for local servers that accept unauthenticated requests
+    requires_api_key = False
+
+    def chat(self, messages: List[Dict[str, str]], *,
+             model: str,
+             max_tokens: int = 512,
+             temperature: Optional[float] = None,
+             timeout: Optional[float] = None,
+             api_key: Optional[str] = None) -> str:
+        raise NotImplementedError
+
+    async def achat(self, messages: List[Dict[str, str]], **kwargs) -> str:
+        """
+        Awaitable chat(). The default runs chat() in a worker thread; backends with
+        a native async client override it so no thread waits on the network.
+        """
+        return await asyncio.to_thread(functools.partial(self.chat, messages, **kwargs))
+
+    def warm_up(self, models: List[str]) -> None:
+        """
+        Load models ahead of the first request. No-op for hosted APIs.
+        """
+
+    def close(self) -> None:
+        pass
+
+
+def _http2_available() -> bool:
+    return importlib.util.find_spec("h2") is not None
+
+
+class OpenAIBackend(ChatBackend):
+    """
+    OpenAI-compatible Chat Completions over one long-lived httpx connection pool.
+
+    The pool keeps TCP/TLS connections alive between calls and negotiates HTTP/2
+    when the h2 package is installed. base_url (or OPENAI_BASE_URL) can point at
+    any compatible server, including the stub in benchmarks/stub_llm_server.py.
+    """
+
+    name = "openai"
+    requires_api_key = True
+
+    def __init__(self, *,
+                 api_key: Optional[str] = None,
+                 base_url: Optional[str] = None,
+                 timeout: float = DEFAULT_TIMEOUT,
+                 connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+                 max_connections: int = DEFAULT_MAX_CONNECTIONS,
+                 max_keepalive: int = DEFAULT_MAX_KEEPALIVE,
+                 keepalive_expiry: float = DEFAULT_KEEPALIVE_EXPIRY,
+                 http2: Optional[bool] = None,
+                 max_retries: int = 1):
+        self.api_key = api_key
+        self.base_url = base_url or os.getenv("OPENAI_BASE_URL")
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.max_connections = max_connections
+        self.max_keepalive = max_keepalive
+        self.keepalive_expiry = keepalive_expiry
+        self.http2 = _http2_available() if http2 is None else http2
+        self.max_retries = max_retries
+        self._lock = threading.Lock()
+        self._client = None
+        self._http_client = None
+        self._async_client = None
+        self._async_http_client = None
+
+    def _http_kwargs(self) -> Dict[str, Any]:
+        import httpx
+
+        return {
+            "http2": self.http2,
+            "timeout": httpx.Timeout(self.timeout, connect=self.connect_timeout),
+            "limits": httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive,
+                keepalive_expiry=self.keepalive_expiry,
+            ),
+        }
+
+    def _resolve_api_key(self) -> str:
+        api_key = self.api_key or os.getenv("OPENAI_API_KEY")
+        if not api_key:
+            raise ValueError("OPENAI_API_KEY not found in environment variables.")
+        return api_key
+
+    def _get_client(self):
+        if self._client is not None:
+            return self._client
+        with self._lock:
+            if self._client is None:
+                import httpx
+                from openai import OpenAI
+
+                api_key = self._resolve_api_key()
+                self._http_client = httpx.Client(**self._http_kwargs())
+                self._client = OpenAI(
+                    api_key=api_key,
+                    base_url=self.base_url,
+                    http_client=self._http_client,
+                    max_retries=self.max_retries,
+                )
+        return self._client
+
+    def _get_async_client(self):
+        # One async pool per process; it is bound to the event loop that first
+        # uses it, which under uvicorn is the worker's only loop.
+        if self._async_client is not None:
+            return self._async_client
+        with self._lock:
+            if self._async_client is None:
+                import httpx
+                from openai import AsyncOpenAI
+
+                api_key = self._resolve_api_key()
+                self._async_http_client = httpx.AsyncClient(**self._http_kwargs())
+                self._async_client = AsyncOpenAI(
+                    api_key=api_key,
+                    base_url=self.base_url,
+                    http_client=self._async_http_client,
+                    max_retries=self.max_retries,
+                )
+        return self._async_client
+
+    @staticmethod
+    def _request_kwargs(messages, model, max_tokens, temperature, timeout) -> Dict[str, Any]:
+        kwargs: Dict[str, Any] = {"model": model, "messages": messages, "max_tokens": max_tokens}
+        if temperature is not None:
+            kwargs["temperature"] = temperature
+        if timeout is not None:
+            kwargs["timeout"] = timeout
+        return kwargs
+
+    @staticmethod
+    def _content(response) -> str:
+        if not response.choices:
+            return ""
+        return response.choices[0].message.content or ""
+
+    def chat(self, messages: List[Dict[str, str]], *,
+             model: str,
+             max_tokens: int = 512,
+             temperature: Optional[float] = None,
+             timeout: Optional[float] = None,
+             api_key: Optional[str] = None) -> str:
+        import openai
+
+        client = self._get_client()
+        if api_key and api_key != client.api_key:
+            # shares the underlying connection pool
+            client = client.with_options(api_key=api_key)
+        try:
+            response = client.chat.completions.create(
+                **self._request_kwargs(messages, model, max_tokens, temperature, timeout))
+        except openai.APIStatusError as e:
+            raise LLMError(str(e), status_code=e.status_code) from e
+        except openai.APIError as e:
+            raise LLMError(str(e)) from e
+        return self._content(response)
+
+    async def achat(self, messages: List[Dict[str, str]], *,
+                    model: str,
+                    max_tokens: int = 512,
+                    temperature: Optional[float] = None,
+                    timeout: Optional[float] = None,
+                    api_key: Optional[str] = None) -> str:
+        import openai
+
+        client = self._get_async_client()
+        if api_key and api_key != client.api_key:
+            client = client.with_options(api_key=api_key)
+        try:
+            response = await client.chat.completions.create(
+                **self._request_kwargs(messages, model, max_tokens, temperature, timeout))
+        except openai.APIStatusError as e:
+            raise LLMError(str(e), status_code=e.status_code) from e
+        except openai.APIError as e:
+            raise LLMError(str(e)) from e
+        return self._content(response)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._http_client is not None:
+                self._http_client.close()
+            # the async pool is closed with its event loop
+            self._client = None
+            self._http_client = None
+            self._async_client = None
+            self._async_http_client = None
+
+
+class OllamaBackend(ChatBackend):
+    """
+    Chat against a local Ollama server (or anything speaking its /api/chat API,
+    such as the stub in benchmarks/stub_llm_server.py) through the ollama package.
+
+    keep_alive tells the server how long to keep a model loaded after a request,
+    so steady traffic never pays the model load; warm_up() loads models at
+    startup. max_concurrency caps the requests in flight from this process and
+    should match the server's OLLAMA_NUM_PARALLEL. If model is set it replaces
+    the OpenAI model names callers pass by default (gpt-...); a model chosen by
+    a per-task route (LLM_ROUTE_<TASK>) is sent as it is. A per-call timeout
+    gets its own client, since the ollama client sets timeouts per client.
+    """
+
+    name = "ollama"
+
+    def __init__(self, *,
+                 host: Optional[str] = None,
+                 model: Optional[str] = None,
+                 keep_alive: Optional[str] = None,
+                 timeout: float = DEFAULT_TIMEOUT,
+                 max_concurrency: Optional[int] = None):
+        self.host = host or os.getenv("OLLAMA_HOST", "http://127.0.0.1:11434")
+        self.model = model or os.getenv("OLLAMA_MODEL") or None
+        self.keep_alive = keep_alive or os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency or int(os.getenv("OLLAMA_MAX_CONCURRENCY", "4"))
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+        self._async_slots = None
+        # timeout -> client
+        self._clients: Dict[float, Any] = {}
+        self._async_clients: Dict[float, Any] = {}
+
+    def _get_client(self, timeout: Optional[float] = None):
+        timeout = timeout or self.timeout
+        client = self._clients.get(timeout)
+        if client is not None:
+            return client
+        with self._lock:
+            if timeout not in self._clients:
+                import ollama
+
+                self._clients[timeout] = ollama.Client(host=self.host, timeout=timeout)
+            return self._clients[timeout]
+
+    def _get_async_client(self, timeout: Optional[float] = None):
+        # bound to the event loop that first uses it, as with OpenAIBackend
+        timeout = timeout or self.timeout
+        client = self._async_clients.get(timeout)
+        if client is not None:
+            return client
+        with self._lock:
+            if timeout not in self._async_clients:
+                import ollama
+
+                self._async_clients[timeout] = ollama.AsyncClient(host=self.host, timeout=timeout)
+                if self._async_slots is None:
+                    self._async_slots = asyncio.Semaphore(self.max_concurrency)
+            return self._async_clients[timeout]
+
+    def _model(self, model: str) -> str:
+        # OLLAMA_MODEL stands in for the OpenAI defaults, not for a routed model
+        return self.model if self.model and (not model or model.startswith(_OPENAI_MODEL_PREFIXES)) else model
+
+    def _request_kwargs(self, messages, model, max_tokens, temperature) -> Dict[str, Any]:
+        options: Dict[str, Any] = {"num_predict": max_tokens}
+        if temperature is not None:
+            options["temperature"] = temperature
+        return {"model": self._model(model), "messages": messages, "options": options,
+                "keep_alive": self.keep_alive, "stream": False}
+
+    @staticmethod
+    def _error(e: Exception) -> LLMError:
+        return LLMError(str(e), status_code=getattr(e, "status_code", None))
+
+    @staticmethod
+    def _content(response) -> str:
+        return (response["message"]["content"] if response else "") or ""
+
+    def chat(self, messages: List[Dict[str, str]], *,
+             model: str,
+             max_tokens: int = 512,
+             temperature: Optional[float] = None,
+             timeout: Optional[float] = None,
+             api_key: Optional[str] = None) -> str:
+        # api_key is not used by Ollama
+        import httpx
+        import ollama
+
+        client = self._get_client(timeout)
+        with self._slots:
+            try:
+                response = client.chat(**self._request_kwargs(messages, model, max_tokens, temperature))
+            except (ollama.ResponseError, ConnectionError, httpx.HTTPError) as e:
+                raise self._error(e) from e
+        return self._content(response)
+
+    async def achat(self, messages: List[Dict[str, str]], *,
+                    model: str,
+                    max_tokens: int = 512,
+                    temperature: Optional[float] = None,
+                    timeout: Optional[float] = None,
+                    api_key: Optional[str] = None) -> str:
+        import httpx
+        import ollama
+
+        client = self._get_async_client(timeout)
+        async with self._async_slots:
+            try:
+                response = await client.chat(**self._request_kwargs(messages, model, max_tokens, temperature))
+            except (ollama.ResponseError, ConnectionError, httpx.HTTPError) as e:
+                raise self._error(e) from e
+        return self._content(response)
+
+    def warm_up(self, models: List[str]) -> None:
+        # A chat request without messages loads the model and returns at once.
+        import httpx
+        import ollama
+
+        client = self._get_client()
+        for model in dict.fromkeys(self._model(m) for m in models):
+            try:
+                client.chat(model=model, messages=[], keep_alive=self.keep_alive)
+            except (ollama.ResponseError, ConnectionError, httpx.HTTPError) as e:
+                raise self._error(e) from e
+
+    def close(self) -> None:
+        with self._lock:
+            # the ollama client does not expose close(); shut its httpx pools directly
+            for client in self._clients.values():
+                http_client = getattr(client, "_client", None)
+                if http_client is not None:
+                    http_client.close()
+            self._clients.clear()
+            self._async_clients.clear()
+            self._async_slots = None
+
+
+_BACKEND_FACTORIES: Dict[str, Callable[[], ChatBackend]] = {
+    "openai": OpenAIBackend,
+    "ollama": OllamaBackend,
+}
+_backends: Dict[str, ChatBackend] = {}
+_backends_lock = threading.Lock()
+
+
+def register_backend(name: str, factory: Callable[[], ChatBackend]) -> None:
+    """
+    Make a backend selectable by name (get_backend(name) or LLM_BACKEND=name).
+    """
+    _BACKEND_FACTORIES[name] = factory
+
+
+def get_backend(name: Optional[str] = None) -> ChatBackend:
+    """
+    Return the process-wide backend instance, creating it on first use.
+    """
+    name = name or os.getenv("LLM_BACKEND", "openai")
+    backend = _backends.get(name)
+    if backend is not None:
+        return backend
+    with _backends_lock:
+        backend = _backends.get(name)
+        if backend is None:
+            if name not in _BACKEND_FACTORIES:
+                raise ValueError(f"Unknown LLM backend '{name}'. Known: {sorted(_BACKEND_FACTORIES)}")
+            backend = _BACKEND_FACTORIES[name]()
+            _backends[name] = backend
+        return backend
+
+
+def set_backend(backend: ChatBackend, name: Optional[str] = None) -> None:
+    """
+    Install a backend instance (e.g. one pointed at a stub server), replacing and
+    closing any existing instance under the same name.
+    """
+    name = name or os.getenv("LLM_BACKEND", "openai")
+    with _backends_lock:
+        old = _backends.get(name)
+        _backends[name] = backend
+    if old is not None and old is not backend:
+        old.close()
+
+
+# Per-task routes: task -> (backend name, model). Set in code with set_route() or
+# through LLM_ROUTE_<TASK>="<backend>:<model>", e.g.
+#   LLM_ROUTE_CLASSIFY=ollama:llama3.2:3b   LLM_ROUTE_SQL=openai:gpt-4o
+# Tasks used here: "sql" (db_agent_app), "classify" (customer_classifier),
+# "role_demo" (llm_role).
+_routes: Dict[str, tuple] = {}
+
+
+def _parse_route(value: str) -> tuple:
+    backend, _, model = value.partition(":")
+    if not backend or not model:
+        raise ValueError(f"LLM route must look like '<backend>:<model>', got {value!r}")
+    return backend, model
+
+
+def set_route(task: str, backend: str, model: str) -> None:
+    """
+    Send every chat for task to backend/model, overriding LLM_ROUTE_<TASK>.
+    """
+    _routes[task] = (backend, model)
+
+
+def resolve(task: Optional[str], model: str, backend: Optional[str] = None) -> tuple:
+    """
+    (backend name, model) a chat for task will use. An explicit backend argument
+    wins over the route, and the route over LLM_BACKEND and the caller's model.
+    """
+    if backend is None and task:
+        route = _routes.get(task)
+        if route is None:
+            value = os.getenv(f"LLM_ROUTE_{task.upper()}")
+            route = _parse_route(value) if value else None
+        if route is not None:
+            return route
+    return backend or os.getenv("LLM_BACKEND", "openai"), model
+
+
+def needs_api_key(task: Optional[str] = None) -> bool:
+    """
+    Whether chats for task go to a backend that needs an OpenAI API key, so
+    callers only insist on OPENAI_API_KEY when it is actually used.
+    """
+    name, _ = resolve(task, "")
+    factory = _BACKEND_FACTORIES.get(name)
+    backend = _backends.get(name) or factory
+    return bool(getattr(backend, "requires_api_key", True))
+
+
+def chat(messages: List[Dict[str, str]], *,
+         model: str,
+         backend: Optional[str] = None,
+         task: Optional[str] = None,
+         **kwargs) -> str:
+    """
+    Send a chat completion through the shared backend and return the assistant text.
+    task selects a per-task route (see set_route). Raises LLMError on
+    transport/API failures.
+    """
+    name, model = resolve(task, model, backend)
+    return get_backend(name).chat(messages, model=model, **kwargs)
+
+
+async def achat(messages: List[Dict[str, str]], *,
+                model: str,
+                backend: Optional[str] = None,
+                task: Optional[str] = None,
+                **kwargs) -> str:
+    """
+    Awaitable chat() for async request handlers.
+    """
+    name, model = resolve(task, model, backend)
+    return await get_backend(name).achat(messages, model=model, **kwargs)
+
+
+def warm_up(tasks: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """
+    Load the models of local backends before the first request. tasks maps task
+    name to the model its caller would use by default. Returns
+    {task: "<backend>:<model>"} for what was warmed; failures are reported as
+    "error: ..." instead of raised, so a cold server never blocks startup.
+    """
+    warmed: Dict[str, str] = {}
+    for task, default_model in (tasks or {}).items():
+        name, model = resolve(task, default_model)
+        try:
+            get_backend(name).warm_up([model])
+            warmed[task] = f"{name}:{model}"
+        except (LLMError, ValueError, ImportError) as e:
+            warmed[task] = f"error: {e}"
+    return warmed
+
+
+def close_all() -> None:
+    with _backends_lock:
+        for backend in _backends.values():
+            backend.close()
+        _backends.clear()
@@ -1,8 +1,13 @@
 import os
 import json
-import requests
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
 from typing import List, Dict, Any, Optional
-from requests.exceptions import RequestException
+import llm_client
+
+# Seconds allowed for the backoff before each retry of the LLM client (the
+# OpenAI SDK waits under a second before its first retry).
+RETRY_BACKOFF = 1.0
 
 def _call_chat_api(messages: List[Dict[str, str]], *,
                    model: str = "gpt-3.5-turbo",
@@ -14,66 +19,115 @@ def _call_chat_api(messages: List[Dict[str, str]], *,
     Returns empty string on failure.
     """
     api_key = api_key or os.getenv("OPENAI_API_KEY")
-    if not api_key:
+    if not api_key and llm_client.needs_api_key("role_demo"):
         return "ERROR: OPENAI_API_KEY not provided"
 
-    url = "https://api.openai.com/v1/chat/completions"
-    headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
-    payload = {"model": model, "messages": messages, "max_tokens": 512, "temperature": 0.0}
     try:
-        resp = requests.post(url, headers=headers, json=payload, timeout=timeout)
-        resp.raise_for_status()
-        j = resp.json()
-        choice = (j.get("choices") or [None])[0]
-        if isinstance(choice, dict):
-            return choice.get("message", {}).get("content", "") or ""
-        return ""
-    except RequestException as e:
+        return llm_client.chat(messages, model=model, task="role_demo", max_tokens=512, temperature=0.0,
+                               timeout=timeout, api_key=api_key)
+    except llm_client.LLMError as e:
         return f"ERROR: API request failed: {e}"
 
+# Default system prompts for demo_system_role_effects; None means no system message.
+DEFAULT_SYSTEM_SCENARIOS: Dict[str, Optional[str]] = {
+    "no_system": None,
+    "helpful_system": "You are a helpful assistant. Answer concisely.",
+    "strict_system": "You are a strict assistant. Respond ONLY with a JSON object: {\"answer\": <string>, \"note\": <string>} and no other text.",
+    "chaos_system": "You are a clown. Describe the prompt in a humorous way.",
+    "shakespear_system": "You are a philosopher. Answer in a thoughtful and profound manner.",
+}
+
+def build_scenarios(user_prompt: str,
+                    system_prompts: Dict[str, Optional[str]]) -> Dict[str, List[Dict[str, str]]]:
+    """
+    Turn a mapping of scenario name -> system prompt into chat message lists.
+    """
+    scenarios: Dict[str, List[Dict[str, str]]] = {}
+    for name, system in system_prompts.items():
+        messages = [{"role": "system", "content": system}] if system else []
+        messages.append({"role": "user", "content": user_prompt})
+        scenarios[name] = messages
+    return scenarios
+
+def run_scenarios(scenarios: Dict[str, List[Dict[str, str]]], *,
+                  api_key: Optional[str] = None,
+                  model: str = "gpt-3.5-turbo",
+                  max_concurrency: int = 5,
+                  timeout: float = 10.0) -> Dict[str, Any]:
+    """
+    Send every scenario to the LLM, up to max_concurrency at a time.
+
+    timeout applies to each scenario's request. A scenario that fails or times out
+    does not affect the others: its "assistant" value is an "ERROR: ..." string,
+    as with _call_chat_api. Results keep the order of the input mapping.
+    """
+    results: Dict[str, Any] = {}
+    if max_concurrency <= 1 or len(scenarios) <= 1:
+        for name, messages in scenarios.items():
+            try:
+                content = _call_chat_api(messages, model=model, api_key=api_key, timeout=timeout)
+            except Exception as e:
+                content = f"ERROR: {e}"
+            results[name] = {"messages": messages, "assistant": content}
+        return results
+
+    workers = min(max_concurrency, len(scenarios))
+    # Each request is bounded by timeout at the HTTP layer; the overall wait is a
+    # backstop for calls that hang past it, sized for the number of waves and for
+    # the client's retries, so a scenario answered on its retry is not cut off.
+    try:
+        retries = getattr(llm_client.get_backend(llm_client.resolve("role_demo", model)[0]), "max_retries", 0)
+    except ValueError:
+        retries = 0  # unknown backend: every call fails at once
+    per_call = timeout * (1 + retries) + RETRY_BACKOFF * retries
+    waves = -(-len(scenarios) // workers)
+    deadline = time.monotonic() + per_call * waves + 1.0
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="llm-role")
+    try:
+        futures = {
+            name: pool.submit(_call_chat_api, messages, model=model, api_key=api_key, timeout=timeout)
+            for name, messages in scenarios.items()
+        }
+        for name, fut in futures.items():
+            try:
+                content = fut.result(timeout=max(0.0, deadline - time.monotonic()))
+            except FutureTimeout:
+                fut.cancel()
+                content = f"ERROR: scenario timed out after {timeout}s"
+            except Exception as e:
+                content = f"ERROR: {e}"
+            results[name] = {"messages": scenarios[name], "assistant": content}
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+    return results
+
 def demo_system_role_effects(user_prompt: str, *,
                              api_key: Optional[str] = None,
-                             model: str = "gpt-3.5-turbo") -> str:
+                             model: str = "gpt-3.5-turbo",
+                             system_prompts: Optional[Dict[str, Optional[str]]] = None,
+                             max_concurrency: int = 5,
+                             timeout: float = 10.0) -> str:
     """
     Demonstrate how different system role messages affect the LLM output.
 
-    The function sends the same user prompt in three scenarios:
+    By default the function sends the same user prompt in five scenarios:
       - no_system: user message only
       - helpful_system: system instructs to be a helpful concise assistant
       - strict_system: system enforces a strict JSON-only response
+      - chaos_system: system asks for a humorous description
+      - shakespear_system: system asks for a thoughtful, profound answer
+
+    Pass system_prompts (name -> system prompt, None for no system message) to
+    run any number of custom scenarios instead. Scenarios run concurrently, up
+    to max_concurrency at a time; max_concurrency=1 runs them one by one.
 
     Returns:
-        str: JSON string containing the three assistant responses under keys:
-             no_system, helpful_system, strict_system
+        str: JSON string mapping each scenario name to
+             {"messages": [...], "assistant": <content or "ERROR: ...">}
     """
-    scenarios = {
-        "no_system": [
-            {"role": "user", "content": user_prompt}
-        ],
-        "helpful_system": [
-            {"role": "system", "content": "You are a helpful assistant. Answer concisely."},
-            {"role": "user", "content": user_prompt}
-        ],
-        "strict_system": [
-            {"role": "system", "content": "You are a strict assistant. Respond ONLY with a JSON object: {\"answer\": <string>, \"note\": <string>} and no other text."},
-            {"role": "user", "content": user_prompt}
-        ],
-        "chaos_system": [
-            {"role": "system", "content": "You are a clown. Describe the prompt in a humorous way."},
-            {"role": "user", "content": user_prompt}
-        ],
-        "shakespear_system": [
-            {"role": "system", "content": "You are a philosopher. Answer in a thoughtful and profound manner."},
-            {"role": "user", "content": user_prompt}
-        ]
-    }
-
-    results: Dict[str, Any] = {}
-    for name, messages in scenarios.items():
-        # call API; prefer provided api_key if given
-        content = _call_chat_api(messages, model=model, api_key=api_key)
-        results[name] = {"messages": messages, "assistant": content}
-
+    scenarios = build_scenarios(user_prompt, system_prompts or DEFAULT_SYSTEM_SCENARIOS)
+    results = run_scenarios(scenarios, api_key=api_key, model=model,
+                            max_concurrency=max_concurrency, timeout=timeout)
     return json.dumps(results, indent=2, ensure_ascii=False)
 
 # Example usage (run as script):
@@ -0,0 +1,174 @@
+"""
+Export of AMLcase / AMLevent to partitioned Parquet for the DuckDB backend
+(storage_backends).
+
+All tables are read from one SQLite snapshot, staged as CSV and written by
+DuckDB's COPY as zstd-compressed Parquet, sorted by create_date and split into
+Hive-style partitions on its year (or month):
+
+    parquet/
+      manifest.json
+      g1760000000000000000/AMLcase/year=2024/data_0.parquet
+      g1760000000000000000/AMLevent/year=2024/data_0.parquet
+
+Every column is exported as VARCHAR, which is what SQLite compares them as.
+Each export goes to a new generation directory; manifest.json, replaced
+atomically once the export is complete, names the generation along with the
+data version of every table at the snapshot, which is how the backend tells
+whether the export is still current. The generation before is kept for
+queries still reading it, older ones are removed.
+
+    python parquet_export.py [--db sample_data.db] [--out parquet] [--partition-by year|month|none]
+"""
+import argparse
+import csv
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Sequence
+from urllib.parse import quote
+
+from change_tracking import table_versions
+from db_schema import DB_PATH, get_schema_version
+from storage_backends import MANIFEST_NAME, PARQUET_DIR, duckdb, read_manifest
+
+EXPORT_TABLES = ("AMLcase", "AMLevent")
+# Partition key expressions over create_date.
+PARTITIONS = {"year": "substr(create_date, 1, 4)", "month": "substr(create_date, 1, 7)", "none": None}
+# Rows per Parquet row group, the unit DuckDB skips by min/max statistics.
+ROW_GROUP_ROWS = int(os.getenv("AML_PARQUET_ROW_GROUP_ROWS", "122880"))
+# Rows fetched from SQLite per round trip while staging.
+FETCH_ROWS = 50_000
+_ERRORS = (OSError, ValueError, RuntimeError, sqlite3.Error) + ((duckdb.Error,) if duckdb is not None else ())
+
+
+def _literal(text: str) -> str:
+    return "'" + text.replace("'", "''") + "'"
+
+
+def _stage(conn: sqlite3.Connection, table: str, columns: List[str], path: str, null: str) -> int:
+    # NULL is written as the null marker, never quoted, and read back with
+    # nullstr = null; every other value, '' included, stays a string
+    rows = 0
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        cur = conn.execute(f"SELECT {', '.join(columns)} FROM {table}")
+        while True:
+            batch = cur.fetchmany(FETCH_ROWS)
+            if not batch:
+                return rows
+            for row in batch:
+                if null in row:
+                    raise ValueError(f"A {table} value equals the staging null marker; export again.")
+                writer.writerow([null if v is None else v for v in row])
+            rows += len(batch)
+
+
+def export_tables(db_path: str = DB_PATH, out_dir: str = PARQUET_DIR, *,
+                  tables: Sequence[str] = EXPORT_TABLES,
+                  partition_by: str = "year",
+                  row_group_rows: int = ROW_GROUP_ROWS,
+                  progress: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+    """
+    Write tables of db_path to a new generation under out_dir and publish it;
+    returns the manifest. Never writes to the database.
+    """
+    if duckdb is None:
+        raise RuntimeError("Parquet export needs the duckdb package (pip install duckdb).")
+    if partition_by not in PARTITIONS:
+        raise ValueError(f"Unknown partitioning {partition_by!r}.")
+    unknown = set(tables) - set(EXPORT_TABLES)
+    if unknown:
+        raise ValueError(f"Table '{sorted(unknown)[0]}' cannot be exported.")
+    os.makedirs(out_dir, exist_ok=True)
+    previous = read_manifest(out_dir)
+    generation = f"g{time.time_ns()}"
+    # random per export, so no stored value can be mistaken for NULL
+    null = f"NULL-{uuid.uuid4().hex}"
+    staging = tempfile.mkdtemp(prefix=".stage-", dir=out_dir)
+    conn = sqlite3.connect(f"file:{quote(os.path.abspath(db_path))}?mode=ro", uri=True, isolation_level=None)
+    duck = duckdb.connect(":memory:")
+    try:
+        # one read transaction: every table and the data versions come from the same snapshot
+        conn.execute("BEGIN")
+        versions = table_versions(conn) or {}
+        manifest: Dict[str, Any] = {
+            "format": 1,
+            "generation": generation,
+            "exported_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "schema_version": get_schema_version(conn),
+            "partition_by": partition_by,
+            "tables": {},
+        }
+        for table in tables:
+            start = time.perf_counter()
+            columns = [r[1] for r in conn.execute(f'PRAGMA table_info("{table}")')]
+            stage = os.path.join(staging, f"{table}.csv")
+            rows = _stage(conn, table, columns, stage, null)
+            target = os.path.join(out_dir, generation, table)
+            os.makedirs(target)
+            key = PARTITIONS[partition_by]
+            select = ", ".join(f'"{c}"' for c in columns) + (f", {key} AS {partition_by}" if key else "")
+            types = ", ".join(f"{_literal(c)}: 'VARCHAR'" for c in columns)
+            options = f"FORMAT PARQUET, COMPRESSION ZSTD, ROW_GROUP_SIZE {int(row_group_rows)}"
+            if key:
+                options += f", PARTITION_BY ({partition_by})"
+            else:
+                target = os.path.join(target, "data_0.parquet")
+            duck.execute(f"COPY (SELECT {select} FROM read_csv({_literal(stage)}, header = false, "
+                         f"columns = {{{types}}}, quote = '\"', escape = '\"', nullstr = {_literal(null)}) "
+                         f"ORDER BY create_date) TO {_literal(target)} ({options})")
+            os.remove(stage)
+            manifest["tables"][table] = {
+                "path": os.path.join(generation, table),
+                "columns": columns,
+                "rows": rows,
+                "data_version": versions.get(table.lower()),
+            }
+            if progress is not None:
+                progress(f"{table}: {rows} rows in {time.perf_counter() - start:.1f}s")
+    except BaseException:
+        shutil.rmtree(os.path.join(out_dir, generation), ignore_errors=True)
+        raise
+    finally:
+        duck.close()
+        conn.close()
+        shutil.rmtree(staging, ignore_errors=True)
+    tmp = os.path.join(out_dir, f".{MANIFEST_NAME}.{generation}")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, os.path.join(out_dir, MANIFEST_NAME))
+    keep = {generation, previous["generation"] if previous else None}
+    for name in os.listdir(out_dir):
+        if name.startswith("g") and name not in keep and os.path.isdir(os.path.join(out_dir, name)):
+            shutil.rmtree(os.path.join(out_dir, name), ignore_errors=True)
+    return manifest
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Export AMLcase / AMLevent to partitioned Parquet.")
+    parser.add_argument("--db", default=DB_PATH, help="database to export")
+    parser.add_argument("--out", default=PARQUET_DIR, help="export directory (AML_PARQUET_DIR)")
+    parser.add_argument("--tables", default=",".join(EXPORT_TABLES), help="comma-separated tables to export")
+    parser.add_argument("--partition-by", choices=list(PARTITIONS), default="year",
+                        help="partition on the year or month of create_date, or not at all")
+    parser.add_argument("--row-group-rows", type=int, default=ROW_GROUP_ROWS, help="rows per Parquet row group")
+    args = parser.parse_args(argv)
+    try:
+        manifest = export_tables(args.db, args.out, tables=[t for t in args.tables.split(",") if t],
+                                 partition_by=args.partition_by, row_group_rows=args.row_group_rows,
+                                 progress=lambda line: print(line, file=sys.stderr))
+    except _ERRORS as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    print(json.dumps(manifest, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,207 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import sys
+import threading
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from db_schema import DB_PATH
+
+logger = logging.getLogger(__name__)
+
+# Operators that let SQLite seek an index on the column (equality), versus ones
+# that can only bound a range scan.
+_EQ_OPS = {"=", "==", "in", "is"}
+_PREDICATE_RE = r"\b(?:\w+\.)?({col})\s*(==|=|<>|!=|<=|>=|<|>|\bIN\b|\bIS\b|\bLIKE\b|\bBETWEEN\b)"
+
+
+def explain(conn: sqlite3.Connection, sql: str, params: tuple = ()) -> List[str]:
+    """
+    Return the detail column of EXPLAIN QUERY PLAN for a statement.
+    """
+    return [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
+
+
+def full_scans(plan: List[str]) -> List[str]:
+    """
+    Tables read with a full table scan ("SCAN t" without an index) in a plan.
+    """
+    tables = []
+    for detail in plan:
+        m = re.match(r"SCAN (\w+)(?: AS \w+)?$", detail.strip())
+        if m:
+            tables.append(m.group(1))
+    return tables
+
+
+def _table_columns(conn: sqlite3.Connection) -> Dict[str, List[str]]:
+    cols: Dict[str, List[str]] = {}
+    tables = conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'"
+    ).fetchall()
+    for (table,) in tables:
+        cols[table] = [r[1] for r in conn.execute(f"PRAGMA table_info({table})")]
+    return cols
+
+
+def _existing_index_prefixes(conn: sqlite3.Connection, table: str) -> List[Tuple[str, ...]]:
+    prefixes = []
+    for idx in conn.execute(f"PRAGMA index_list({table})").fetchall():
+        cols = tuple(r[2].lower() for r in conn.execute(f"PRAGMA index_info({idx[1]})") if r[2])
+        prefixes.append(cols)
+    return prefixes
+
+
+def predicate_columns(sql: str, columns: List[str]) -> Tuple[List[str], List[str]]:
+    """
+    Split the columns a statement filters on into equality and range predicates.
+    """
+    eq: List[str] = []
+    rng: List[str] = []
+    for col in columns:
+        for m in re.finditer(_PREDICATE_RE.format(col=re.escape(col)), sql, flags=re.IGNORECASE):
+            op = m.group(2).lower()
+            if op == "like" and sql[m.end():].lstrip().startswith("'%"):
+                continue  # leading wildcard: no index can help
+            target = eq if op in _EQ_OPS else rng
+            if col not in target:
+                target.append(col)
+    rng = [c for c in rng if c not in eq]
+    return eq, rng
+
+
+class QueryAdvisor:
+    """
+    Explains every statement it is shown, logs full table scans and aggregates
+    the filter columns of scanning statements into index suggestions.
+
+    What a statement scans is remembered by the hash of its text, so a repeated
+    statement costs a dict lookup and its scan is logged only the first time.
+    """
+
+    def __init__(self, *, replay_log: Optional[str] = None, max_cached_plans: int = 1024):
+        self.replay_log = replay_log
+        self.max_cached_plans = max_cached_plans
+        self._lock = threading.Lock()
+        # statement hash -> (tables scanned fully, index candidates)
+        self._seen: Dict[str, Tuple[List[str], List[Tuple[str, Tuple[str, ...], Optional[str]]]]] = {}
+        self._columns: Optional[Dict[str, List[str]]] = None
+        # (table, eq columns, range column) -> times seen in a scanning statement
+        self._candidates: Counter = Counter()
+        self.statements = 0
+        self.scans = 0
+
+    def observe(self, conn: sqlite3.Connection, sql: str, params: tuple = (), *, guard=None) -> List[str]:
+        """
+        Record one statement, which the caller has already validated. Returns
+        the tables it scans fully (usually empty). With a query_guard.QueryGuard
+        the plan comes from the guard's cache instead of another EXPLAIN.
+        """
+        key = hashlib.sha1(sql.encode("utf-8")).hexdigest()
+        with self._lock:
+            self.statements += 1
+            seen = self._seen.get(key)
+        if seen is None:
+            try:
+                if guard is not None:
+                    plan = [detail for _, detail in guard.plan(conn, sql, params)]
+                else:
+                    plan = explain(conn, sql, params)
+            except sqlite3.Error:
+                return []
+            scanned = full_scans(plan)
+            candidates = []
+            if scanned:
+                if self._columns is None:
+                    self._columns = _table_columns(conn)
+                for table in scanned:
+                    eq, rng = predicate_columns(sql, self._columns.get(table, []))
+                    if eq or rng:
+                        candidates.append((table, tuple(eq), rng[0] if rng else None))
+                logger.warning("full table scan on %s: %s", ", ".join(scanned), sql)
+            seen = (scanned, candidates)
+            with self._lock:
+                if len(self._seen) >= self.max_cached_plans:
+                    self._seen.pop(next(iter(self._seen)))
+                self._seen[key] = seen
+            if self.replay_log:
+                with open(self.replay_log, "a", encoding="utf-8") as f:
+                    f.write(json.dumps({"sql": sql}) + "\n")
+        scanned, candidates = seen
+        if scanned:
+            with self._lock:
+                self.scans += 1
+                self._candidates.update(candidates)
+        return scanned
+
+    def suggest_indexes(self, conn: sqlite3.Connection, *, min_count: int = 1) -> List[Dict[str, Any]]:
+        """
+        CREATE INDEX suggestions for the observed workload, most frequent first.
+        Candidates already covered by the prefix of an existing index are skipped.
+        """
+        with self._lock:
+            candidates = self._candidates.most_common()
+        out = []
+        seen = set()
+        for (table, eq, rng), count in candidates:
+            if count < min_count:
+                continue
+            cols = tuple(eq) + ((rng,) if rng else ())
+            key = (table, tuple(c.lower() for c in cols))
+            if key in seen:
+                continue
+            seen.add(key)
+            if any(prefix[:len(cols)] == key[1] for prefix in _existing_index_prefixes(conn, table)):
+                continue
+            name = "idx_" + table.lower() + "_" + "_".join(c.lower() for c in cols)
+            out.append({
+                "table": table,
+                "columns": list(cols),
+                "count": count,
+                "sql": f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({', '.join(cols)})",
+            })
+        return out
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"statements": self.statements, "full_scans": self.scans,
+                    "cached_plans": len(self._seen)}
+
+
+def replay(path: str, db_path: str = DB_PATH) -> Dict[str, Any]:
+    """
+    Run the advisor offline over a replay file of past statements, one per line
+    either as JSON ({"sql": ...}) or as raw SQL.
+    """
+    advisor = QueryAdvisor()
+    conn = sqlite3.connect(db_path)
+    try:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                sql = json.loads(line)["sql"] if line.startswith("{") else line
+                advisor.observe(conn, sql)
+        return {"stats": advisor.stats(), "suggestions": advisor.suggest_indexes(conn)}
+    finally:
+        conn.close()
+
+
+# Process-wide advisor used by db_agent_app for LLM-generated statements. Set
+# AML_QUERY_REPLAY_LOG to also append each new statement to a replay file.
+default_advisor = QueryAdvisor(replay_log=os.getenv("AML_QUERY_REPLAY_LOG"))
+
+
+if __name__ == "__main__":
+    # Usage: python query_advisor.py <replay_file> [db_path]
+    if len(sys.argv) < 2:
+        print("Usage: python query_advisor.py <replay_file> [db_path]")
+        sys.exit(1)
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s %(message)s")
+    report = replay(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else DB_PATH)
+    print(json.dumps(report, indent=2))
@@ -0,0 +1,250 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from change_tracking import table_versions
+from db_pool import get_pool
+from db_schema import DB_PATH, LATEST_VERSION
+
+
+def normalize_prompt(prompt: str) -> str:
+    """
+    Canonical form of a natural-language prompt for cache lookups: lower-cased,
+    trailing punctuation dropped and whitespace collapsed, so "Open cases in India?"
+    and "open cases  in india" share an entry.
+    """
+    p = prompt.strip().lower()
+    p = re.sub(r"[?!.;,\s]+$", "", p)
+    return re.sub(r"\s+", " ", p)
+
+
+def _read_table_versions(db_path: str) -> Optional[Dict[str, int]]:
+    with get_pool(db_path).connection() as conn:
+        return table_versions(conn)
+
+
+def file_data_version(db_path: str = DB_PATH) -> str:
+    """
+    Data version derived from the size and mtime of the database and its WAL file.
+    Any committed write changes it; reading costs two stat calls.
+    """
+    parts = []
+    for path in (db_path, db_path + "-wal"):
+        try:
+            st = os.stat(path)
+            parts.append(f"{st.st_size}:{st.st_mtime_ns}")
+        except OSError:
+            parts.append("-")
+    return "|".join(parts)
+
+
+class _DiskStore:
+    """
+    SQLite-backed persistence for cache entries, so a restart starts warm.
+    """
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+        CREATE TABLE IF NOT EXISTS cache_entry (
+            namespace  TEXT NOT NULL,
+            key        TEXT NOT NULL,
+            value      TEXT NOT NULL,
+            expires_at REAL NOT NULL,
+            PRIMARY KEY (namespace, key)
+        )
+        """)
+
+    def get(self, namespace: str, key: str) -> Optional[Tuple[str, float]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM cache_entry WHERE namespace = ? AND key = ?",
+                (namespace, key),
+            ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def set(self, namespace: str, key: str, value: str, expires_at: float) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache_entry (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                (namespace, key, value, expires_at),
+            )
+
+    def delete_namespace(self, namespace: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM cache_entry WHERE namespace = ?", (namespace,))
+
+    def purge_expired(self) -> int:
+        with self._lock:
+            cur = self._conn.execute("DELETE FROM cache_entry WHERE expires_at < ?", (time.time(),))
+            return cur.rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class LRUTTLCache:
+    """
+    Thread-safe string cache with LRU eviction, a per-entry TTL and an optional
+    on-disk backing store. Memory misses fall through to disk and are promoted.
+    """
+
+    def __init__(self, namespace: str, *,
+                 max_entries: int = 1024,
+                 ttl: float = 3600.0,
+                 store: Optional[_DiskStore] = None):
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.store = store
+        self._lock = threading.Lock()
+        self._data: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._counters = {"hits": 0, "disk_hits": 0, "misses": 0,
+                          "evictions": 0, "expirations": 0, "invalidations": 0}
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                if entry[1] > now:
+                    self._data.move_to_end(key)
+                    self._counters["hits"] += 1
+                    return entry[0]
+                del self._data[key]
+                self._counters["expirations"] += 1
+        if self.store is not None:
+            stored = self.store.get(self.namespace, key)
+            if stored is not None and stored[1] > now:
+                with self._lock:
+                    self._insert(key, stored[0], stored[1])
+                    self._counters["disk_hits"] += 1
+                return stored[0]
+        with self._lock:
+            self._counters["misses"] += 1
+        return None
+
+    def _insert(self, key: str, value: str, expires_at: float) -> None:
+        # caller holds self._lock
+        self._data[key] = (value, expires_at)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+            self._counters["evictions"] += 1
+
+    def set(self, key: str, value: str) -> None:
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._insert(key, value, expires_at)
+        if self.store is not None:
+            self.store.set(self.namespace, key, value, expires_at)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._counters["invalidations"] += 1
+        if self.store is not None:
+            self.store.delete_namespace(self.namespace)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            out = dict(self._counters)
+            out["entries"] = len(self._data)
+            return out
+
+
+def _hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class PromptCache:
+    """
+    Two-tier cache for get_user_prompt.
+
+    Tier 1 maps a normalized prompt to the SQL the LLM generated for it, so a
+    repeated question skips the LLM round trip. Tier 2 maps SQL plus the data
+    versions of the tables it reads to the result JSON, so a change to AMLevent
+    leaves cached AMLcase results valid. Tables without a data version (and
+    databases without change tracking) fall back to the file data version,
+    which any write moves.
+    """
+
+    def __init__(self, *,
+                 db_path: str = DB_PATH,
+                 store_path: Optional[str] = None,
+                 sql_max_entries: int = 4096,
+                 sql_ttl: float = 24 * 3600.0,
+                 result_max_entries: int = 1024,
+                 result_ttl: float = 600.0,
+                 data_version_fn: Optional[Callable[[], str]] = None,
+                 table_versions_fn: Optional[Callable[[], Optional[Dict[str, int]]]] = None):
+        store = _DiskStore(store_path) if store_path else None
+        # The schema version is part of the SQL namespace: a migration can make
+        # previously generated SQL invalid.
+        self.sql = LRUTTLCache(f"sql:v{LATEST_VERSION}", max_entries=sql_max_entries,
+                               ttl=sql_ttl, store=store)
+        self.results = LRUTTLCache("result", max_entries=result_max_entries,
+                                   ttl=result_ttl, store=store)
+        self._data_version_fn = data_version_fn or (lambda: file_data_version(db_path))
+        self._table_versions_fn = table_versions_fn or (lambda: _read_table_versions(db_path))
+        self._data_version: Optional[str] = None
+        self._table_versions: Optional[Dict[str, int]] = None
+        self._version_lock = threading.Lock()
+
+    def data_version(self) -> str:
+        """
+        Current file data version. When it has moved on, the per-table versions
+        are re-read; without them the result tier is cleared as a whole.
+        """
+        version = self._data_version_fn()
+        with self._version_lock:
+            if version != self._data_version:
+                self._table_versions = self._table_versions_fn()
+                if self._data_version is not None and self._table_versions is None:
+                    self.results.clear()
+            self._data_version = version
+        return version
+
+    def result_version(self, tables: Optional[Iterable[str]] = None) -> str:
+        """
+        Version key for a result that reads tables (lower-cased names): their
+        data versions, so only writes to those tables change it. None (tables
+        unknown) uses the file data version.
+        """
+        version = self.data_version()
+        with self._version_lock:
+            versions = self._table_versions
+        if versions is None or tables is None:
+            return version
+        return ",".join(f"{t}:{versions[t]}" if t in versions else f"{t}@{version}" for t in sorted(tables))
+
+    def get_sql(self, prompt: str) -> Optional[str]:
+        return self.sql.get(_hash(normalize_prompt(prompt)))
+
+    def set_sql(self, prompt: str, sql: str) -> None:
+        self.sql.set(_hash(normalize_prompt(prompt)), sql)
+
+    def get_result(self, sql: str, data_version: str) -> Optional[str]:
+        return self.results.get(_hash(data_version + "\0" + sql))
+
+    def set_result(self, sql: str, data_version: str, result_json: str) -> None:
+        self.results.set(_hash(data_version + "\0" + sql), result_json)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"sql": self.sql.stats(), "results": self.results.stats()}
+
+
+# Process-wide cache used by db_agent_app.get_user_prompt. AML_CACHE_PATH enables
+# the on-disk store; AML_CACHE_DISABLED=1 turns caching off.
+default_cache: Optional[PromptCache] = None
+if os.getenv("AML_CACHE_DISABLED") != "1":
+    default_cache = PromptCache(store_path=os.getenv("AML_CACHE_PATH"))
@@ -0,0 +1,274 @@
+"""
+Resource limits for generated SQL.
+
+Before a statement runs, its EXPLAIN QUERY PLAN is turned into a rough count
+of row visits (full scans cost the table's row count, nested loops multiply)
+and statements that would scan without bound, such as cartesian products of
+large tables or recursive CTEs with no LIMIT, are rejected. While it runs, the
+connection's progress handler enforces a wall-clock deadline, and at most
+max_rows rows are fetched; the result is then flagged as truncated.
+"""
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from sql_validator import Token, tokenize
+
+# Defaults for the process-wide guard; 0 turns the limit off.
+MAX_QUERY_SECONDS = float(os.getenv("AML_SQL_TIMEOUT", "5"))
+MAX_RESULT_ROWS = int(os.getenv("AML_SQL_MAX_ROWS", "10000"))
+MAX_QUERY_COST = float(os.getenv("AML_SQL_MAX_COST", "50000000"))
+# SQLite VM instructions between two deadline checks.
+PROGRESS_INTERVAL = 10_000
+# Seconds a table's row-count estimate is reused.
+ROW_ESTIMATE_TTL = 60.0
+# Rows assumed per lookup for an index search on equality.
+SEARCH_ROWS = 10
+
+_LOOP_RE = re.compile(r"(SCAN|SEARCH) (?:TABLE )?(\w+)(?: AS (\w+))?(.*)$")
+_ALIAS_RE = re.compile(r"\b(?:FROM|JOIN|,)\s*([A-Za-z_]\w*)\s+(?:AS\s+)?([A-Za-z_]\w*)", re.IGNORECASE)
+
+
+class QueryRejected(ValueError):
+    """Raised when the guard refuses to run a statement or stops it."""
+
+
+def _closing(tokens: List[Token], i: int) -> int:
+    # index of the ")" matching the "(" at tokens[i]
+    depth = 0
+    for j in range(i, len(tokens)):
+        if tokens[j] == ("op", "("):
+            depth += 1
+        elif tokens[j] == ("op", ")"):
+            depth -= 1
+            if depth == 0:
+                return j
+    return len(tokens)
+
+
+def _has_limit(tokens: List[Token], i: int) -> bool:
+    # whether the query from tokens[i] to the end of its parentheses has its own LIMIT
+    depth = 0
+    for token in tokens[i:]:
+        if token == ("op", "("):
+            depth += 1
+        elif token == ("op", ")"):
+            depth -= 1
+            if depth < 0:
+                return False
+        elif depth == 0 and token.kind == "word" and token.value.upper() == "LIMIT":
+            return True
+    return False
+
+
+def _recursion_bounded(sql: str) -> bool:
+    """
+    Whether every recursive CTE of sql has a LIMIT in its own body or in the
+    query that reads it, rather than only in some unrelated subquery.
+    """
+    try:
+        tokens = tokenize(sql)
+    except ValueError:
+        return False
+    for i, token in enumerate(tokens[:-1]):
+        if not (token.kind == "word" and token.value.upper() == "WITH"
+                and tokens[i + 1].value.upper() == "RECURSIVE"):
+            continue
+        unbounded = []
+        j = i + 2
+        while j < len(tokens) and tokens[j].kind in ("word", "quoted"):
+            name = tokens[j].value.lower()
+            j += 1
+            if j < len(tokens) and tokens[j] == ("op", "("):
+                j = _closing(tokens, j) + 1  # column list
+            while j < len(tokens) and tokens[j].value.upper() in ("AS", "NOT", "MATERIALIZED"):
+                j += 1
+            if j >= len(tokens) or tokens[j] != ("op", "("):
+                return False
+            end = _closing(tokens, j)
+            body = tokens[j + 1:end]
+            if any(t.kind in ("word", "quoted") and t.value.lower() == name for t in body) \
+                    and not _has_limit(body, 0):
+                unbounded.append(name)
+            j = end + 1
+            if j < len(tokens) and tokens[j] == ("op", ","):
+                j += 1
+                continue
+            break
+        if unbounded and not _has_limit(tokens, j):
+            return False
+    return True
+
+
+def _table_aliases(sql: str) -> Dict[str, str]:
+    # "FROM AMLcase a, AMLcase b" -> {"a": "AMLcase", "b": "AMLcase"}; newer
+    # SQLite versions name only the alias in the plan.
+    return {m.group(2).lower(): m.group(1) for m in _ALIAS_RE.finditer(sql)}
+
+
+class QueryGuard:
+    """
+    Cost check, deadline and row cap for statements run through execute().
+
+    Plans are cached by statement text and row counts per table for
+    ROW_ESTIMATE_TTL seconds, so the check on a repeated statement costs a
+    dict lookup and a few multiplications.
+    """
+
+    def __init__(self, *, timeout: float = MAX_QUERY_SECONDS,
+                 max_rows: int = MAX_RESULT_ROWS,
+                 max_cost: float = MAX_QUERY_COST,
+                 max_cached_plans: int = 1024):
+        self.timeout = timeout
+        self.max_rows = max_rows
+        self.max_cost = max_cost
+        self.max_cached_plans = max_cached_plans
+        self._lock = threading.Lock()
+        self._plans: Dict[str, List[Tuple[int, str]]] = {}
+        self._rows: Dict[Tuple[str, str], Tuple[float, Optional[int]]] = {}
+        self._counters = {"checked": 0, "rejected": 0, "timeouts": 0, "truncated": 0}
+
+    def plan(self, conn: sqlite3.Connection, sql: str, params: tuple = ()) -> List[Tuple[int, str]]:
+        """
+        (parent id, detail) rows of EXPLAIN QUERY PLAN for sql, cached by
+        statement text; query_advisor reads the same plan from here.
+        """
+        with self._lock:
+            plan = self._plans.get(sql)
+        if plan is None:
+            plan = [(row[1], row[3]) for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
+            with self._lock:
+                if len(self._plans) >= self.max_cached_plans:
+                    self._plans.pop(next(iter(self._plans)))
+                self._plans[sql] = plan
+        return plan
+
+    def _table_rows(self, conn: sqlite3.Connection, name: str) -> Optional[int]:
+        """
+        Approximate row count of a table, or None when name is not a table (a
+        CTE or subquery, whose own rows are costed where it is built).
+        """
+        db_file = conn.execute("PRAGMA database_list").fetchone()[2]
+        key = (db_file, name.lower())
+        now = time.monotonic()
+        with self._lock:
+            cached = self._rows.get(key)
+        if cached is not None and cached[0] > now:
+            return cached[1]
+        if conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ? COLLATE NOCASE",
+                        (name,)).fetchone() is None:
+            rows = None
+        else:
+            try:
+                # the largest rowid is one B-tree descent, and exact until rows are deleted
+                rows = conn.execute(f'SELECT MAX(rowid) FROM "{name}"').fetchone()[0] or 0
+            except sqlite3.OperationalError:  # WITHOUT ROWID table
+                rows = conn.execute(f'SELECT COUNT(*) FROM "{name}"').fetchone()[0]
+        with self._lock:
+            self._rows[key] = (now + ROW_ESTIMATE_TTL, rows)
+        return rows
+
+    def estimate(self, conn: sqlite3.Connection, sql: str, params: tuple = ()) -> Tuple[float, Optional[str]]:
+        """
+        Estimated row visits for sql and, when it should not run, the reason.
+        """
+        plan = self.plan(conn, sql, params)
+        if any(detail == "RECURSIVE STEP" for _, detail in plan) and not _recursion_bounded(sql):
+            return float("inf"), "Recursive CTE without a LIMIT may not terminate."
+        aliases = _table_aliases(sql)
+        loops: Dict[int, List[Tuple[str, str, int]]] = {}
+        for parent, detail in plan:
+            m = _LOOP_RE.match(detail.strip())
+            if not m:
+                continue
+            table = aliases.get(m.group(2).lower(), m.group(2))
+            rows = self._table_rows(conn, table)
+            if rows is not None:
+                loops.setdefault(parent, []).append((m.group(1), table, rows))
+        cost = 0.0
+        for nested in loops.values():
+            # loops under the same parent are nested: each runs once per outer row
+            visits = 1.0
+            for kind, _, rows in nested:
+                if kind == "SCAN":
+                    visits *= max(rows, 1)
+                else:
+                    visits *= max(1, min(rows, SEARCH_ROWS))
+            scans = [table for kind, table, _ in nested if kind == "SCAN"]
+            if self.max_cost and len(scans) > 1 and visits > self.max_cost:
+                return visits, (f"Cartesian product of {' x '.join(scans)} "
+                                f"(~{visits:.2g} row visits) is too expensive.")
+            cost += visits
+        if self.max_cost and cost > self.max_cost:
+            return cost, f"Estimated {cost:.2g} row visits exceeds the limit of {self.max_cost:.2g}."
+        return cost, None
+
+    def check(self, conn: sqlite3.Connection, sql: str, params: tuple = ()) -> None:
+        """
+        Raise QueryRejected when the plan of sql is too expensive to run.
+        Statements SQLite cannot plan are left for execution to report.
+        """
+        with self._lock:
+            self._counters["checked"] += 1
+        try:
+            _, reason = self.estimate(conn, sql, params)
+        except sqlite3.Error:
+            return
+        if reason is not None:
+            with self._lock:
+                self._counters["rejected"] += 1
+            raise QueryRejected(reason)
+
+    def execute(self, conn: sqlite3.Connection, sql: str, params: tuple = (), *,
+                check: bool = True) -> Tuple[List[str], List[tuple], bool]:
+        """
+        Check, run and fetch a statement within the limits. Returns the column
+        names, at most max_rows rows, and whether more rows were cut off.
+        check=False skips the cost check for a caller that already ran it.
+        """
+        if check:
+            self.check(conn, sql, params)
+        expired = []
+        if self.timeout:
+            end = time.monotonic() + self.timeout
+
+            def _past_deadline() -> int:
+                if time.monotonic() > end:
+                    expired.append(True)
+                    return 1  # makes SQLite abort the statement with "interrupted"
+                return 0
+
+            conn.set_progress_handler(_past_deadline, PROGRESS_INTERVAL)
+        try:
+            cur = conn.execute(sql, params)
+            col_names = [d[0] for d in cur.description] if cur.description else []
+            rows = cur.fetchmany(self.max_rows + 1) if self.max_rows else cur.fetchall()
+            cur.close()
+        except sqlite3.OperationalError:
+            if expired:
+                with self._lock:
+                    self._counters["timeouts"] += 1
+                raise QueryRejected(f"Query exceeded the {self.timeout:g}s time limit.")
+            raise
+        finally:
+            if self.timeout:
+                conn.set_progress_handler(None, PROGRESS_INTERVAL)
+        truncated = bool(self.max_rows) and len(rows) > self.max_rows
+        if truncated:
+            del rows[self.max_rows:]
+            with self._lock:
+                self._counters["truncated"] += 1
+        return col_names, rows, truncated
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            out = dict(self._counters)
+            out["cached_plans"] = len(self._plans)
+        return out
+
+
+# Process-wide guard used by db_agent_app for generated and "sql:" statements.
+default_guard = QueryGuard()
@@ -0,0 +1,346 @@
+"""
+Routes dashboard-style count queries to the rollups of rollups.py.
+
+Statements of the shapes
+
+    SELECT <dimension> [AS d], COUNT(*) [AS n] FROM AMLcase GROUP BY <dimension>
+        [ORDER BY ...] [LIMIT n [OFFSET m]]
+    SELECT COUNT(*) FROM AMLcase [WHERE <dimension> = 'value']
+
+are answered from aml_rollup with an index range of a few hundred rows at
+most instead of a scan of the table. <dimension> is one of the columns in
+rollups.DIMENSIONS, or strftime('%Y-%m', create_date) / substr(create_date, 1, 7)
+for the month; GROUP BY and ORDER BY may name it by expression, alias or
+position. The rewritten statement returns the same column names, rows and
+order. Anything else (other filters, joins, HAVING, DISTINCT, parameters, a
+LIMIT after an ORDER BY that leaves ties on the count) runs as written, as does
+everything while a bulk load has the rollups suspended.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+import rollups
+from sql_validator import Token, token_spans
+
+# AML_ROLLUP_REWRITE=0 leaves every statement to run as written.
+REWRITE_ENABLED = os.getenv("AML_ROLLUP_REWRITE", "1") != "0"
+
+_CLAUSES = ("SELECT", "FROM", "WHERE", "GROUP", "ORDER", "LIMIT")
+_COUNT_ARGS = (Token("op", "*"), Token("number", "1"))
+_MONTH_FORMAT = Token("string", "'%Y-%m'")
+
+
+class Rewrite(NamedTuple):
+    sql: str      # the statement over aml_rollup
+    table: str    # source table, as in rollups.DIMENSIONS
+    column: str   # source column it stands in for, lower-cased
+
+
+class _Item(NamedTuple):
+    dimension: Optional[str]  # None for a COUNT
+    name: str                 # result column name
+    alias: Optional[str]      # lower-cased
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _is_name(token: Token) -> bool:
+    return token.kind in ("word", "quoted")
+
+
+def _is_word(token: Token, word: str) -> bool:
+    return token.kind == "word" and token.value.upper() == word
+
+
+def _is_count(tokens: List[Token]) -> bool:
+    # COUNT(*) or COUNT(1)
+    return len(tokens) == 4 and _is_word(tokens[0], "COUNT") and tokens[1] == ("op", "(") \
+        and tokens[2] in _COUNT_ARGS and tokens[3] == ("op", ")")
+
+
+def _split(spans: List[Tuple[Token, int, int]]) -> List[List[Tuple[Token, int, int]]]:
+    # split on the commas outside parentheses
+    parts: List[List[Tuple[Token, int, int]]] = [[]]
+    depth = 0
+    for span in spans:
+        token = span[0]
+        if token == ("op", "(") or token == ("op", ")"):
+            depth += 1 if token.value == "(" else -1
+        elif token == ("op", ",") and depth == 0:
+            parts.append([])
+            continue
+        parts[-1].append(span)
+    return parts
+
+
+def _clauses(spans: List[Tuple[Token, int, int]]) -> Optional[Dict[str, List[Tuple[Token, int, int]]]]:
+    """
+    The top-level clauses of a simple SELECT, keyed by their first keyword and
+    without it (BY dropped too), or None when they are out of order or repeated.
+    """
+    clauses: Dict[str, List[Tuple[Token, int, int]]] = {}
+    current = None
+    depth = 0
+    for span in spans:
+        token = span[0]
+        if token.kind == "word" and depth == 0 and token.value.upper() in _CLAUSES:
+            keyword = token.value.upper()
+            if current is not None and _CLAUSES.index(keyword) <= _CLAUSES.index(current):
+                return None
+            if current is None and keyword != "SELECT":
+                return None
+            current = keyword
+            clauses[current] = []
+            continue
+        if current is None:
+            return None
+        if token == ("op", "("):
+            depth += 1
+        elif token == ("op", ")"):
+            depth -= 1
+        clauses[current].append(span)
+    for keyword in ("GROUP", "ORDER"):
+        if keyword in clauses:
+            if not clauses[keyword] or not _is_word(clauses[keyword][0][0], "BY"):
+                return None
+            clauses[keyword] = clauses[keyword][1:]
+    return clauses
+
+
+class RollupRewriter:
+    """
+    Recognizes count queries the rollups can answer and runs them there.
+    Plans are cached by statement hash.
+    """
+
+    def __init__(self, *, enabled: bool = REWRITE_ENABLED, max_cached: int = 4096):
+        self.enabled = enabled
+        self.max_cached = max_cached
+        self._lock = threading.Lock()
+        self._plans: Dict[bytes, Optional[Rewrite]] = {}
+        self._counters = {"rewritten": 0, "passed": 0, "stale": 0, "errors": 0}
+
+    # -- matching ----------------------------------------------------------
+
+    def _column(self, tokens: List[Token], table: str, qualifiers: Set[str]) -> Optional[str]:
+        # the dimension a [qualifier.]column reference stands for
+        if len(tokens) == 3 and _is_name(tokens[0]) and tokens[1] == ("op", ".") \
+                and tokens[0].value.lower() in qualifiers:
+            tokens = tokens[2:]
+        if len(tokens) != 1 or not _is_name(tokens[0]):
+            return None
+        name = tokens[0].value.lower()
+        for dimension in rollups.DIMENSIONS[table]:
+            if rollups.dimension_column(dimension).lower() == name:
+                return dimension
+        return None
+
+    def _dimension(self, tokens: List[Token], table: str, qualifiers: Set[str]) -> Optional[str]:
+        # the dimension an expression computes: a column, or the month of create_date
+        if len(tokens) > 3 and tokens[0].kind == "word" and tokens[1] == ("op", "(") and tokens[-1] == ("op", ")"):
+            args = [[t for t, _, _ in arg] for arg in _split([(t, 0, 0) for t in tokens[2:-1]])]
+            func = tokens[0].value.lower()
+            if func == "strftime" and len(args) == 2 and args[0] == [_MONTH_FORMAT]:
+                column = args[1]
+            elif func == "substr" and len(args) == 3 and args[1:] == [[Token("number", "1")], [Token("number", "7")]]:
+                column = args[0]
+            else:
+                return None
+            return "month" if self._column(column, table, qualifiers) == "month" else None
+        dimension = self._column(tokens, table, qualifiers)
+        return dimension if dimension != "month" else None
+
+    def _item(self, spans: List[Tuple[Token, int, int]], sql: str, table: str,
+              qualifiers: Set[str]) -> Optional[_Item]:
+        tokens = [t for t, _, _ in spans]
+        alias = None
+        if len(tokens) >= 3 and _is_word(tokens[-2], "AS") and _is_name(tokens[-1]):
+            alias, spans = tokens[-1].value, spans[:-2]
+        elif len(tokens) >= 2 and _is_name(tokens[-1]) and (_is_name(tokens[-2]) or tokens[-2] == ("op", ")")):
+            alias, spans = tokens[-1].value, spans[:-1]
+        tokens = [t for t, _, _ in spans]
+        if not tokens:
+            return None
+        text = sql[spans[0][1]:spans[-1][2]]
+        if _is_count(tokens):
+            return _Item(None, alias or text, alias.lower() if alias else None)
+        dimension = self._dimension(tokens, table, qualifiers)
+        if dimension is None:
+            return None
+        # SQLite names a plain column reference after the declared column
+        name = alias or (text if dimension == "month" else dimension)
+        return _Item(dimension, name, alias.lower() if alias else None)
+
+    def _target(self, tokens: List[Token], items: List[_Item], table: str,
+                qualifiers: Set[str]) -> Optional[str]:
+        # the rollup column ("value" or "n") an ORDER BY or GROUP BY term refers to
+        if len(tokens) == 1 and tokens[0].kind == "number":
+            if not tokens[0].value.isdigit() or not 1 <= int(tokens[0].value) <= len(items):
+                return None
+            return "n" if items[int(tokens[0].value) - 1].dimension is None else "value"
+        if len(tokens) == 1 and _is_name(tokens[0]):
+            for item in items:
+                if item.alias == tokens[0].value.lower():
+                    return "n" if item.dimension is None else "value"
+        if _is_count(tokens):
+            return "n"
+        dimension = self._dimension(tokens, table, qualifiers)
+        if dimension is not None and any(item.dimension == dimension for item in items):
+            return "value"
+        return None
+
+    def _plan(self, sql: str) -> Optional[Rewrite]:
+        try:
+            spans = token_spans(sql)
+        except ValueError:
+            return None
+        if spans and spans[-1][0] == ("op", ";"):
+            spans = spans[:-1]
+        clauses = _clauses(spans)
+        if clauses is None or "FROM" not in clauses:
+            return None
+
+        source = [t for t, _, _ in clauses["FROM"]]
+        if not source or not _is_name(source[0]):
+            return None
+        table = next((t for t in rollups.DIMENSIONS if t.lower() == source[0].value.lower()), None)
+        if table is None:
+            return None
+        qualifiers = {table.lower()}
+        if len(source) == 2 and _is_name(source[1]):
+            qualifiers = {source[1].value.lower()}
+        elif len(source) == 3 and _is_word(source[1], "AS") and _is_name(source[2]):
+            qualifiers = {source[2].value.lower()}
+        elif len(source) != 1:
+            return None
+
+        items = []
+        for part in _split(clauses["SELECT"]):
+            item = self._item(part, sql, table, qualifiers)
+            if item is None:
+                return None
+            items.append(item)
+        dimensions = {item.dimension for item in items} - {None}
+        if len(dimensions) > 1 or len(dimensions) == len(items):
+            return None
+        dimension = dimensions.pop() if dimensions else None
+
+        conditions = [f"source = '{table}'"]
+        if "GROUP" in clauses:
+            group = _split(clauses["GROUP"])
+            if dimension is None or len(group) != 1 or "WHERE" in clauses \
+                    or self._target([t for t, _, _ in group[0]], items, table, qualifiers) != "value":
+                return None
+            conditions += [f"dimension = '{dimension}'", "n > 0"]
+        elif dimension is not None:
+            return None
+        elif "WHERE" in clauses:
+            where = [t for t, _, _ in clauses["WHERE"]]
+            if len(where) < 3 or where[-2] != ("op", "=") or where[-1].kind != "string":
+                return None
+            filtered = self._dimension(where[:-2], table, qualifiers)
+            if filtered is None:
+                return None
+            dimension = filtered
+            conditions += [f"dimension = '{dimension}'", f"value = {where[-1].value}"]
+        else:
+            conditions.append(f"dimension = '{rollups.TOTAL}'")
+
+        order = []
+        for term in _split(clauses["ORDER"]) if "ORDER" in clauses else []:
+            tokens = [t for t, _, _ in term]
+            direction = ""
+            if tokens and (_is_word(tokens[-1], "ASC") or _is_word(tokens[-1], "DESC")):
+                direction, tokens = " " + tokens[-1].value.upper(), tokens[:-1]
+            target = self._target(tokens, items, table, qualifiers)
+            if target is None or target == "value" and "GROUP" not in clauses:
+                return None
+            order.append(target + direction)
+        limit = ""
+        if "LIMIT" in clauses:
+            tokens = [t for t, _, _ in clauses["LIMIT"]]
+            if not tokens or not all(t.kind == "number" and t.value.isdigit() or t == ("op", ",")
+                                     or _is_word(t, "OFFSET") for t in tokens):
+                return None
+            limit = " LIMIT " + " ".join(t.value for t in tokens).replace(" ,", ",")
+        if "GROUP" in clauses and order and not any(term.startswith("value") for term in order):
+            # rows tied on the count: SQLite lists them in group order, which
+            # the value tie-breaker repeats; which tied rows a LIMIT keeps is
+            # not defined, so that runs as written
+            if limit:
+                return None
+            order.append("value")
+
+        columns = ", ".join(f"{'value' if item.dimension else 'n'} AS {_quote(item.name)}" for item in items)
+        where = " AND ".join(conditions)
+        if "GROUP" in clauses:
+            rewritten = (f"SELECT {columns} FROM {rollups.ROLLUP_TABLE} WHERE {where} "
+                         f"ORDER BY {', '.join(order) or 'value'}{limit}")
+        else:
+            # one row, zero for a value the rollups have never seen
+            count = f"COALESCE((SELECT n FROM {rollups.ROLLUP_TABLE} WHERE {where}), 0)"
+            rewritten = f"SELECT {', '.join(f'{count} AS {_quote(item.name)}' for item in items)}{limit}"
+        column = rollups.dimension_column(dimension).lower() if dimension else ""
+        return Rewrite(rewritten, table, column)
+
+    # -- public ------------------------------------------------------------
+
+    def rewrite(self, sql: str) -> Optional[Rewrite]:
+        """
+        The rollup form of sql, or None when the rollups cannot answer it.
+        """
+        key = hashlib.blake2b(sql.encode("utf-8"), digest_size=16).digest()
+        with self._lock:
+            if key in self._plans:
+                return self._plans[key]
+        plan = self._plan(sql)
+        with self._lock:
+            if len(self._plans) >= self.max_cached:
+                self._plans.pop(next(iter(self._plans)))
+            self._plans[key] = plan
+        return plan
+
+    def execute(self, conn: sqlite3.Connection, sql: str,
+                allowed: Dict[str, Set[str]]) -> Optional[Tuple[List[str], List[tuple]]]:
+        """
+        (column names, rows) of sql answered from the rollups, or None when it
+        has to run as written: not a rollup shape, a table or column outside
+        allowed (the validator's allow-list), or rollups that are missing or
+        suspended.
+        """
+        plan = self.rewrite(sql) if self.enabled else None
+        if plan is None or plan.table.lower() not in allowed \
+                or plan.column and plan.column not in allowed[plan.table.lower()]:
+            with self._lock:
+                self._counters["passed"] += 1
+            return None
+        try:
+            if not rollups.is_current(conn, plan.table):
+                with self._lock:
+                    self._counters["stale"] += 1
+                return None
+            cur = conn.execute(plan.sql)
+            columns = [d[0] for d in cur.description]
+            rows = cur.fetchall()
+        except sqlite3.OperationalError:
+            with self._lock:
+                self._counters["errors"] += 1
+            return None
+        with self._lock:
+            self._counters["rewritten"] += 1
+        return columns, rows
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            out = dict(self._counters)
+            out["cached"] = len(self._plans)
+        return out
+
+
+# Process-wide rewriter used by db_agent_app for generated and "sql:" statements.
+default_rewriter = RollupRewriter()
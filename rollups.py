@@ -0,0 +1,137 @@
+"""
+Materialized count rollups for dashboard-style questions.
+
+aml_rollup holds COUNT(*) of AMLcase by CASE_Status, Event_Country, Analyst,
+Source_System and month of create_date, and of AMLevent by event_Status: one
+row per (source table, dimension, value), NULL values included, plus a '*' row
+per table with its total. Triggers named rollup_<table>_* adjust the counts on
+every insert, update and delete, so ingest keeps them current in the same
+transaction; a bulk load suspends them and rebuild()s once at the end. While
+they are suspended the table has no total row, which is_current() checks.
+
+query_rewriter answers matching GROUP BY queries from here instead of
+scanning the source table.
+"""
+import sqlite3
+from typing import Dict, List
+
+ROLLUP_TABLE = "aml_rollup"
+TOTAL = "*"
+# Source table -> {dimension: expression over a row of it}. The month is the
+# 'YYYY-MM' prefix of create_date, which strftime('%Y-%m', create_date) also
+# gives for every date in the format the loaders accept.
+DIMENSIONS: Dict[str, Dict[str, str]] = {
+    "AMLcase": {
+        "CASE_Status": "{row}.CASE_Status",
+        "Event_Country": "{row}.Event_Country",
+        "Analyst": "{row}.Analyst",
+        "Source_System": "{row}.Source_System",
+        "month": "substr({row}.create_date, 1, 7)",
+    },
+    "AMLevent": {
+        "event_Status": "{row}.event_Status",
+    },
+}
+# Columns each dimension reads, for the allow-list and UPDATE OF triggers.
+DIMENSION_COLUMNS = {"month": "create_date"}
+
+
+def dimension_column(dimension: str) -> str:
+    return DIMENSION_COLUMNS.get(dimension, dimension)
+
+
+def _match(table: str, dimension: str, value: str) -> str:
+    return f"source = '{table}' AND dimension = '{dimension}' AND value IS {value}"
+
+
+def _add(table: str, dimension: str, value: str, when: str = "") -> List[str]:
+    # NULL is a value too, so no upsert: create the row at zero if missing, then count
+    cond = f" AND {when}" if when else ""
+    return [
+        f"INSERT INTO {ROLLUP_TABLE} (source, dimension, value, n) SELECT '{table}', '{dimension}', {value}, 0 "
+        f"WHERE NOT EXISTS (SELECT 1 FROM {ROLLUP_TABLE} WHERE {_match(table, dimension, value)}){cond};",
+        f"UPDATE {ROLLUP_TABLE} SET n = n + 1 WHERE {_match(table, dimension, value)}{cond};",
+    ]
+
+
+def _remove(table: str, dimension: str, value: str, when: str = "") -> List[str]:
+    cond = f" AND {when}" if when else ""
+    return [f"UPDATE {ROLLUP_TABLE} SET n = n - 1 WHERE {_match(table, dimension, value)}{cond};"]
+
+
+def rollup_triggers(table: str) -> List[str]:
+    """
+    CREATE TRIGGER statements that keep the rollups of table current.
+    """
+    total = f"source = '{table}' AND dimension = '{TOTAL}'"
+    on_insert = [f"UPDATE {ROLLUP_TABLE} SET n = n + 1 WHERE {total};"]
+    on_delete = [f"UPDATE {ROLLUP_TABLE} SET n = n - 1 WHERE {total};"]
+    on_update: List[str] = []
+    for dimension, expr in DIMENSIONS[table].items():
+        new, old = expr.format(row="NEW"), expr.format(row="OLD")
+        on_insert += _add(table, dimension, new)
+        on_delete += _remove(table, dimension, old)
+        moved = f"{old} IS NOT {new}"
+        on_update += _remove(table, dimension, old, moved) + _add(table, dimension, new, moved)
+    columns = sorted({dimension_column(d) for d in DIMENSIONS[table]})
+    name = f"rollup_{table.lower()}"
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS {name}_insert AFTER INSERT ON {table} BEGIN {' '.join(on_insert)} END",
+        f"CREATE TRIGGER IF NOT EXISTS {name}_delete AFTER DELETE ON {table} BEGIN {' '.join(on_delete)} END",
+        f"CREATE TRIGGER IF NOT EXISTS {name}_update AFTER UPDATE OF {', '.join(columns)} ON {table} "
+        f"BEGIN {' '.join(on_update)} END",
+    ]
+
+
+def create(conn: sqlite3.Connection) -> None:
+    """
+    Create the rollup table and its triggers, and count the rows already stored.
+    """
+    conn.execute(f"""
+    CREATE TABLE IF NOT EXISTS {ROLLUP_TABLE} (
+        source     TEXT NOT NULL,
+        dimension  TEXT NOT NULL,
+        value      TEXT,
+        n          INTEGER NOT NULL
+    )
+    """)
+    conn.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS idx_{ROLLUP_TABLE}_key ON {ROLLUP_TABLE} "
+                 f"(source, dimension, value)")
+    for table in DIMENSIONS:
+        rebuild(conn, table)
+        restore(conn, table)
+
+
+def suspend(conn: sqlite3.Connection, table: str) -> None:
+    """
+    Drop the rollup triggers of table for a bulk load and mark its rollups
+    stale; rebuild() and restore() afterwards.
+    """
+    conn.execute(f"DELETE FROM {ROLLUP_TABLE} WHERE source = ? AND dimension = '{TOTAL}'", (table,))
+    for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = ? "
+                                "AND name LIKE 'rollup\\_%' ESCAPE '\\'", (table,)).fetchall():
+        conn.execute(f'DROP TRIGGER "{name}"')
+
+
+def is_current(conn: sqlite3.Connection, table: str) -> bool:
+    row = conn.execute(f"SELECT 1 FROM {ROLLUP_TABLE} WHERE source = ? AND dimension = '{TOTAL}'",
+                       (table,)).fetchone()
+    return row is not None
+
+
+def restore(conn: sqlite3.Connection, table: str) -> None:
+    for stmt in rollup_triggers(table):
+        conn.execute(stmt)
+
+
+def rebuild(conn: sqlite3.Connection, table: str) -> None:
+    """
+    Recount the rollups of table from scratch.
+    """
+    conn.execute(f"DELETE FROM {ROLLUP_TABLE} WHERE source = ?", (table,))
+    conn.execute(f"INSERT INTO {ROLLUP_TABLE} (source, dimension, value, n) "
+                 f"SELECT ?, '{TOTAL}', NULL, COUNT(*) FROM {table}", (table,))
+    for dimension, expr in DIMENSIONS[table].items():
+        value = expr.format(row=table)
+        conn.execute(f"INSERT INTO {ROLLUP_TABLE} (source, dimension, value, n) "
+                     f"SELECT ?, ?, {value}, COUNT(*) FROM {table} GROUP BY {value}", (table, dimension))
@@ -0,0 +1,312 @@
+"""
+Compact, cached schema context for the text-to-SQL prompt.
+
+The schema is read from sqlite_master and PRAGMA table_info once per schema
+version (SQLite's PRAGMA schema_version, which every DDL statement bumps) and
+rendered one line per table. Only the AML tables and their search tables are
+described (and, through sql_validator, queryable); whatever else the database
+file holds stays out of the prompt. Low-cardinality text columns carry their
+distinct values, so the model writes exact predicates ('CLOSED-RISK RELEVANT',
+not 'closed'). Values are read by seeking an index that leads with the column,
+a dozen B-tree descents whatever the table size; columns without one are only
+sampled in tables of up to SAMPLE_SCAN_ROWS rows. Only the tables that match
+the question are put in the prompt. Data changes recorded in the change log
+(change_tracking) resample only the columns they touched.
+"""
+import os
+import re
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Set
+
+from change_tracking import changes_since, current_version
+from db_pool import get_pool
+from db_schema import CHANGE_LOG_TABLE, DB_PATH, VERSION_TABLE
+from rollups import ROLLUP_TABLE
+from text_search import FTS_TABLES, LINK_TABLE, SEARCH_HINTS, shadow_tables
+
+# Columns with at most this many distinct values list them in the prompt.
+LOW_CARDINALITY_MAX = int(os.getenv("AML_SCHEMA_SAMPLE_MAX", "12"))
+# Largest table whose unindexed columns are sampled; above it, DISTINCT would
+# scan the table on the request path.
+SAMPLE_SCAN_ROWS = int(os.getenv("AML_SCHEMA_SCAN_ROWS", "100000"))
+# Tables described to the model and allow-listed for generated SQL, lower-cased;
+# AML_SCHEMA_TABLES (comma-separated) replaces the default.
+SCHEMA_TABLES = {t.strip().lower() for t in os.getenv("AML_SCHEMA_TABLES", "").split(",") if t.strip()} or {
+    t.lower() for t in ("AMLcase", "AMLevent", LINK_TABLE, *(fts for fts, _ in FTS_TABLES.values()))}
+# Bookkeeping tables the model never needs to query.
+HIDDEN_TABLES = {"schema_version", VERSION_TABLE, CHANGE_LOG_TABLE, ROLLUP_TABLE} | shadow_tables()
+# Types whose values are never worth sampling.
+_UNSAMPLED_TYPES = ("DATE", "TIME", "INT", "REAL", "NUM", "FLOAT", "DOUBLE", "DEC", "BLOB")
+
+
+class ColumnInfo:
+    __slots__ = ("name", "type", "pk", "notnull", "values")
+
+    def __init__(self, name: str, type_: str, pk: bool, notnull: bool):
+        self.name = name
+        self.type = type_
+        self.pk = pk
+        self.notnull = notnull
+        self.values: Optional[List[str]] = None  # distinct values when low-cardinality
+
+    def render(self) -> str:
+        out = f"{self.name} {self.type or 'TEXT'}"
+        if self.pk:
+            out += " PK"
+        if self.values:
+            out += " IN (" + ", ".join("'" + v.replace("'", "''") + "'" for v in self.values) + ")"
+        return out
+
+
+class TableInfo:
+    __slots__ = ("name", "columns", "words")
+
+    def __init__(self, name: str, columns: List[ColumnInfo]):
+        self.name = name
+        self.columns = columns
+        # vocabulary for relevance matching: table and column name parts, plus sampled values
+        self.words = {"table": _identifier_words(name),
+                      "columns": set().union(*(_identifier_words(c.name) for c in columns)),
+                      "values": {w for c in columns for v in (c.values or []) for w in _words(v)}}
+
+    def render(self) -> str:
+        return f"{self.name}(" + ", ".join(c.render() for c in self.columns) + ")"
+
+
+def _words(text: str) -> Set[str]:
+    out = set()
+    for w in re.findall(r"[a-z0-9]+", text.lower()):
+        out.add(w)
+        if len(w) > 3 and w.endswith("s"):
+            out.add(w[:-1])  # "cases" -> "case", "events" -> "event"
+    return out
+
+
+def _identifier_words(name: str) -> Set[str]:
+    # AMLevent -> {aml, event}, CASE_Status -> {case, status}, event_description -> {event, description}.
+    # A capital run followed by lower case is ambiguous (AMLcase vs HTTPServer), so split both ways.
+    spaced = re.sub(r"([a-z])([A-Z])", r"\1 \2", name).replace("_", " ")
+    acronym = re.sub(r"([A-Z]{2,})(?=[a-z])", r"\1 ", spaced)
+    camel = re.sub(r"([A-Z]+)([A-Z][a-z])", r"\1 \2", spaced)
+    # drop fragments like "am" that would match ordinary words in a question
+    return {w for w in _words(acronym) | _words(camel) if len(w) > 2}
+
+
+def is_schema_table(name: str) -> bool:
+    """
+    Whether a table is described to the model and may be queried.
+    """
+    return name.lower() in SCHEMA_TABLES and name not in HIDDEN_TABLES
+
+
+def _indexed_columns(conn: sqlite3.Connection, table: str) -> Set[str]:
+    # columns some index of table leads with
+    leading = set()
+    for idx in conn.execute(f'PRAGMA index_list("{table}")').fetchall():
+        first = conn.execute(f'PRAGMA index_info("{idx[1]}")').fetchone()
+        if first is not None and first[2]:
+            leading.add(first[2].lower())
+    return leading
+
+
+def _row_estimate(conn: sqlite3.Connection, table: str) -> int:
+    try:
+        return conn.execute(f'SELECT MAX(rowid) FROM "{table}"').fetchone()[0] or 0
+    except sqlite3.OperationalError:  # WITHOUT ROWID table
+        return conn.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0]
+
+
+def _sample_values(conn: sqlite3.Connection, table: str, column: ColumnInfo, limit: int, *,
+                   indexed: bool, rows: int) -> Optional[List[str]]:
+    if column.pk or column.name.lower().endswith("_id") or any(t in column.type.upper() for t in _UNSAMPLED_TYPES):
+        return None
+    name = column.name
+    if indexed:
+        # one index seek per distinct value; stops once the column proves high-cardinality
+        values: List[str] = []
+        row = conn.execute(f'SELECT "{name}" FROM "{table}" WHERE "{name}" IS NOT NULL '
+                           f'ORDER BY "{name}" LIMIT 1').fetchone()
+        while row is not None and len(values) <= limit:
+            values.append(row[0])
+            row = conn.execute(f'SELECT "{name}" FROM "{table}" WHERE "{name}" > ? '
+                               f'ORDER BY "{name}" LIMIT 1', (row[0],)).fetchone()
+        found = values
+    elif rows <= SAMPLE_SCAN_ROWS:
+        # LIMIT limit + 1 stops the scan as soon as the column proves high-cardinality.
+        found = [r[0] for r in conn.execute(
+            f'SELECT DISTINCT "{name}" FROM "{table}" WHERE "{name}" IS NOT NULL LIMIT ?', (limit + 1,))]
+    else:
+        return None
+    if not found or len(found) > limit:
+        return None
+    return sorted(str(v) for v in found)
+
+
+def _sample_table(conn: sqlite3.Connection, table: str, columns: List[ColumnInfo], limit: int) -> int:
+    # fills in column.values; returns the number of columns sampled
+    indexed, rows = _indexed_columns(conn, table), _row_estimate(conn, table)
+    for column in columns:
+        column.values = _sample_values(conn, table, column, limit,
+                                       indexed=column.name.lower() in indexed, rows=rows)
+    return len(columns)
+
+
+def read_schema(conn: sqlite3.Connection, *, sample_limit: int = LOW_CARDINALITY_MAX) -> List[TableInfo]:
+    """
+    Introspect the schema tables of a database (is_schema_table): columns from
+    PRAGMA table_info and, for low-cardinality text columns, their distinct values.
+    """
+    names = conn.execute(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
+    ).fetchall()
+    tables = []
+    for name, sql in names:
+        if not is_schema_table(name):
+            continue
+        columns = [ColumnInfo(r[1], r[2], bool(r[5]), bool(r[3]))
+                   for r in conn.execute(f'PRAGMA table_info("{name}")')]
+        # a full-text index repeats its source table's columns; DISTINCT on it is a full scan
+        virtual = (sql or "").upper().startswith("CREATE VIRTUAL TABLE")
+        if sample_limit > 0 and not virtual:
+            _sample_table(conn, name, columns, sample_limit)
+        tables.append(TableInfo(name, columns))
+    return tables
+
+
+class SchemaContext:
+    """
+    Process-wide cache of one database's schema summary. Each lookup reads
+    PRAGMA schema_version and the data version; the summary is rebuilt when the
+    schema changes, and the sampled values of the columns the change log says
+    were written are re-read when the data changes (or everything after
+    invalidate()).
+    """
+
+    def __init__(self, db_path: str = DB_PATH, *, sample_limit: int = LOW_CARDINALITY_MAX):
+        self.db_path = db_path
+        self.sample_limit = sample_limit
+        self._lock = threading.Lock()
+        self._version: Optional[int] = None
+        self._data_version: Optional[int] = None
+        self._tables: List[TableInfo] = []
+        self._counters = {"hits": 0, "rebuilds": 0, "resamples": 0}
+
+    def tables(self) -> List[TableInfo]:
+        with get_pool(self.db_path).connection() as conn:
+            version = conn.execute("PRAGMA schema_version").fetchone()[0]
+            try:
+                data_version: Optional[int] = current_version(conn)
+            except sqlite3.OperationalError:  # no change tracking in this database
+                data_version = None
+            with self._lock:
+                if version == self._version:
+                    if data_version == self._data_version:
+                        self._counters["hits"] += 1
+                        return self._tables
+                    if self._data_version is not None and data_version is not None:
+                        changed = changes_since(conn, self._data_version)
+                        if changed is not None:
+                            self._tables = self._resample(conn, changed)
+                            self._data_version = data_version
+                            return self._tables
+                self._tables = read_schema(conn, sample_limit=self.sample_limit)
+                self._version = version
+                self._data_version = data_version
+                self._counters["rebuilds"] += 1
+                return self._tables
+
+    def _resample(self, conn: sqlite3.Connection, changed: Dict[str, Optional[Set[str]]]) -> List[TableInfo]:
+        # caller holds self._lock; copies, so readers of the old list are unaffected
+        tables = []
+        for table in self._tables:
+            if table.name.lower() not in changed or self.sample_limit <= 0:
+                tables.append(table)
+                continue
+            written = changed[table.name.lower()]
+            columns, stale = [], []
+            for old in table.columns:
+                column = ColumnInfo(old.name, old.type, old.pk, old.notnull)
+                if written is None or old.name in written:
+                    stale.append(column)
+                else:
+                    column.values = old.values
+                columns.append(column)
+            if stale:
+                self._counters["resamples"] += _sample_table(conn, table.name, stale, self.sample_limit)
+            tables.append(TableInfo(table.name, columns))
+        return tables
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._version = None
+
+    def relevant_tables(self, question: str) -> List[TableInfo]:
+        """
+        Tables the question refers to: those it names ("cases" -> AMLcase), else
+        those with a column it names, else every table. A matching sampled value
+        ("India") only orders the fallback list; on its own it is too weak a hint
+        to leave other tables out.
+        """
+        tables = self.tables()
+        words = _words(question)
+        named = [t for t in tables if words & t.words["table"]]
+        if named:
+            return named
+        by_column = [t for t in tables if words & t.words["columns"]]
+        if by_column:
+            return by_column
+        return sorted(tables, key=lambda t: -len(words & t.words["values"]))
+
+    def render(self, question: Optional[str] = None) -> str:
+        """
+        One line per table, only those relevant to question when one is given,
+        then how to use the search tables among them.
+        """
+        tables = self.relevant_tables(question) if question else self.tables()
+        hints = [SEARCH_HINTS[t.name] for t in tables if t.name in SEARCH_HINTS]
+        return "\n".join([t.render() for t in tables] + hints)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            out = dict(self._counters)
+            out["schema_version"] = self._version
+            out["data_version"] = self._data_version
+        return out
+
+
+_contexts: Dict[str, SchemaContext] = {}
+_contexts_lock = threading.Lock()
+
+
+def get_schema_context(db_path: str = DB_PATH) -> SchemaContext:
+    """
+    Return the process-wide SchemaContext for db_path.
+    """
+    key = os.path.abspath(db_path)
+    ctx = _contexts.get(key)
+    if ctx is None:
+        with _contexts_lock:
+            ctx = _contexts.setdefault(key, SchemaContext(db_path))
+    return ctx
+
+
+def schema_prompt(question: str, db_path: str = DB_PATH) -> str:
+    """
+    Schema context for a text-to-SQL prompt about question.
+    """
+    return get_schema_context(db_path).render(question)
+
+
+def column_domain(column: str, db_path: str = DB_PATH) -> Optional[Dict[str, str]]:
+    """
+    Values of a low-cardinality column (matched by name across tables) keyed by
+    their lower-case form, or None when no such column has its values sampled.
+    """
+    values: Optional[Dict[str, str]] = None
+    for t in get_schema_context(db_path).tables():
+        for c in t.columns:
+            if c.name.lower() == column.lower() and c.values is not None:
+                values = values or {}
+                values.update((v.lower(), v) for v in c.values)
+    return values
@@ -9,6 +9,12 @@ CREATE TABLE AMLcase (
     Source_System   VARCHAR(100)
 );
 
+CREATE INDEX idx_amlcase_create_date ON AMLcase (create_date);
+CREATE INDEX idx_amlcase_status_date ON AMLcase (CASE_Status, create_date);
+CREATE INDEX idx_amlcase_aaa_status ON AMLcase (AAA_Status, CASE_Status);
+CREATE INDEX idx_amlcase_country_status ON AMLcase (Event_Country, CASE_Status, create_date);
+CREATE INDEX idx_amlcase_analyst_date ON AMLcase (Analyst, create_date);
+
 
 -- Sample Data 
 /*
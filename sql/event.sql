@@ -4,6 +4,8 @@ CREATE TABLE AMLevent (
     event_Status      VARCHAR(30),
     event_description VARCHAR(50)  
 );
+CREATE INDEX idx_amlevent_create_date ON AMLevent (create_date);
+CREATE INDEX idx_amlevent_status_date ON AMLevent (event_Status, create_date);
 INSERT INTO AMLevent (EVENT_ID, create_date, event_Status, event_description) VALUES
 ('EVT0001','2024-01-01 09:00:00','OPEN','Large deposit detected'),
 ('EVT0002','2024-01-02 09:00:00','PENDING','Wire transfer flagged'),
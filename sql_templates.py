@@ -0,0 +1,344 @@
+"""
+Few-shot SQL template store for get_user_prompt.
+
+Questions that differ only in a literal ("cases analysed by Bob Smith" /
+"cases analysed by Diana Prince") share one SQL shape. After the LLM answers a
+question successfully, the literals that appear in both the question and the
+SQL become parameters: the question turns into a pattern with slots and the
+SQL into a statement with ? placeholders. A new question is matched against
+the stored patterns, shortlisted with a TF-IDF index over word and character
+n-grams; a hit is answered locally with bound parameters, and only misses go
+to the LLM.
+"""
+import math
+import os
+import re
+import threading
+from collections import Counter, OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from schema_context import column_domain
+
+# String literals ('it''s' style escaping) and numbers outside identifiers.
+_SQL_LITERAL_RE = re.compile(r"'((?:[^']|'')*)'|(?<![\w.])(\d+(?:\.\d+)?)(?![\w.])")
+_NUMBER_RE = r"\d+(?:\.\d+)?"
+# "<column> = '", "<column> IN ('a', '" ... right before a literal
+_COMPARED_COLUMN_RE = re.compile(r"(\w+)\s*(?:==?|!=|<>|\bIN\s*\([^()]*?)\s*$", flags=re.IGNORECASE)
+# Words that turn a slot value into a condition ("anyone but Bob", "India or UK"),
+# which the template's single comparison cannot express.
+_QUALIFIER_RE = re.compile(r"\b(?:not|but|except|excluding|without|or|and|nor)\b", flags=re.IGNORECASE)
+# column name -> {lower-case value: stored value} for low-cardinality columns, or None
+DomainFn = Callable[[str], Optional[Dict[str, str]]]
+# Case transforms an LLM typically applies between the question and the SQL literal.
+_CASE_FNS = {
+    "same": lambda v: v,
+    "title": str.title,
+    "upper": str.upper,
+    "lower": str.lower,
+}
+
+
+def _canon(prompt: str) -> str:
+    # whitespace collapsed, trailing punctuation dropped; case kept for the values
+    p = re.sub(r"\s+", " ", prompt.strip())
+    return re.sub(r"[?!.;,\s]+$", "", p)
+
+
+def _features(text: str) -> Counter:
+    text = text.lower()
+    words = re.findall(r"[a-z0-9_]+", text)
+    feats = Counter(words)
+    feats.update(f"{a} {b}" for a, b in zip(words, words[1:]))
+    padded = f" {' '.join(words)} "
+    feats.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return feats
+
+
+class SqlTemplate:
+    __slots__ = ("id", "pattern", "regex", "sql", "slots", "skeleton", "example", "hits")
+
+    def __init__(self, template_id: int, pattern: str, sql: str, slots: List[Dict[str, Any]],
+                 skeleton: str, example: str):
+        self.id = template_id
+        self.pattern = pattern    # question with {0}, {1}, ... in place of the values
+        self.sql = sql            # SQL with ? placeholders, in slot order of appearance
+        self.slots = slots        # per placeholder: slot, kind, case, prefix/suffix (LIKE %), words, column
+        self.skeleton = skeleton  # question text without the values, for the index
+        self.example = example
+        self.hits = 0
+        parts = re.split(r"\{(\d+)\}", pattern)
+        regex = ""
+        first = {}
+        for s in slots:
+            first.setdefault(s["slot"], s)
+        for i, part in enumerate(parts):
+            if i % 2:
+                slot = first[int(part)]
+                if slot["kind"] == "number":
+                    body = _NUMBER_RE
+                else:
+                    # one word more than the learned value, so trailing qualifiers
+                    # ("India from 2023") do not get swallowed into the value
+                    body = r"\S+?(?:\s+\S+?){0,%d}" % slot["words"]
+                regex += f"(?P<p{part}>{body})"
+            else:
+                regex += r"\s+".join(re.escape(w) for w in part.split(" "))
+        self.regex = re.compile(f"^{regex}$", flags=re.IGNORECASE)
+
+    def fill(self, prompt: str,
+             domain_fn: Optional[DomainFn] = None) -> Optional[Tuple[str, tuple]]:
+        """
+        (sql, params) for a question of this shape, or None if it does not fit.
+        domain_fn(column) returns the known values of a low-cardinality column,
+        keyed by lower case; a value outside it means the question is a
+        different shape. Without a domain, a text value holding a negation or
+        conjunction does too.
+        """
+        m = self.regex.match(_canon(prompt))
+        if m is None:
+            return None
+        params = []
+        for s in self.slots:
+            value = m.group(f"p{s['slot']}").strip()
+            if not value or len(value) > 100:
+                return None
+            if s["column"] and domain_fn is not None:
+                domain = domain_fn(s["column"])
+                if domain is not None:
+                    if value.lower() not in domain:
+                        return None
+                    # the stored spelling, whatever the case in the question ("uk" -> 'UK')
+                    params.append(domain[value.lower()])
+                    continue
+            if s["kind"] == "number":
+                params.append(float(value) if "." in value else int(value))
+            elif _QUALIFIER_RE.search(value):
+                return None
+            else:
+                params.append(s["prefix"] + _CASE_FNS[s["case"]](value) + s["suffix"])
+        return self.sql, tuple(params)
+
+
+def parameterize(prompt: str, sql: str) -> Optional[Tuple[str, str, List[Dict[str, Any]], str]]:
+    """
+    Split a (question, SQL) pair into (pattern, sql with ?, slots, skeleton).
+    Only literals that also appear in the question become parameters; the rest
+    (say 'CLOSED-RISK RELEVANT' for "closed risk relevant") stay part of the
+    shape. Returns None when no literal can be parameterized.
+    """
+    question = _canon(prompt)
+    lowered = question.lower()
+    spans: Dict[str, Tuple[int, int, int]] = {}  # question value (lower) -> (start, end, slot)
+    slots: List[Dict[str, Any]] = []
+    out_sql: List[str] = []
+    last = 0
+    for m in _SQL_LITERAL_RE.finditer(sql):
+        string, number = m.group(1), m.group(2)
+        if string is not None:
+            literal = string.replace("''", "'")
+            core = literal.strip("%")
+            prefix = literal[:len(literal) - len(literal.lstrip("%"))]
+            suffix = literal[len(literal.rstrip("%")):]
+            kind = "string"
+        else:
+            core, prefix, suffix, kind = number, "", "", "number"
+        if not core:
+            continue
+        pos = _find_word(lowered, core.lower())
+        if pos < 0:
+            continue
+        value = question[pos:pos + len(core)]
+        case = next((name for name, fn in _CASE_FNS.items() if fn(value) == core), None)
+        if case is None:
+            continue
+        key = core.lower()
+        if key not in spans:
+            spans[key] = (pos, pos + len(core), len(spans))
+        column = _COMPARED_COLUMN_RE.search(sql, 0, m.start())
+        slots.append({"slot": spans[key][2], "kind": kind, "case": case, "prefix": prefix, "suffix": suffix,
+                      "words": len(core.split()),
+                      "column": column.group(1) if column and not (prefix or suffix) else None})
+        out_sql.append(sql[last:m.start()] + "?")
+        last = m.end()
+    if not slots:
+        return None
+    out_sql.append(sql[last:])
+
+    pattern, skeleton, cursor = "", "", 0
+    for start, end, slot in sorted(spans.values()):
+        if start < cursor:
+            return None  # overlapping values, e.g. "India" inside "British India"
+        pattern += question[cursor:start] + "{" + str(slot) + "}"
+        skeleton += question[cursor:start] + " "
+        cursor = end
+    pattern += question[cursor:]
+    skeleton += question[cursor:]
+    return pattern, "".join(out_sql), slots, skeleton
+
+
+def _find_word(haystack: str, needle: str) -> int:
+    m = re.search(r"(?<!\w)" + re.escape(needle) + r"(?!\w)", haystack)
+    return m.start() if m else -1
+
+
+class TemplateStore:
+    """
+    Thread-safe, size-bounded store of SqlTemplates with a TF-IDF shortlist.
+
+    min_similarity is the cosine score a stored question shape needs before its
+    pattern is even tried; the pattern match itself decides the hit, so raising
+    it trades recall for fewer regex attempts, not precision.
+    """
+
+    def __init__(self, *,
+                 max_templates: int = 2048,
+                 min_similarity: float = 0.35,
+                 candidates: int = 5,
+                 min_fixed_words: int = 2,
+                 domain_fn: Optional[DomainFn] = None):
+        self.max_templates = max_templates
+        self.domain_fn = domain_fn
+        self.min_similarity = min_similarity
+        self.candidates = candidates
+        self.min_fixed_words = min_fixed_words
+        self._lock = threading.Lock()
+        self._templates: "OrderedDict[int, SqlTemplate]" = OrderedDict()
+        self._by_pattern: Dict[str, int] = {}
+        self._vectors: Dict[int, Counter] = {}
+        self._postings: Dict[str, set] = {}
+        self._df: Counter = Counter()
+        self._idf: Dict[str, float] = {}
+        self._norms: Dict[int, float] = {}
+        self._common: set = set()
+        self._dirty = False
+        self._next_id = 1
+        self._counters = {"hits": 0, "misses": 0, "learned": 0, "rejected": 0, "evictions": 0}
+
+    def learn(self, prompt: str, sql: str) -> Optional[SqlTemplate]:
+        """
+        Record the SQL the LLM produced for prompt (call only after it ran
+        successfully). Returns the template, or None if nothing was parameterizable.
+        """
+        parsed = parameterize(prompt, sql)
+        if parsed is None:
+            with self._lock:
+                self._counters["rejected"] += 1
+            return None
+        pattern, template_sql, slots, skeleton = parsed
+        if len(re.findall(r"[a-z0-9]+", skeleton.lower())) < self.min_fixed_words:
+            # "{0}" alone would match any question
+            with self._lock:
+                self._counters["rejected"] += 1
+            return None
+        key = pattern.lower()
+        with self._lock:
+            existing = self._by_pattern.get(key)
+            if existing is not None:
+                self._templates.move_to_end(existing)
+                return self._templates[existing]
+            template = SqlTemplate(self._next_id, pattern, template_sql, slots, skeleton, prompt)
+            self._next_id += 1
+            self._add(template)
+            self._counters["learned"] += 1
+            while len(self._templates) > self.max_templates:
+                self._remove(next(iter(self._templates)))
+                self._counters["evictions"] += 1
+            return template
+
+    def _add(self, template: SqlTemplate) -> None:
+        # caller holds self._lock
+        feats = _features(template.skeleton)
+        self._templates[template.id] = template
+        self._by_pattern[template.pattern.lower()] = template.id
+        self._vectors[template.id] = feats
+        for f in feats:
+            self._postings.setdefault(f, set()).add(template.id)
+            self._df[f] += 1
+        self._dirty = True
+
+    def _remove(self, template_id: int) -> None:
+        template = self._templates.pop(template_id)
+        del self._by_pattern[template.pattern.lower()]
+        for f in self._vectors.pop(template_id):
+            self._postings[f].discard(template_id)
+            self._df[f] -= 1
+            if not self._df[f]:
+                del self._df[f], self._postings[f]
+        self._dirty = True
+
+    def _reweight(self) -> None:
+        # caller holds self._lock; IDF weights and template norms are recomputed
+        # after the template set changed, not on every lookup
+        n = len(self._templates)
+        self._idf = {f: math.log((1 + n) / (1 + df)) + 1.0 for f, df in self._df.items()}
+        self._norms = {tid: math.sqrt(sum((c * self._idf[f]) ** 2 for f, c in vec.items())) or 1.0
+                       for tid, vec in self._vectors.items()}
+        # features in over half the templates barely move the ranking; skip them
+        # in the dot product so common trigrams do not touch every template
+        self._common = {f for f, df in self._df.items() if n >= 8 and df > n / 2}
+        self._dirty = False
+
+    def _shortlist(self, prompt: str) -> List[Tuple[float, SqlTemplate]]:
+        # caller holds self._lock
+        if self._dirty:
+            self._reweight()
+        default_idf = math.log(1 + len(self._templates)) + 1.0
+        qw = {f: c * self._idf.get(f, default_idf) for f, c in _features(prompt).items()}
+        qnorm = math.sqrt(sum(w * w for w in qw.values())) or 1.0
+        dots: Dict[int, float] = {}
+        for f, w in qw.items():
+            if f in self._common or f not in self._postings:
+                continue
+            idf = self._idf[f]
+            for tid in self._postings[f]:
+                dots[tid] = dots.get(tid, 0.0) + w * self._vectors[tid][f] * idf
+        scored = []
+        for tid, dot in dots.items():
+            score = dot / (qnorm * self._norms[tid])
+            if score >= self.min_similarity:
+                scored.append((score, self._templates[tid]))
+        scored.sort(key=lambda st: -st[0])
+        return scored[:self.candidates]
+
+    def match(self, prompt: str) -> Optional[Tuple[str, tuple, SqlTemplate]]:
+        """
+        (sql, params, template) for the best stored shape that fits prompt, or None.
+        """
+        with self._lock:
+            shortlist = self._shortlist(prompt) if self._templates else []
+        for _, template in shortlist:
+            filled = template.fill(prompt, self.domain_fn)
+            if filled is not None:
+                with self._lock:
+                    template.hits += 1
+                    self._counters["hits"] += 1
+                    if template.id in self._templates:
+                        self._templates.move_to_end(template.id)
+                return filled[0], filled[1], template
+        with self._lock:
+            self._counters["misses"] += 1
+        return None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._templates.clear()
+            self._by_pattern.clear()
+            self._vectors.clear()
+            self._postings.clear()
+            self._df.clear()
+            self._dirty = True
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out: Dict[str, Any] = dict(self._counters)
+            out["templates"] = len(self._templates)
+        lookups = out["hits"] + out["misses"]
+        out["hit_ratio"] = round(out["hits"] / lookups, 4) if lookups else 0.0
+        return out
+
+
+# Process-wide store used by db_agent_app.get_user_prompt; AML_SQL_TEMPLATES=0
+# turns template matching off.
+default_templates: Optional[TemplateStore] = None
+if os.getenv("AML_SQL_TEMPLATES", "1") != "0":
+    default_templates = TemplateStore(domain_fn=column_domain)
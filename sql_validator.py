@@ -0,0 +1,395 @@
+"""
+Validation of generated SQL: a tokenizer instead of startswith("select").
+
+A statement is tokenized once (strings, quoted identifiers and comments are
+recognized, so "; DROP" inside a literal is harmless and one after the SELECT
+is not) and must be a single SELECT, optionally behind WITH common table
+expressions. The tables it names must be in an allow-list built from the live
+schema, limited to schema_context's tables (the AML tables and their search
+tables). Parse results are cached by statement hash.
+
+The same allow-list is enforced by SQLite itself through set_authorizer while
+the statement is prepared: only reads of allowed tables and columns are
+permitted, so anything the tokenizer misreads is still refused by the engine.
+The authorizer is installed once per connection and only enforces inside
+authorized(); prepared statements stay in sqlite3's cache, so it costs nothing
+on repeated statements.
+"""
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, FrozenSet, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+from schema_context import is_schema_table
+from text_search import shadow_tables
+
+# Comma-separated "table" or "table.column" entries removed from the allow-list.
+DENY_LIST = os.getenv("AML_SQL_DENY", "")
+
+_TOKEN_RE = re.compile(r"""
+    (?P<space>\s+)
+  | (?P<comment>--[^\n]*|/\*.*?\*/)
+  | (?P<string>[xX]?'(?:[^']|'')*')
+  | (?P<quoted>"(?:[^"]|"")*"|`(?:[^`]|``)*`|\[[^\]]*\])
+  | (?P<number>0[xX][0-9a-fA-F]+|(?:\d+(?:\.\d*)?|\.\d+)(?:[eE][-+]?\d+)?)
+  | (?P<word>[A-Za-z_][A-Za-z0-9_$]*)
+  | (?P<param>[?][0-9]*|[:@$][A-Za-z0-9_]+)
+  | (?P<op>->>|->|\|\||<<|>>|<=|>=|==|!=|<>|[-+*/%&|~<>=(),.;])
+""", re.VERBOSE | re.DOTALL)
+
+# Keywords that end a FROM clause at its nesting level.
+_FROM_END = {"WHERE", "GROUP", "HAVING", "ORDER", "LIMIT", "WINDOW", "UNION", "INTERSECT", "EXCEPT"}
+# Column names SQLite reports for the implicit rowid.
+_ROWID_NAMES = {"rowid", "oid", "_rowid_"}
+_FTS_RE = re.compile(r"\s*CREATE\s+VIRTUAL\s+TABLE\b.*\bUSING\s+fts[345]\b", re.IGNORECASE | re.DOTALL)
+# FTS5 reads its shadow tables with statements of its own, prepared (and so
+# authorized) while a MATCH query runs; statements cannot name them directly.
+_FTS_SHADOW_TABLES = {name.lower() for name in shadow_tables()}
+_ALLOWED_ACTIONS = {sqlite3.SQLITE_SELECT, sqlite3.SQLITE_FUNCTION, sqlite3.SQLITE_RECURSIVE}
+
+
+class Token(NamedTuple):
+    kind: str   # word, quoted, string, number, param or op
+    value: str  # identifier text without quotes for quoted names
+
+
+class ParsedStatement(NamedTuple):
+    sql: str                   # the statement without a trailing semicolon
+    tables: FrozenSet[str]     # tables it reads, lower-cased
+    ctes: FrozenSet[str]       # names of its common table expressions, lower-cased
+    error: Optional[str] = None
+
+
+def token_spans(sql: str) -> List[Tuple[Token, int, int]]:
+    """
+    (token, start, end) for every token of sql, dropping whitespace and
+    comments. Raises ValueError on text that is not SQL (an unterminated
+    string, a stray character).
+    """
+    spans = []
+    pos = 0
+    while pos < len(sql):
+        m = _TOKEN_RE.match(sql, pos)
+        if m is None:
+            snippet = sql[pos:pos + 10]
+            if snippet[0] in "'\"`[" or sql.startswith("/*", pos):
+                raise ValueError(f"Unterminated string, identifier or comment at: {snippet!r}")
+            raise ValueError(f"Unexpected character at: {snippet!r}")
+        kind = m.lastgroup
+        if kind == "quoted":
+            text = m.group()
+            token = Token("quoted", text[1:-1].replace(text[0] * 2, text[0]) if text[0] != "[" else text[1:-1])
+            spans.append((token, m.start(), m.end()))
+        elif kind not in ("space", "comment"):
+            spans.append((Token(kind, m.group()), m.start(), m.end()))
+        pos = m.end()
+    return spans
+
+
+def tokenize(sql: str) -> List[Token]:
+    """
+    Split sql into tokens, dropping whitespace and comments; see token_spans.
+    """
+    return [token for token, _, _ in token_spans(sql)]
+
+
+def _is_name(token: Token) -> bool:
+    return token.kind in ("word", "quoted")
+
+
+def _skip_parens(tokens: List[Token], i: int) -> int:
+    # tokens[i] is "("; return the index after its matching ")"
+    depth = 0
+    while i < len(tokens):
+        if tokens[i] == ("op", "("):
+            depth += 1
+        elif tokens[i] == ("op", ")"):
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    raise ValueError("Unbalanced parentheses.")
+
+
+def _parse_with(tokens: List[Token], i: int) -> Tuple[Set[str], int]:
+    """
+    Names of the CTEs of the WITH clause at tokens[i], and the index of the
+    statement that follows the clause.
+    """
+    names = set()
+    i += 1
+    if i < len(tokens) and tokens[i].value.upper() == "RECURSIVE":
+        i += 1
+    while True:
+        if i >= len(tokens) or not _is_name(tokens[i]):
+            raise ValueError("Expected a name in the WITH clause.")
+        names.add(tokens[i].value.lower())
+        i += 1
+        if i < len(tokens) and tokens[i] == ("op", "("):
+            i = _skip_parens(tokens, i)  # column list
+        if i >= len(tokens) or tokens[i].value.upper() != "AS":
+            raise ValueError("Expected AS in the WITH clause.")
+        i += 1
+        while i < len(tokens) and tokens[i].value.upper() in ("NOT", "MATERIALIZED"):
+            i += 1
+        if i >= len(tokens) or tokens[i] != ("op", "("):
+            raise ValueError("Expected a parenthesized query in the WITH clause.")
+        i = _skip_parens(tokens, i)
+        if i < len(tokens) and tokens[i] == ("op", ","):
+            i += 1
+            continue
+        return names, i
+
+
+def _referenced_tables(tokens: List[Token]) -> Tuple[Set[str], Set[str]]:
+    """
+    (tables, cte names) named anywhere in the statement: the targets of FROM
+    and JOIN and the comma-separated items of a FROM clause or of a
+    parenthesized join list inside it, at every depth.
+    Table-valued functions (FROM json_each(...)) and subqueries are skipped.
+    """
+    tables: Set[str] = set()
+    ctes: Set[str] = set()
+    in_from: Set[int] = set()  # nesting depths currently inside a FROM clause
+    depth = 0
+    expect_table = False
+    i = 0
+    while i < len(tokens):
+        tok = tokens[i]
+        upper = tok.value.upper() if tok.kind == "word" else None
+        if expect_table:
+            expect_table = False
+            if _is_name(tok):
+                name = tok.value
+                j = i + 1
+                if j + 1 < len(tokens) and tokens[j] == ("op", ".") and _is_name(tokens[j + 1]):
+                    if name.lower() != "main":
+                        raise ValueError(f"Schema '{name}' is not allowed.")
+                    name = tokens[j + 1].value
+                    j += 2
+                if not (j < len(tokens) and tokens[j] == ("op", "(")):
+                    tables.add(name.lower())
+                i = j
+                continue
+            if tok == ("op", "(") and i + 1 < len(tokens) \
+                    and tokens[i + 1].value.upper() not in ("SELECT", "WITH", "VALUES"):
+                # a parenthesized join list: FROM (a, b), FROM (a JOIN b ON ...)
+                depth += 1
+                in_from.add(depth)
+                expect_table = True
+                i += 1
+                continue
+        if tok == ("op", "("):
+            depth += 1
+        elif tok == ("op", ")"):
+            in_from.discard(depth)
+            depth -= 1
+        elif upper == "WITH":
+            ctes |= _parse_with(tokens, i)[0]
+        elif upper in ("FROM", "JOIN"):
+            # "a IS DISTINCT FROM b" compares values, it names no table
+            if not (upper == "FROM" and i > 0 and tokens[i - 1].value.upper() == "DISTINCT"):
+                in_from.add(depth)
+                expect_table = True
+        elif upper in _FROM_END:
+            in_from.discard(depth)
+        elif tok == ("op", ",") and depth in in_from:
+            expect_table = True
+        i += 1
+    return tables, ctes
+
+
+def parse_select(sql: str) -> ParsedStatement:
+    """
+    Tokenize and check sql: exactly one statement, a SELECT or WITH ... SELECT.
+    Problems are reported in .error rather than raised.
+    """
+    try:
+        tokens = tokenize(sql)
+        while tokens and tokens[-1] == ("op", ";"):
+            tokens.pop()
+        if not tokens:
+            raise ValueError("Empty statement.")
+        if ("op", ";") in tokens:
+            raise ValueError("Only one statement is allowed.")
+        first = tokens[0].value.upper()
+        if first == "WITH":
+            _, main = _parse_with(tokens, 0)
+            first = tokens[main].value.upper() if main < len(tokens) else ""
+        if first != "SELECT":
+            raise ValueError("Only SELECT statements are allowed for safety.")
+        tables, ctes = _referenced_tables(tokens)
+    except ValueError as e:
+        return ParsedStatement(sql, frozenset(), frozenset(), str(e))
+    return ParsedStatement(sql.strip().rstrip(";").rstrip(), frozenset(tables), frozenset(ctes))
+
+
+class SqlValidator:
+    """
+    Parse cache, schema allow-list and SQLite authorizer for generated SQL.
+
+    The allow-list is every user table and its columns, minus hidden
+    bookkeeping tables and the deny list ("table" or "table.column" entries),
+    rebuilt when the database's PRAGMA schema_version changes.
+    """
+
+    def __init__(self, *, deny: str = DENY_LIST, max_cached: int = 4096,
+                 max_connections: int = 256):
+        self.max_cached = max_cached
+        self.max_connections = max_connections
+        self._deny_tables: Set[str] = set()
+        self._deny_columns: Set[Tuple[str, str]] = set()
+        for entry in filter(None, (e.strip().lower() for e in deny.split(","))):
+            table, _, column = entry.partition(".")
+            if column:
+                self._deny_columns.add((table, column))
+            else:
+                self._deny_tables.add(table)
+        self._lock = threading.Lock()
+        self._parsed: Dict[bytes, ParsedStatement] = {}
+        self._allowed: Dict[Tuple[str, int], Dict[str, Set[str]]] = {}
+        # id(conn) -> (conn, database file) for connections with the authorizer installed
+        self._connections: Dict[int, Tuple[sqlite3.Connection, str]] = {}
+        # per thread: the allow-list (and CTE names) while inside authorized(), else None
+        self._local = threading.local()
+        self._counters = {"parsed": 0, "cache_hits": 0, "rejected": 0, "denied": 0}
+
+    def parse(self, sql: str) -> ParsedStatement:
+        key = hashlib.blake2b(sql.encode("utf-8"), digest_size=16).digest()
+        with self._lock:
+            parsed = self._parsed.get(key)
+            if parsed is not None:
+                self._counters["cache_hits"] += 1
+                return parsed
+        parsed = parse_select(sql)
+        with self._lock:
+            self._counters["parsed"] += 1
+            if len(self._parsed) >= self.max_cached:
+                self._parsed.pop(next(iter(self._parsed)))
+            self._parsed[key] = parsed
+        return parsed
+
+    def _db_file(self, conn: sqlite3.Connection) -> str:
+        with self._lock:
+            entry = self._connections.get(id(conn))
+        if entry is not None and entry[0] is conn:
+            return entry[1]
+        db_file = conn.execute("PRAGMA database_list").fetchone()[2]
+        # Installed once per connection: setting an authorizer expires every
+        # prepared statement, so toggling it per query would defeat the cache.
+        conn.set_authorizer(self._authorize)
+        with self._lock:
+            if len(self._connections) >= self.max_connections:
+                self._connections.pop(next(iter(self._connections)))
+            # holding conn keeps its id from being reused while it is listed
+            self._connections[id(conn)] = (conn, db_file)
+        return db_file
+
+    def allowed(self, conn: sqlite3.Connection) -> Dict[str, Set[str]]:
+        """
+        {table: columns} the statements on conn may read, all lower-cased.
+        """
+        db_file = self._db_file(conn)
+        version = conn.execute("PRAGMA schema_version").fetchone()[0]
+        key = (db_file, version)
+        with self._lock:
+            allowed = self._allowed.get(key)
+        if allowed is not None:
+            return allowed
+        allowed = {}
+        for name, sql in conn.execute(
+                "SELECT name, sql FROM sqlite_master WHERE type IN ('table', 'view') AND name NOT LIKE 'sqlite_%'"):
+            table = name.lower()
+            if not is_schema_table(name) or table in self._deny_tables:
+                continue
+            columns = {r[1].lower() for r in conn.execute(f'PRAGMA table_info("{name}")')}
+            if _FTS_RE.match(sql or ""):
+                columns |= {table, "rank"}  # the hidden columns MATCH and ORDER BY rank read
+            allowed[table] = {c for c in columns if (table, c) not in self._deny_columns} | _ROWID_NAMES
+        with self._lock:
+            self._allowed = {k: v for k, v in self._allowed.items() if k[0] != db_file}
+            self._allowed[key] = allowed
+        return allowed
+
+    def validate(self, conn: sqlite3.Connection, sql: str,
+                 allowed: Optional[Dict[str, Set[str]]] = None) -> ParsedStatement:
+        """
+        The parsed statement, with .error set when it is not a single SELECT or
+        names a table outside the allow-list of conn's database. A caller that
+        already holds allowed(conn) can pass it in.
+        """
+        parsed = self.parse(sql)
+        if parsed.error is None:
+            allowed = allowed if allowed is not None else self.allowed(conn)
+            unknown = sorted(parsed.tables - parsed.ctes - allowed.keys())
+            if unknown:
+                parsed = parsed._replace(error=f"Table '{unknown[0]}' is not allowed.")
+        if parsed.error is not None:
+            with self._lock:
+                self._counters["rejected"] += 1
+        return parsed
+
+    def _authorize(self, action, arg1, arg2, db_name, source) -> int:
+        allowed = getattr(self._local, "allowed", None)
+        if allowed is None:
+            return sqlite3.SQLITE_OK  # outside authorized(): the app's own statements
+        if action in _ALLOWED_ACTIONS:
+            return sqlite3.SQLITE_OK
+        # db_name is None for the table-level read of an optimized COUNT(*)
+        if action == sqlite3.SQLITE_READ and db_name in ("main", None):
+            table = (arg1 or "").lower()
+            columns = allowed.get(table)
+            if columns is not None and (not arg2 or arg2.lower() in columns) or table in _FTS_SHADOW_TABLES:
+                return sqlite3.SQLITE_OK
+            # a materialized or recursive CTE is read like a table, with no database name
+            if db_name is None and table in self._local.ctes:
+                return sqlite3.SQLITE_OK
+        self._local.denied.append(f"{arg1}.{arg2}" if action == sqlite3.SQLITE_READ else f"action {action}")
+        return sqlite3.SQLITE_DENY
+
+    @contextmanager
+    def authorized(self, conn: sqlite3.Connection,
+                   allowed: Optional[Dict[str, Set[str]]] = None,
+                   ctes: FrozenSet[str] = frozenset()) -> Iterator[List[str]]:
+        """
+        Let statements prepared on conn inside the block read only allowed
+        tables and columns, plus the common table expressions named in ctes
+        (ParsedStatement.ctes). Yields a list that collects "table.column" for
+        every denied access.
+
+        The authorizer runs when SQLite prepares a statement, so a statement
+        sqlite3 already holds in its cache runs without another check.
+        """
+        if allowed is None:
+            allowed = self.allowed(conn)
+        if ctes:
+            # a CTE named after a table outside the allow-list could stand in for
+            # that table in another scope of the statement, so it is not let through
+            marks = ", ".join("?" * len(ctes))
+            ctes = ctes - {r[0] for r in conn.execute(
+                f"SELECT lower(name) FROM sqlite_master WHERE lower(name) IN ({marks})", tuple(ctes))
+                if r[0] not in allowed}
+        denied: List[str] = []
+        self._local.allowed = allowed
+        self._local.ctes = ctes
+        self._local.denied = denied
+        try:
+            yield denied
+        finally:
+            self._local.allowed = None
+            if denied:
+                with self._lock:
+                    self._counters["denied"] += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            out = dict(self._counters)
+            out["cached"] = len(self._parsed)
+        return out
+
+
+# Process-wide validator used by db_agent_app for generated and "sql:" statements.
+default_validator = SqlValidator()
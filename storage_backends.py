@@ -0,0 +1,370 @@
+"""
+Storage engines for generated SELECTs: SQLite, the system of record, and an
+optional embedded columnar engine, DuckDB over the Parquet export written by
+parquet_export.py. Both run in-process; DuckDB reads the Parquet files
+directly, with no server.
+
+SQLite answers everything by default (AML_STORAGE=sqlite). With
+AML_STORAGE=auto the QueryRouter sends scan-heavy statements to DuckDB, whose
+vectorized column scans make a GROUP BY over millions of rows many times
+faster, and keeps point lookups and index searches on SQLite;
+AML_STORAGE=duckdb sends every statement DuckDB can take. Either way a
+statement only goes to DuckDB when
+
+  - its tables were all exported and the export is current: the data
+    versions recorded in the Parquet manifest (change_tracking) still match
+    the database, so both engines see the same rows;
+  - it only uses SQL both engines read the same way (see portable()): no
+    LIKE (case-insensitive in SQLite, not in DuckDB), no integer division, no
+    date functions, whose signatures differ, no text column compared with a
+    number, and so on;
+  - no column of those tables is on the validator's deny list, because the
+    SQLite authorizer does not watch DuckDB.
+
+A statement DuckDB fails on is run on SQLite after all. Results carry the
+column names SQLite gives them, whichever engine ran the statement; only the
+order of rows a statement does not ORDER BY may differ.
+"""
+import json
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from change_tracking import table_versions
+from query_guard import QueryRejected
+from sql_validator import ParsedStatement, token_spans
+
+try:
+    import duckdb
+except ImportError:  # optional analytical engine
+    duckdb = None
+
+# sqlite (default), auto (route per statement) or duckdb (prefer DuckDB).
+STORAGE_MODE = os.getenv("AML_STORAGE", "sqlite").lower()
+PARQUET_DIR = os.getenv("AML_PARQUET_DIR", os.path.join(os.path.dirname(__file__), "parquet"))
+MANIFEST_NAME = "manifest.json"
+# Estimated row visits (query_guard) from which auto routes a statement to DuckDB.
+DUCKDB_MIN_COST = float(os.getenv("AML_DUCKDB_MIN_COST", "200000"))
+# 0 keeps DuckDB's default of one thread per core.
+DUCKDB_THREADS = int(os.getenv("AML_DUCKDB_THREADS", "0"))
+DUCKDB_MEMORY_LIMIT = os.getenv("AML_DUCKDB_MEMORY_LIMIT", "")
+
+# Functions SQLite and DuckDB define alike for the text columns of the AML tables
+# (not lower/upper: SQLite folds ASCII letters only).
+_PORTABLE_FUNCTIONS = {"count", "sum", "avg", "min", "max", "substr", "substring", "length",
+                       "trim", "ltrim", "rtrim", "coalesce", "ifnull", "nullif", "abs", "replace"}
+# Words followed by a parenthesis that are not function calls.
+_KEYWORDS_BEFORE_PAREN = {"in", "exists", "as", "values", "and", "or", "not", "on", "from", "join",
+                          "select", "when", "then", "else", "by", "distinct", "all", "union", "using"}
+# SQLite's rowid aliases, which the Parquet export has no column for.
+_ROWID_NAMES = {"rowid", "oid", "_rowid_"}
+# Words and operators whose meaning differs between the engines.
+_UNPORTABLE_WORDS = _ROWID_NAMES | {"like", "glob", "regexp", "match", "collate", "cast",
+                                    "indexed", "over", "filter", "recursive"}
+_UNPORTABLE_OPS = {"/", "%", "->", "->>", "<<", ">>", "&", "|", "~"}
+_COMPARISONS = {"=", "==", "!=", "<>", "<", ">", "<=", ">="}
+
+
+def portable(sql: str) -> bool:
+    """
+    Whether sql reads the same on SQLite and DuckDB, judged conservatively
+    from its tokens: when in doubt, it stays on SQLite.
+    """
+    try:
+        spans = token_spans(sql)
+    except ValueError:
+        return False
+    for i, (token, start, _) in enumerate(spans):
+        following = spans[i + 1][0] if i + 1 < len(spans) else None
+        if token.kind == "word":
+            word = token.value.lower()
+            if word in _UNPORTABLE_WORDS:
+                return False
+            if following == ("op", "(") and word not in _PORTABLE_FUNCTIONS | _KEYWORDS_BEFORE_PAREN:
+                return False
+            if word == "limit" and i + 2 < len(spans) and spans[i + 2][0] == ("op", ","):
+                return False  # LIMIT offset, count
+        elif token.kind == "op" and token.value in _UNPORTABLE_OPS:
+            return False
+        elif token.kind == "number" and (following is not None and following.value in _COMPARISONS
+                                         or i >= 2 and spans[i - 1][0].value in _COMPARISONS
+                                         and spans[i - 2][0] != ("op", ")")):
+            # SQLite compares a text column with a number as text, DuckDB casts
+            # the column; a function result (COUNT(*) > 5) is a number in both
+            return False
+        elif token.kind == "quoted" and sql[start] != '"':
+            return False  # `name` and [name] are SQLite-only
+        elif token.kind == "string" and sql[start] in "xX":
+            return False  # blob literal
+        elif token.kind == "param" and token.value != "?":
+            return False
+    return True
+
+
+def _without_rows(sql: str, params: tuple) -> Tuple[str, tuple]:
+    """
+    sql with its own LIMIT set to 0, and the params left for it. Unlike a
+    SELECT * FROM (sql) wrapper, this keeps the names SQLite gives the
+    statement's columns, duplicates included.
+    """
+    depth = 0
+    for i, (token, start, _) in enumerate(token_spans(sql)):
+        if token.kind == "op" and token.value in ("(", ")"):
+            depth += 1 if token.value == "(" else -1
+        elif depth == 0 and token.kind == "word" and token.value.lower() == "limit":
+            # the outer LIMIT ends the statement: drop its own parameters
+            dropped = sum(1 for t, _, _ in token_spans(sql[start:]) if t.kind == "param")
+            return sql[:start] + "LIMIT 0", params[:len(params) - dropped]
+    return sql + "\nLIMIT 0", params
+
+
+def read_manifest(parquet_dir: str = PARQUET_DIR) -> Optional[Dict[str, Any]]:
+    """
+    The manifest of the current export in parquet_dir, or None without one.
+    """
+    try:
+        with open(os.path.join(parquet_dir, MANIFEST_NAME), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+class StorageBackend:
+    """
+    An engine other than SQLite that validated SELECTs can be sent to.
+    SQLite itself is run_select in db_agent_app: the authorizer, the guard
+    and the rollup rewriter all work on its connection.
+    """
+
+    name = "base"
+
+    def serves(self, conn: sqlite3.Connection, tables: Set[str], allowed: Dict[str, Set[str]]) -> bool:
+        """
+        Whether statements over tables (lower-cased) can run here and see what
+        the SQLite database of conn holds, for a caller bound by allowed.
+        """
+        raise NotImplementedError
+
+    def execute(self, sql: str, params: tuple = (), *, max_rows: int = 0,
+                timeout: float = 0) -> Tuple[List[str], List[tuple], bool]:
+        """
+        Column names, at most max_rows rows (0: all) and whether more were cut
+        off. Raises QueryRejected past timeout seconds (0: no limit).
+        """
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+
+class DuckDBBackend(StorageBackend):
+    """
+    DuckDB over the Parquet export in parquet_dir. Each thread gets an
+    in-memory DuckDB connection with one view per exported table; the views
+    follow the manifest, so a new export is picked up by the next statement.
+    """
+
+    name = "duckdb"
+
+    def __init__(self, parquet_dir: str = PARQUET_DIR, *,
+                 threads: int = DUCKDB_THREADS, memory_limit: str = DUCKDB_MEMORY_LIMIT):
+        if duckdb is None:
+            raise RuntimeError("The DuckDB backend needs the duckdb package (pip install duckdb).")
+        self.parquet_dir = os.path.abspath(parquet_dir)
+        self.threads = threads
+        self.memory_limit = memory_limit
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._manifest: Optional[Dict[str, Any]] = None
+        self._manifest_mtime: Optional[int] = None
+        self._counters = {"executed": 0, "failed": 0, "timeouts": 0, "truncated": 0}
+
+    def manifest(self) -> Optional[Dict[str, Any]]:
+        """
+        The current manifest, re-read when the file changes.
+        """
+        try:
+            mtime = os.stat(os.path.join(self.parquet_dir, MANIFEST_NAME)).st_mtime_ns
+        except OSError:
+            return None
+        with self._lock:
+            if mtime == self._manifest_mtime:
+                return self._manifest
+        manifest = read_manifest(self.parquet_dir)
+        with self._lock:
+            self._manifest, self._manifest_mtime = manifest, mtime
+        return manifest
+
+    def serves(self, conn: sqlite3.Connection, tables: Set[str], allowed: Dict[str, Set[str]]) -> bool:
+        manifest = self.manifest()
+        if manifest is None or not tables:
+            return False
+        exported = {name.lower(): entry for name, entry in manifest["tables"].items()}
+        versions = table_versions(conn)
+        if versions is None:
+            return False  # without data versions the export cannot be shown current
+        for table in tables:
+            entry = exported.get(table)
+            if entry is None or versions.get(table) != entry["data_version"]:
+                return False
+            # a column added since the export, or one on the deny list, keeps it on SQLite
+            if {c.lower() for c in entry["columns"]} != (allowed.get(table) or set()) - _ROWID_NAMES:
+                return False
+        return True
+
+    def _connection(self, manifest: Dict[str, Any]):
+        # the calling thread's connection, with views for the given manifest
+        local = self._local
+        if getattr(local, "conn", None) is None:
+            config = {"default_null_order": "nulls_first_on_asc_last_on_desc"}  # as SQLite sorts NULL
+            if self.threads:
+                config["threads"] = str(self.threads)
+            if self.memory_limit:
+                config["memory_limit"] = self.memory_limit
+            local.conn = duckdb.connect(":memory:", config=config)
+            local.generation = None
+        if local.generation != manifest["generation"]:
+            for name, entry in manifest["tables"].items():
+                files = os.path.join(self.parquet_dir, entry["path"], "**", "*.parquet").replace("'", "''")
+                columns = ", ".join(f'"{c}"' for c in entry["columns"])
+                local.conn.execute(f'CREATE OR REPLACE VIEW "{name}" AS SELECT {columns} '
+                                   f"FROM read_parquet('{files}', hive_partitioning = false)")
+            local.generation = manifest["generation"]
+        return local.conn
+
+    def execute(self, sql: str, params: tuple = (), *, max_rows: int = 0,
+                timeout: float = 0) -> Tuple[List[str], List[tuple], bool]:
+        manifest = self.manifest()
+        if manifest is None:
+            raise RuntimeError(f"No Parquet export in {self.parquet_dir}.")
+        conn = self._connection(manifest)
+        timer = threading.Timer(timeout, conn.interrupt) if timeout else None
+        if timer is not None:
+            timer.start()
+        try:
+            conn.execute(sql, list(params))
+            col_names = [d[0] for d in conn.description] if conn.description else []
+            rows = conn.fetchmany(max_rows + 1) if max_rows else conn.fetchall()
+        except duckdb.InterruptException:
+            with self._lock:
+                self._counters["timeouts"] += 1
+            raise QueryRejected(f"Query exceeded the {timeout:g}s time limit.")
+        except duckdb.Error:
+            with self._lock:
+                self._counters["failed"] += 1
+            raise
+        finally:
+            if timer is not None:
+                timer.cancel()
+        truncated = bool(max_rows) and len(rows) > max_rows
+        if truncated:
+            del rows[max_rows:]
+        with self._lock:
+            self._counters["executed"] += 1
+            self._counters["truncated"] += truncated
+        return col_names, rows, truncated
+
+    def stats(self) -> Dict[str, Any]:
+        manifest = self.manifest()
+        with self._lock:
+            out: Dict[str, Any] = dict(self._counters)
+        out["export"] = {"generation": manifest["generation"], "exported_at": manifest["exported_at"]} \
+            if manifest else None
+        return out
+
+
+class QueryRouter:
+    """
+    Picks the engine for each validated statement: a backend, or None for
+    SQLite. mode is auto (scan-heavy statements by query_guard's estimate of
+    their row visits) or duckdb (every statement the backend can take).
+    """
+
+    def __init__(self, backend: StorageBackend, *, mode: str = "auto", min_cost: float = DUCKDB_MIN_COST):
+        if mode not in ("auto", "duckdb"):
+            raise ValueError(f"Unknown routing mode {mode!r}.")
+        self.backend = backend
+        self.mode = mode
+        self.min_cost = min_cost
+        self._lock = threading.Lock()
+        self._portable: Dict[str, bool] = {}
+        self._counters = {"sqlite": 0, backend.name: 0, "not_portable": 0, "not_current": 0, "fallbacks": 0}
+
+    def _is_portable(self, sql: str) -> bool:
+        with self._lock:
+            known = self._portable.get(sql)
+        if known is None:
+            known = portable(sql)
+            with self._lock:
+                if len(self._portable) >= 4096:
+                    self._portable.pop(next(iter(self._portable)))
+                self._portable[sql] = known
+        return known
+
+    def _pick(self, conn: sqlite3.Connection, parsed: ParsedStatement, allowed: Dict[str, Set[str]],
+              params: tuple, guard) -> Optional[str]:
+        # why the statement stays on SQLite, or None to send it to the backend
+        if not self._is_portable(parsed.sql) or any(not isinstance(p, str) for p in params):
+            return "not_portable"  # a number parameter is the text-against-number case again
+        if not self.backend.serves(conn, set(parsed.tables - parsed.ctes), allowed):
+            return "not_current"
+        if self.mode == "auto":
+            try:
+                cost, _ = guard.estimate(conn, parsed.sql, params) if guard is not None else (0.0, None)
+            except sqlite3.Error:
+                cost = 0.0
+            if cost < self.min_cost:
+                return "sqlite"
+        return None
+
+    def execute(self, conn: sqlite3.Connection, parsed: ParsedStatement, allowed: Dict[str, Set[str]],
+                params: tuple = (), guard=None) -> Optional[Tuple[List[str], List[tuple], bool]]:
+        """
+        Run a validated statement on the backend when it should go there:
+        (column names, rows, truncated) within the guard's row cap and
+        deadline. None leaves it to SQLite, including when the backend fails
+        on it. conn is the SQLite connection the statement was validated on.
+        """
+        reason = self._pick(conn, parsed, allowed, params, guard)
+        if reason is None:
+            try:
+                _, rows, truncated = self.backend.execute(parsed.sql, params,
+                                                          max_rows=guard.max_rows if guard is not None else 0,
+                                                          timeout=guard.timeout if guard is not None else 0)
+                # SQLite's names for the columns, so both engines label results
+                # alike; LIMIT 0 stops it before it reads a row
+                cur = conn.execute(*_without_rows(parsed.sql, params))
+                col_names = [d[0] for d in cur.description]
+            except QueryRejected:
+                raise
+            except Exception:
+                reason = "fallbacks"
+            else:
+                with self._lock:
+                    self._counters[self.backend.name] += 1
+                return col_names, rows, truncated
+        with self._lock:
+            self._counters["sqlite"] += 1
+            if reason != "sqlite":
+                self._counters[reason] += 1
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out: Dict[str, Any] = dict(self._counters)
+        out["mode"] = self.mode
+        out["backend"] = self.backend.stats()
+        return out
+
+
+def _default_router() -> Optional[QueryRouter]:
+    if STORAGE_MODE == "sqlite":
+        return None
+    if duckdb is None:
+        raise RuntimeError(f"AML_STORAGE={STORAGE_MODE} needs the duckdb package (pip install duckdb).")
+    return QueryRouter(DuckDBBackend(), mode=STORAGE_MODE)
+
+
+# Process-wide router used by db_agent_app; None (AML_STORAGE=sqlite) keeps every statement on SQLite.
+default_router: Optional[QueryRouter] = _default_router()
@@ -0,0 +1,27 @@
+import os
+import shutil
+import sqlite3
+
+import pytest
+
+SAMPLE_DB = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "sample_data.db")
+
+
+@pytest.fixture
+def sample_db(tmp_path):
+    """
+    Path of a copy of sample_data.db with every schema migration applied.
+    """
+    from db_schema import ensure_schema_once
+
+    path = str(tmp_path / "sample.db")
+    shutil.copyfile(SAMPLE_DB, path)
+    ensure_schema_once(path)
+    return path
+
+
+@pytest.fixture
+def sample_conn(sample_db):
+    conn = sqlite3.connect(sample_db)
+    yield conn
+    conn.close()
@@ -0,0 +1,36 @@
+import csv
+import sqlite3
+
+from bulk_loader import load_files
+
+
+def test_counts_into_a_non_empty_table_leave_out_trigger_writes(sample_db, tmp_path):
+    conn = sqlite3.connect(sample_db)
+    columns = [r[1] for r in conn.execute("PRAGMA table_info(AMLcase)")]
+    stored = conn.execute("SELECT * FROM AMLcase LIMIT 1").fetchone()
+    conn.close()
+    path = tmp_path / "cases.csv"
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        writer.writerow(stored)
+        writer.writerow(("NEWCASE1",) + stored[1:])
+    stats = load_files([str(path)], sample_db)
+    assert (stats["inserted"], stats["duplicates"]) == (1, 1)
+    assert stats["tables"] == {"AMLcase": 1}
+
+
+def test_only_csv_reads_an_empty_field_as_null(sample_db, tmp_path):
+    cases = tmp_path / "cases.csv"
+    cases.write_text("CASE_ID,customer,create_date,Analyst,AAA_Status\n"
+                     "CSVCASE1,Ann,2024-01-02,,\n", encoding="utf-8")
+    records = tmp_path / "cases.ndjson"
+    records.write_text('{"CASE_ID": "JSONCASE1", "customer": "Ann", "create_date": "2024-01-02", '
+                      '"Analyst": "", "AAA_Status": null}\n', encoding="utf-8")
+    stats = load_files([str(cases), str(records)], sample_db)
+    assert stats["inserted"] == 2
+    conn = sqlite3.connect(sample_db)
+    rows = conn.execute("SELECT CASE_ID, Analyst, AAA_Status FROM AMLcase "
+                        "WHERE CASE_ID IN ('CSVCASE1', 'JSONCASE1') ORDER BY CASE_ID").fetchall()
+    conn.close()
+    assert rows == [("CSVCASE1", None, None), ("JSONCASE1", "", None)]
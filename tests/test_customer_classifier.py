@@ -0,0 +1,54 @@
+import customer_classifier
+
+
+def _rules(prompt: str) -> dict:
+    lines = customer_classifier.extract_attributes_via_rules(prompt).splitlines()
+    return dict(line.split(" = ", 1) for line in lines)
+
+
+def test_rel_id_digits_do_not_imply_phone_number():
+    out = _rules("email for rel id 1234567")
+    assert out["Rel ID"] == "1234567"
+    assert out["ICM attribute"] == "[email]"
+
+
+def test_phone_number_value_still_implies_the_attribute():
+    assert _rules("who has +65 6123 4567")["ICM attribute"] == "[phone_number]"
+
+
+def test_iso_date_implies_date_of_birth_only():
+    out = _rules("born 1990-01-31")
+    assert out["EBBS attribute"] == "[date_of_birth]"
+    assert out["ICM attribute"] == "[]"
+
+
+def test_words_inside_an_email_are_not_unknown_attributes():
+    out = _rules("customer with john_doe@example.com")
+    assert out["ICM attribute"] == "[email]"
+    assert out["UNKNOWN attribute"] == "[]"
+
+
+def test_underscore_words_outside_values_are_unknown():
+    assert _rules("email and account_type for rel id 7")["UNKNOWN attribute"] == "[account_type]"
+
+
+def test_attribute_nouns_the_rules_do_not_cover_keep_the_prompt_off_the_local_tier():
+    threshold = customer_classifier.LOCAL_CONFIDENCE_THRESHOLD
+    for prompt in ("email and phone for rel_id REL-1",
+                   "email and home address for rel id 7",
+                   "show age, date of birth and mobile number",
+                   "email and surname"):
+        assert customer_classifier.classify_locally(prompt)[1] < threshold, prompt
+
+
+def test_only_prompts_with_a_rel_id_reach_the_default_threshold():
+    threshold = customer_classifier.LOCAL_CONFIDENCE_THRESHOLD
+    assert customer_classifier.classify_locally("email and age for rel id 7")[1] >= threshold
+    assert customer_classifier.classify_locally("email and age")[1] < threshold
+
+
+def test_local_answer_has_the_llm_output_shape():
+    output, tier = customer_classifier.extract_attributes_routed("email and age for rel id 1234567")
+    assert tier == "local"
+    assert customer_classifier._is_complete_llm_output(output)
+    assert _rules("email for rel id 1234567")["Customer ID"] == ""
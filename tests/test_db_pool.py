@@ -0,0 +1,26 @@
+import os
+
+from db_pool import ReadOnlyPool
+
+
+def test_pool_leaves_the_journal_mode_alone(sample_db):
+    with open(sample_db, "rb") as f:
+        header = f.read(100)
+    pool = ReadOnlyPool(sample_db)
+    try:
+        with pool.connection() as conn:
+            assert conn.execute("PRAGMA journal_mode").fetchone()[0] != "wal"
+    finally:
+        pool.close()
+    with open(sample_db, "rb") as f:
+        assert f.read(100) == header
+    assert not os.path.exists(sample_db + "-wal")
+
+
+def test_pool_switches_to_wal_on_request(sample_db):
+    pool = ReadOnlyPool(sample_db, enable_wal=True)
+    try:
+        with pool.connection() as conn:
+            assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    finally:
+        pool.close()
@@ -0,0 +1,29 @@
+import pytest
+
+import llm_client
+
+
+def test_ollama_model_replaces_only_the_openai_defaults():
+    backend = llm_client.OllamaBackend(model="big")
+    assert backend._model("gpt-3.5-turbo") == "big"
+    assert backend._model("small") == "small"
+    assert llm_client.OllamaBackend(model="")._model("gpt-4o") == "gpt-4o"
+
+
+def test_route_model_reaches_the_server(monkeypatch):
+    pytest.importorskip("ollama")
+    from benchmarks.stub_llm_server import server_root, start_stub_server
+
+    server, _ = start_stub_server()
+    monkeypatch.setenv("LLM_ROUTE_CLASSIFY", "ollama:small")
+    backend = llm_client.OllamaBackend(host=server_root(server), model="big")
+    llm_client.set_backend(backend, "ollama")
+    try:
+        messages = [{"role": "user", "content": "hi"}]
+        llm_client.chat(messages, model="gpt-3.5-turbo", task="classify", timeout=3)
+        llm_client.chat(messages, model="gpt-3.5-turbo", backend="ollama")
+        assert set(server.keep_alive) == {"small", "big"}
+        assert sorted(backend._clients) == [3, backend.timeout]
+    finally:
+        llm_client.close_all()
+        server.shutdown()
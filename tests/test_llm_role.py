@@ -0,0 +1,35 @@
+import threading
+import time
+
+import pytest
+
+import llm_client
+import llm_role
+
+
+def test_a_scenario_answered_on_its_retry_is_not_reported_as_timed_out(monkeypatch):
+    pytest.importorskip("openai")
+    from benchmarks.stub_llm_server import start_stub_server
+
+    calls = []
+    lock = threading.Lock()
+
+    def slow_then_slower_retry(body):
+        with lock:
+            calls.append(body)
+            first = len(calls) == 1
+        # the first attempt outlives the client timeout, the retry answers late
+        time.sleep(1.5 if first else 0.8)
+        return "answer"
+
+    server, base_url = start_stub_server(responder=slow_then_slower_retry)
+    monkeypatch.delenv("LLM_ROUTE_ROLE_DEMO", raising=False)
+    monkeypatch.setenv("LLM_BACKEND", "openai")
+    llm_client.set_backend(llm_client.OpenAIBackend(api_key="stub", base_url=base_url), "openai")
+    try:
+        scenarios = llm_role.build_scenarios("hi", {"a": None, "b": "Be brief."})
+        results = llm_role.run_scenarios(scenarios, api_key="stub", max_concurrency=2, timeout=1.0)
+        assert [r["assistant"] for r in results.values()] == ["answer", "answer"]
+    finally:
+        llm_client.close_all()
+        server.shutdown()
@@ -0,0 +1,28 @@
+import pytest
+
+from query_guard import QueryGuard
+
+COUNTER = "WITH RECURSIVE r(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM r{body}) "
+
+
+@pytest.mark.parametrize("sql", [
+    COUNTER.format(body="") + "SELECT n FROM r LIMIT 10",
+    COUNTER.format(body=" LIMIT 10") + "SELECT count(*) FROM r",
+    COUNTER.format(body=" WHERE n < 10 LIMIT 10") + "SELECT n FROM r WHERE n IN (SELECT 1)",
+    COUNTER.format(body="") + "SELECT n FROM r UNION ALL SELECT 0 LIMIT 5",
+])
+def test_recursive_cte_with_its_own_limit_runs(sample_conn, sql):
+    assert QueryGuard().estimate(sample_conn, sql)[1] is None
+
+
+@pytest.mark.parametrize("sql", [
+    COUNTER.format(body="") + "SELECT count(*) FROM r",
+    COUNTER.format(body="") + "SELECT n FROM r WHERE n IN (SELECT 1 LIMIT 1)",
+    COUNTER.format(body="") + "SELECT n FROM r, (SELECT CASE_ID FROM AMLcase LIMIT 1)",
+    COUNTER.format(body=" WHERE n IN (SELECT 1 LIMIT 1)") + "SELECT count(*) FROM r",
+    "WITH RECURSIVE a(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM a LIMIT 5), "
+    "b(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM b) SELECT count(*) FROM a, b",
+])
+def test_recursive_cte_bounded_only_elsewhere_is_rejected(sample_conn, sql):
+    cost, reason = QueryGuard().estimate(sample_conn, sql)
+    assert reason == "Recursive CTE without a LIMIT may not terminate."
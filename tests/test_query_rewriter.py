@@ -0,0 +1,29 @@
+import pytest
+
+from query_rewriter import RollupRewriter
+from sql_validator import SqlValidator
+
+REWRITTEN = [
+    "SELECT Analyst, COUNT(*) AS n FROM AMLcase GROUP BY Analyst ORDER BY n DESC",
+    "SELECT CASE_Status, COUNT(*) FROM AMLcase GROUP BY 1 ORDER BY 2",
+    "SELECT Analyst, COUNT(*) AS n FROM AMLcase GROUP BY Analyst ORDER BY n DESC, Analyst LIMIT 5",
+    "SELECT Analyst, COUNT(*) FROM AMLcase GROUP BY Analyst LIMIT 5",
+    "SELECT COUNT(*) FROM AMLcase WHERE Analyst = 'Brad Pitt'",
+]
+
+
+@pytest.mark.parametrize("sql", REWRITTEN)
+def test_rewritten_counts_match_the_table(sample_conn, sql):
+    answered = RollupRewriter().execute(sample_conn, sql, SqlValidator().allowed(sample_conn))
+    assert answered is not None
+    cur = sample_conn.execute(sql)
+    assert answered == ([d[0] for d in cur.description], cur.fetchall())
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT Analyst, COUNT(*) AS n FROM AMLcase GROUP BY Analyst ORDER BY n DESC LIMIT 3",
+    "SELECT CASE_Status, COUNT(*) FROM AMLcase GROUP BY CASE_Status ORDER BY COUNT(*) LIMIT 2 OFFSET 1",
+])
+def test_limit_over_tied_counts_runs_as_written(sample_conn, sql):
+    # several analysts and statuses share a count in the sample data
+    assert RollupRewriter().execute(sample_conn, sql, SqlValidator().allowed(sample_conn)) is None
@@ -0,0 +1,38 @@
+import pytest
+
+from sql_templates import TemplateStore
+
+ANALYST_SQL = "SELECT COUNT(*) FROM AMLcase WHERE Analyst = 'Bob Smith'"
+COUNTRY_SQL = "SELECT * FROM AMLcase WHERE Event_Country = 'India'"
+COUNTRIES = {"india": "India", "uk": "UK"}
+
+
+@pytest.fixture
+def store():
+    store = TemplateStore(domain_fn=lambda column: COUNTRIES if column == "Event_Country" else None)
+    assert store.learn("How many cases were analysed by Bob Smith?", ANALYST_SQL) is not None
+    assert store.learn("Show cases from India", COUNTRY_SQL) is not None
+    return store
+
+
+@pytest.mark.parametrize("prompt, params", [
+    ("How many cases were analysed by Diana Prince?", ("Diana Prince",)),
+    ("how many cases were analysed by Alice", ("Alice",)),
+    ("Show cases from uk", ("UK",)),
+])
+def test_values_fill_the_slots(store, prompt, params):
+    sql, filled, _ = store.match(prompt)
+    assert filled == params
+    assert "?" in sql
+
+
+@pytest.mark.parametrize("prompt", [
+    "How many cases were analysed by anyone but Bob",
+    "How many cases were analysed by not Bob",
+    "How many cases were analysed by Bob or Alice",
+    "How many cases were analysed by everyone except Bob",
+    "Show cases from India or UK",
+    "Show cases from India since 2023",
+])
+def test_conditions_in_a_slot_go_to_the_llm(store, prompt):
+    assert store.match(prompt) is None
@@ -0,0 +1,43 @@
+import pytest
+
+from db_agent_app import run_select
+from sql_validator import SqlValidator, parse_select
+
+CTE_AND_SUBQUERY_SHAPES = [
+    "WITH x AS (SELECT Analyst, count(*) n FROM AMLcase GROUP BY Analyst) SELECT count(*) FROM x",
+    "WITH x AS MATERIALIZED (SELECT Analyst FROM AMLcase) SELECT count(*) FROM x a, x b",
+    "WITH x AS NOT MATERIALIZED (SELECT Analyst FROM AMLcase) SELECT count(*) FROM x",
+    "WITH RECURSIVE r(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM r WHERE n < 5) SELECT count(*) FROM r",
+    "WITH a AS (SELECT CASE_ID FROM AMLcase), b AS (SELECT count(*) c FROM a) SELECT c FROM b",
+    "SELECT count(*) FROM (SELECT Analyst, count(*) n FROM AMLcase GROUP BY Analyst) AS s",
+    "SELECT count(*) FROM AMLcase WHERE Analyst IN (SELECT Analyst FROM AMLcase GROUP BY Analyst "
+    "HAVING count(*) > 5)",
+    "SELECT a.CASE_ID FROM AMLcase a JOIN (SELECT CASE_ID FROM AMLcase LIMIT 3) s ON s.CASE_ID = a.CASE_ID",
+]
+
+
+@pytest.mark.parametrize("sql", CTE_AND_SUBQUERY_SHAPES)
+def test_cte_and_subquery_shapes_run_as_on_sqlite(sample_conn, sql):
+    result = run_select(sample_conn, sql, validator=SqlValidator())
+    assert result.error is None, result.error
+    assert result.rows == sample_conn.execute(sql).fetchall()
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT * FROM users",
+    "WITH users AS (SELECT 1) SELECT count(*) FROM main.users",
+    "SELECT count(*) FROM AMLcase WHERE EXISTS (WITH users AS (SELECT 1) SELECT 1 FROM users)",
+])
+def test_a_cte_cannot_stand_in_for_a_table_outside_the_allow_list(sample_conn, sql):
+    assert run_select(sample_conn, sql, validator=SqlValidator()).error is not None
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT count(*) FROM (AMLcase, users)",
+    "SELECT count(*) FROM ((users))",
+    "SELECT count(*) FROM (AMLcase a JOIN users u ON u.rowid = a.rowid)",
+])
+def test_tables_in_a_parenthesized_join_list_are_checked(sample_conn, sql):
+    assert "users" in parse_select(sql).tables
+    parsed = SqlValidator().validate(sample_conn, sql)
+    assert parsed.error is not None and "users" in parsed.error
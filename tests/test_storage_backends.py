@@ -0,0 +1,85 @@
+import sqlite3
+
+import pytest
+
+from db_agent_app import run_select
+from sql_validator import SqlValidator
+from storage_backends import portable
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT Analyst, count(*) FROM AMLcase GROUP BY Analyst",
+    "SELECT CASE_ID, CASE_ID FROM AMLcase WHERE Analyst = ? ORDER BY create_date LIMIT 5",
+    "SELECT count(*) FROM AMLcase WHERE NOT Analyst IS NULL",
+    "SELECT Analyst FROM AMLcase GROUP BY Analyst HAVING count(*) > 5",
+])
+def test_portable_statements(sql):
+    assert portable(sql)
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT count(*) FROM AMLcase WHERE Analyst LIKE 'a%'",
+    "SELECT lower(Analyst) FROM AMLcase",
+    "SELECT upper(customer) FROM AMLcase",
+    "SELECT count(*) / 2 FROM AMLcase",
+    "SELECT rowid FROM AMLcase",
+    "SELECT count(*) FROM AMLcase WHERE CASE_ID > 5",
+    "SELECT CASE_ID FROM AMLcase LIMIT 5, 10",
+    "SELECT `CASE_ID` FROM AMLcase",
+    "SELECT count(*) FROM AMLcase WHERE Analyst = :name",
+    "SELECT strftime('%Y', create_date) FROM AMLcase",
+])
+def test_unportable_statements(sql):
+    assert not portable(sql)
+
+
+@pytest.fixture
+def duckdb_router(sample_db, tmp_path):
+    """
+    (SQLite connection, router sending every portable statement to DuckDB)
+    over a sample database with a case whose Analyst is NULL and one whose
+    Analyst is ''.
+    """
+    pytest.importorskip("duckdb")
+    from parquet_export import export_tables
+    from storage_backends import DuckDBBackend, QueryRouter
+
+    conn = sqlite3.connect(sample_db)
+    stored = conn.execute("SELECT * FROM AMLcase LIMIT 1").fetchone()
+    columns = [r[1] for r in conn.execute("PRAGMA table_info(AMLcase)")]
+    analyst, status = columns.index("Analyst"), columns.index("AAA_Status")
+    for case_id, value in (("NULLCASE1", None), ("EMPTYCASE1", "")):
+        row = list(stored)
+        row[0], row[analyst], row[status] = case_id, value, value
+        conn.execute(f"INSERT INTO AMLcase VALUES ({', '.join('?' * len(row))})", row)
+    conn.commit()
+    out = str(tmp_path / "parquet")
+    export_tables(sample_db, out, partition_by="none")
+    yield conn, QueryRouter(DuckDBBackend(out), mode="duckdb")
+    conn.close()
+
+
+@pytest.mark.parametrize("sql, params", [
+    ("SELECT count(*) FROM AMLcase WHERE NOT Analyst IS NULL", ()),
+    ("SELECT count(*) FROM AMLcase WHERE Analyst IS NULL", ()),
+    ("SELECT count(*) FROM AMLcase WHERE Analyst = ''", ()),
+    ("SELECT Analyst, AAA_Status, count(*) FROM AMLcase GROUP BY Analyst, AAA_Status "
+     "ORDER BY Analyst, AAA_Status", ()),
+    ("SELECT CASE_ID, CASE_ID, Analyst FROM AMLcase ORDER BY CASE_ID LIMIT ?", ("5",)),
+    ("SELECT CASE_ID AS id, count(*) AS id FROM AMLcase WHERE CASE_ID = ? GROUP BY CASE_ID", ("NULLCASE1",)),
+])
+def test_router_results_match_sqlite(duckdb_router, sql, params):
+    conn, router = duckdb_router
+    result = run_select(conn, sql, params, validator=SqlValidator(), router=router)
+    assert result.error is None, result.error
+    cur = conn.execute(sql, params)
+    assert result.columns == [d[0] for d in cur.description]
+    assert result.rows == cur.fetchall()
+    assert router.stats()["duckdb"] == 1
+
+
+def test_export_keeps_null_apart_from_empty_string(duckdb_router):
+    conn, router = duckdb_router
+    rows = router.backend.execute("SELECT CASE_ID, Analyst, AAA_Status FROM AMLcase "
+                                  "WHERE CASE_ID IN ('NULLCASE1', 'EMPTYCASE1') ORDER BY CASE_ID")[1]
+    assert rows == [("EMPTYCASE1", "", ""), ("NULLCASE1", None, None)]
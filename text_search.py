@@ -0,0 +1,139 @@
+"""
+Full-text search structures over the free-text AML columns.
+
+AMLcase_fts indexes AMLcase.customer and Analyst, AMLevent_fts indexes
+AMLevent.event_description. Both are FTS5 external-content tables: they
+store only the index, their rowid is the source row's rowid and the text is
+read back from the source table. AMLcase_customer holds one row per case and
+customer name, split out of the comma-separated AMLcase.customer, so a person
+is found with an index seek instead of customer LIKE '%name%'.
+
+Triggers named search_<table>_* keep all three in step with every insert,
+update and delete. A bulk load can suspend them and rebuild() afterwards,
+which is much cheaper than maintaining the index row by row. Rebuild also
+after a VACUUM: it may renumber the rowids of tables without an INTEGER
+PRIMARY KEY, which AMLcase and AMLevent are.
+"""
+import sqlite3
+from typing import List, Set
+
+# Source table -> (FTS table, indexed columns).
+FTS_TABLES = {
+    "AMLcase": ("AMLcase_fts", ("customer", "Analyst")),
+    "AMLevent": ("AMLevent_fts", ("event_description",)),
+}
+LINK_TABLE = "AMLcase_customer"
+# Shadow tables FTS5 keeps for each index; never queried directly.
+_SHADOW_SUFFIXES = ("_data", "_idx", "_docsize", "_config", "_content")
+
+# Added to the SQL-generation prompt for the search tables it shows.
+SEARCH_HINTS = {
+    LINK_TABLE: (f"{LINK_TABLE} has one row per case and customer name split out of AMLcase.customer; "
+                 f"find a person's cases with CASE_ID IN (SELECT CASE_ID FROM {LINK_TABLE} "
+                 f"WHERE customer = 'Steve Morgan') (case-insensitive; customer LIKE 'Steve%' for a "
+                 f"first name), never AMLcase.customer LIKE '%...%'."),
+    "AMLcase_fts": ("AMLcase_fts is a full-text index of AMLcase.customer and Analyst: search words with "
+                    "AMLcase.rowid IN (SELECT rowid FROM AMLcase_fts WHERE AMLcase_fts MATCH "
+                    "'Analyst: \"alice johnson\"'), not LIKE '%...%'."),
+    "AMLevent_fts": ("AMLevent_fts is a full-text index of AMLevent.event_description: search words with "
+                     "AMLevent.rowid IN (SELECT rowid FROM AMLevent_fts WHERE AMLevent_fts MATCH 'wire "
+                     "transfer*'), not LIKE '%...%'; MATCH is case-insensitive and 'word*' matches a prefix."),
+}
+
+
+def shadow_tables() -> Set[str]:
+    return {fts + suffix for fts, _ in FTS_TABLES.values() for suffix in _SHADOW_SUFFIXES}
+
+
+def _split_customers(expr: str) -> str:
+    # rows of json_each holding the comma-separated names of expr; json_quote
+    # escapes the text, so every comma left in it is a separator
+    return f"json_each('[' || replace(json_quote({expr}), ',', '\",\"') || ']')"
+
+
+def _link_insert(row: str) -> str:
+    return (f"INSERT OR IGNORE INTO {LINK_TABLE} (customer, CASE_ID) "
+            f"SELECT trim(value), {row}.CASE_ID FROM {_split_customers(row + '.customer')} "
+            f"WHERE trim(value) <> '';")
+
+
+def search_triggers(table: str) -> List[str]:
+    """
+    CREATE TRIGGER statements that keep the search structures of table in step.
+    """
+    fts, columns = FTS_TABLES[table]
+    cols = ", ".join(columns)
+
+    def add(row: str) -> str:
+        return (f"INSERT INTO {fts} (rowid, {cols}) "
+                f"VALUES ({row}.rowid, {', '.join(f'{row}.{c}' for c in columns)});")
+
+    def remove(row: str) -> str:
+        return (f"INSERT INTO {fts} ({fts}, rowid, {cols}) "
+                f"VALUES ('delete', {row}.rowid, {', '.join(f'{row}.{c}' for c in columns)});")
+
+    on_insert, on_delete, on_update = [add("NEW")], [remove("OLD")], [remove("OLD"), add("NEW")]
+    watched = list(columns)
+    if table == "AMLcase":
+        unlink = f"DELETE FROM {LINK_TABLE} WHERE CASE_ID = OLD.CASE_ID;"
+        on_insert.append(_link_insert("NEW"))
+        on_delete.append(unlink)
+        on_update += [unlink, _link_insert("NEW")]
+        watched.append("CASE_ID")
+    name = f"search_{table.lower()}"
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS {name}_insert AFTER INSERT ON {table} BEGIN {' '.join(on_insert)} END",
+        f"CREATE TRIGGER IF NOT EXISTS {name}_delete AFTER DELETE ON {table} BEGIN {' '.join(on_delete)} END",
+        f"CREATE TRIGGER IF NOT EXISTS {name}_update AFTER UPDATE OF {', '.join(sorted(set(watched)))} "
+        f"ON {table} BEGIN {' '.join(on_update)} END",
+    ]
+
+
+def create(conn: sqlite3.Connection) -> None:
+    """
+    Create the search tables and their triggers, and index the rows already stored.
+    """
+    for table, (fts, columns) in FTS_TABLES.items():
+        conn.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+                     f"{', '.join(columns)}, content='{table}', content_rowid='rowid')")
+    conn.execute(f"""
+    CREATE TABLE IF NOT EXISTS {LINK_TABLE} (
+        customer  TEXT NOT NULL COLLATE NOCASE,
+        CASE_ID   VARCHAR(100) NOT NULL,
+        PRIMARY KEY (customer, CASE_ID)
+    ) WITHOUT ROWID
+    """)
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{LINK_TABLE.lower()}_case ON {LINK_TABLE} (CASE_ID)")
+    for table in FTS_TABLES:
+        rebuild(conn, table)
+        for stmt in search_triggers(table):
+            conn.execute(stmt)
+
+
+def suspend(conn: sqlite3.Connection, table: str) -> None:
+    """
+    Drop the search triggers of table for a bulk load; rebuild() and
+    restore() afterwards.
+    """
+    for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = ? "
+                                "AND name LIKE 'search\\_%' ESCAPE '\\'", (table,)).fetchall():
+        conn.execute(f'DROP TRIGGER "{name}"')
+
+
+def restore(conn: sqlite3.Connection, table: str) -> None:
+    for stmt in search_triggers(table):
+        conn.execute(stmt)
+
+
+def rebuild(conn: sqlite3.Connection, table: str) -> None:
+    """
+    Re-index every row of table from scratch.
+    """
+    fts, _ = FTS_TABLES[table]
+    conn.execute(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
+    if table == "AMLcase":
+        conn.execute(f"DELETE FROM {LINK_TABLE}")
+        conn.execute(f"INSERT OR IGNORE INTO {LINK_TABLE} (customer, CASE_ID) "
+                     f"SELECT trim(s.value), c.CASE_ID FROM AMLcase c, {_split_customers('c.customer')} s "
+                     f"WHERE trim(s.value) <> ''")
+
@@ -0,0 +1,268 @@
+"""
+HTML pages of the query and classifier UIs, shared by the Flask apps
+(flask_app, customer_ui) and the ASGI app (asgi_app). Kept free of imports so
+the ASGI app can render them without loading Flask or bootstrapping the
+database.
+"""
+
+# Query UI (flask_app, asgi_app query_app); renders result.
+HTML_FORM = """
+<!doctype html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>AI Agent</title>
+    <style>
+        :root {
+            --primary-color: #1f6feb;
+            --secondary-color: #f4f4f4;
+            --text-color: #333;
+            --background-color: #f9f9f9;
+            --border-radius: 8px;
+        }
+        body {
+            font-family: Arial, sans-serif;
+            margin: 0;
+            padding: 0;
+            display: flex;
+            height: 100vh;
+            background-color: var(--background-color);
+        }
+        .side-menu {
+            width: 200px;
+            background: var(--primary-color);
+            color: white;
+            padding: 20px;
+            box-sizing: border-box;
+        }
+        .side-menu h2 {
+            margin-top: 0;
+            font-size: 18px;
+        }
+        .side-menu ul {
+            list-style: none;
+            padding: 0;
+        }
+        .side-menu ul li {
+            margin: 10px 0;
+        }
+        .side-menu ul li a {
+            color: white;
+            text-decoration: none;
+        }
+        .main-content {
+            flex: 1;
+            padding: 20px;
+            box-sizing: border-box;
+        }
+        .main-content h1 {
+            font-size: 24px;
+            color: var(--primary-color);
+        }
+        .main-content input[type="text"] {
+            width: 100%;
+            padding: 10px;
+            margin-bottom: 10px;
+            border: 1px solid #ddd;
+            border-radius: var(--border-radius);
+        }
+        .main-content button {
+            padding: 10px 20px;
+            background: var(--primary-color);
+            color: white;
+            border: none;
+            border-radius: var(--border-radius);
+            cursor: pointer;
+        }
+        .faq-panel {
+            width: 300px;
+            background: var(--secondary-color);
+            padding: 20px;
+            box-sizing: border-box;
+            border-left: 1px solid #ddd;
+            display: none;
+        }
+        .faq-panel h2 {
+            margin-top: 0;
+        }
+        .faq-toggle {
+            position: absolute;
+            right: 320px;
+            top: 20px;
+            cursor: pointer;
+            color: var(--primary-color);
+            text-decoration: underline;
+        }
+        .result { 
+            background: #f4f4f4; 
+            padding: 15px; 
+            margin-top: 20px; 
+            border-radius: 5px; 
+        }
+    </style>
+    <script>
+        function toggleFAQ() {
+            const faqPanel = document.getElementById('faq-panel');
+            if (faqPanel.style.display === 'none' || faqPanel.style.display === '') {
+                faqPanel.style.display = 'block';
+            } else {
+                faqPanel.style.display = 'none';
+            }
+        }
+    </script>
+</head>
+<body>
+    <div class="side-menu">
+        <h2>Menu</h2>
+        <ul>
+            <li><a href="#">History</a></li>
+            <li><a href="#">Favourite</a></li>
+            <li><a href="#">Others</a></li>
+        </ul>
+    </div>
+    <div class="main-content">
+        <h1><img src='/static/images/logo.jpg' height="40"> Welcome, Leo!</h1>
+        <form method="post">
+            <input type="text" id="prompt" name="prompt">
+            <select name="format">
+                <option value="dict">Rows as objects</option>
+                <option value="rows">Rows as lists</option>
+                <option value="columns">Columns</option>
+            </select>
+            <button type=submit>Submit</button>
+        </form>
+        {% if result %}
+        <div class="result">
+            <strong>Result(s):</strong>
+            <pre>{{ result }}</pre>
+        </div>
+        {% endif %}
+    </div>
+    <div id="faq-panel" class="faq-panel">
+        <h2>FAQ</h2>
+        <p>Tips to ask better questions</p>
+        <ul>
+            <li>Extract data for 1 data product at a time</li>
+            <li>Case-sentitive</li>
+            <li>Know the data elements</li>
+            <li>get help from Ops team</li>
+        </ul>
+        <p><b>Supported Data Products</b></p>
+        <ul>
+            <li><a href="#">Case</a></li>
+            <li><a href="#">Event</a></li>
+        </ul>
+    </div>
+    <div class="faq-toggle" onclick="toggleFAQ()">FAQ</div>
+</body>
+</html>
+
+"""
+
+# Classifier UI (customer_ui, asgi_app classifier_app); renders result and query.
+HTML_TEMPLATE = """
+<!doctype html>
+<html lang="en">
+<head>
+  <meta charset="utf-8" />
+  <meta name="viewport" content="width=device-width,initial-scale=1" />
+  <title>Customer Classifier — UI</title>
+  <style>
+    :root{
+      --blue:#145ea8;
+      --blue-600:#1f6feb;
+      --green:#2bb673;
+      --muted:#6b7280;
+      --card:#ffffff;
+      --bg:#f3f7fb;
+      --radius:10px;
+    }
+    html,body{height:100%;margin:0;font-family:Inter,Segoe UI,Roboto,Arial,sans-serif;background:var(--bg);color:#0f1724}
+    .wrap{max-width:1100px;margin:28px auto;padding:20px;display:grid;grid-template-columns:260px 1fr 320px;gap:20px;align-items:start}
+    .panel{background:var(--card);border-radius:var(--radius);box-shadow:0 6px 20px rgba(15,23,42,0.06);padding:18px}
+    .logo-placeholder{height:72px;border-radius:8px;background:linear-gradient(90deg,var(--blue-600),var(--green));display:flex;align-items:center;justify-content:center;color:#fff;font-weight:700;font-size:18px}
+    nav ul{list-style:none;padding:0;margin:14px 0 0}
+    nav li{padding:10px 6px;border-radius:8px;color:var(--blue-600);cursor:pointer}
+    nav li:hover{background:linear-gradient(90deg, rgba(31,111,235,0.06), rgba(43,182,115,0.04))}
+    .card-title{font-size:16px;color:var(--blue);margin:0 0 10px}
+    form textarea{width:100%;min-height:140px;padding:12px;border:1px solid #e6edf7;border-radius:8px;resize:vertical;font-size:14px}
+    .controls{display:flex;gap:10px;margin-top:12px;align-items:center}
+    .btn{background:var(--blue-600);color:#fff;border:none;padding:10px 14px;border-radius:8px;cursor:pointer;font-weight:600}
+    .btn.alt{background:#eef9f3;color:var(--green);border:1px solid rgba(43,182,115,0.12)}
+    .muted{color:var(--muted);font-size:13px}
+    .result{background:#0b1220;color:#e6eef8;padding:12px;border-radius:8px;overflow:auto;font-family:Consolas,monospace;font-size:13px}
+    .section{margin-bottom:14px}
+    /* FAQ right panel */
+    .faq h3{margin-top:0;margin-bottom:8px;color:var(--green)}
+    .faq p{margin:0;color:var(--muted);font-size:14px}
+    @media (max-width:1000px){
+      .wrap{grid-template-columns:1fr;padding:12px}
+      .faq{order:3}
+    }
+  </style>
+</head>
+<body>
+  <div class="wrap">
+    <aside class="panel">
+      <div class="logo-placeholder"><img src='/static/images/SCB logo.jpg'></div>
+      <nav>
+        <ul>
+          <li>History</li>
+          <li>Favourite</li>
+          <li>Others</li>
+        </ul>
+      </nav>
+    </aside>
+
+    <main class="panel">
+      <h2 class="card-title">Customer Attribute Classifier</h2>
+      <p class="muted">Enter natural language prompt describing the customer data you need extracted. The agent will return categorized attributes.</p>
+
+      <form method="post" id="query-form">
+        <div class="section">
+          <label for="prompt" class="muted">Prompt</label>
+          <textarea id="prompt" name="prompt" placeholder="e.g. rel_id: REL-12345 customer email john.doe@example.com age 34"></textarea>
+        </div>
+
+        <div class="controls">
+          <button class="btn" type="submit">Extract Attributes</button>
+          <button type="button" class="btn alt" id="example-btn">Insert Example</button>
+          <span class="muted" style="margin-left:auto">Blue &amp; Green theme • Read-only</span>
+        </div>
+      </form>
+
+      {% if result %}
+      <div style="margin-top:16px">
+        <h3 style="margin:0 0 8px;color:var(--blue)">Output</h3>
+        <div class="result">
+          <pre>{{ result }}</pre>
+        </div>
+      </div>
+      {% endif %}
+    </main>
+
+    <aside class="panel faq">
+      <h3>FAQ</h3>
+      <p>Instructions</p>
+      <hr style="margin:12px 0;border:none;border-top:1px solid #eef4f9">
+      <p class="muted"><strong>Tips:</strong><br>- Mention rel_id or customer id when possible.<br>- Use explicit attributes like "email", "date_of_birth".</p>
+    </aside>
+  </div>
+
+  <script>
+    (function(){
+      const form = document.getElementById('query-form');
+      const exampleBtn = document.getElementById('example-btn');
+      exampleBtn.addEventListener('click', function(){
+        document.getElementById('prompt').value = "rel_id: REL-12345 customer: John Doe email: john.doe@example.com age: 34 date_of_birth: 1990-05-12";
+      });
+      // Allow Ctrl+Enter submit
+      document.getElementById('prompt').addEventListener('keydown', function(e){
+        if ((e.ctrlKey || e.metaKey) && e.key === 'Enter') form.submit();
+      });
+    })();
+  </script>
+</body>
+</html>
+"""